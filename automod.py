@@ -0,0 +1,120 @@
+import os
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+# ---------------- THRESHOLDS ---------------- #
+
+FLOOD_MESSAGES = int(os.getenv("AUTOMOD_FLOOD_MESSAGES", "6"))        # messages...
+FLOOD_SECONDS = float(os.getenv("AUTOMOD_FLOOD_SECONDS", "8"))        # ...within this window
+DUPLICATE_MESSAGES = int(os.getenv("AUTOMOD_DUPLICATE_MESSAGES", "3"))
+DUPLICATE_SECONDS = float(os.getenv("AUTOMOD_DUPLICATE_SECONDS", "30"))
+MENTION_LIMIT = int(os.getenv("AUTOMOD_MENTION_LIMIT", "8"))          # user + role mentions...
+MENTION_SECONDS = float(os.getenv("AUTOMOD_MENTION_SECONDS", "10"))
+HISTORY = 16                        # hashes / mention counts kept per member
+TRACKED_MEMBERS = int(os.getenv("AUTOMOD_TRACKED_MEMBERS", "20000"))  # least recently active are evicted
+
+FLOOD = "flood"
+DUPLICATE = "duplicate"
+MENTIONS = "mentions"
+
+# detection -> (ModCog action, mute seconds, reason)
+ACTIONS = {
+    FLOOD: ("warn", None, "Automod: message flood"),
+    DUPLICATE: ("warn", None, "Automod: repeated messages"),
+    MENTIONS: ("mute", int(os.getenv("AUTOMOD_MUTE_SECONDS", "600")), "Automod: mass mentions"),
+}
+
+DETECTIONS = metrics.REGISTRY.counter("bot_automod_detections_total", "Spam detections", ("kind",))
+TRACKED = metrics.REGISTRY.gauge("bot_automod_tracked_members", "Members with live automod windows")
+
+
+def content_key(content: str):
+    """Case- and whitespace-insensitive hash; None for empty messages (attachments, embeds)"""
+    normalized = " ".join(content.casefold().split())
+    return hash(normalized) if normalized else None
+
+
+class MemberWindow:
+    """Sliding windows for one member; every deque is bounded, so each update is O(1)."""
+
+    __slots__ = ("times", "hashes", "hash_counts", "mentions", "mention_total")
+
+    def __init__(self):
+        self.times = deque(maxlen=FLOOD_MESSAGES)   # full + oldest inside the window = flood
+        self.hashes = deque()                       # (time, hash), at most HISTORY
+        self.hash_counts: dict[int, int] = {}
+        self.mentions = deque()                     # (time, count), at most HISTORY
+        self.mention_total = 0
+
+    def _drop_hash(self):
+        _, key = self.hashes.popleft()
+        count = self.hash_counts[key] - 1
+        if count:
+            self.hash_counts[key] = count
+        else:
+            del self.hash_counts[key]
+
+    def _drop_mentions(self):
+        self.mention_total -= self.mentions.popleft()[1]
+
+    def add(self, now: float, key, mentions: int):
+        """Record a message; returns the first rule it breaks, or None"""
+        self.times.append(now)
+        if len(self.times) == FLOOD_MESSAGES and now - self.times[0] <= FLOOD_SECONDS:
+            return FLOOD
+
+        if key is not None:
+            while self.hashes and (now - self.hashes[0][0] > DUPLICATE_SECONDS or len(self.hashes) >= HISTORY):
+                self._drop_hash()
+            self.hashes.append((now, key))
+            self.hash_counts[key] = self.hash_counts.get(key, 0) + 1
+            if self.hash_counts[key] >= DUPLICATE_MESSAGES:
+                return DUPLICATE
+
+        if mentions:
+            while self.mentions and (now - self.mentions[0][0] > MENTION_SECONDS or len(self.mentions) >= HISTORY):
+                self._drop_mentions()
+            self.mentions.append((now, mentions))
+            self.mention_total += mentions
+            if self.mention_total >= MENTION_LIMIT:
+                return MENTIONS
+        return None
+
+
+class SpamTracker:
+    """Per-(guild, user) windows in an LRU bounded to ``max_members`` entries.
+
+    A detection clears the member's window, so one burst is acted on once.
+    """
+
+    def __init__(self, max_members: int = TRACKED_MEMBERS):
+        self.max_members = max_members
+        self._windows: OrderedDict[tuple, MemberWindow] = OrderedDict()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def check(self, guild_id: int, user_id: int, content: str, mentions: int = 0, now: float = None):
+        key = (guild_id, user_id)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = MemberWindow()
+            if len(self._windows) > self.max_members:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+
+        kind = window.add(time.monotonic() if now is None else now, content_key(content), mentions)
+        if kind is not None:
+            del self._windows[key]
+            DETECTIONS.inc(kind)
+        return kind
+
+    def forget(self, guild_id: int, user_id: int = None):
+        if user_id is not None:
+            self._windows.pop((guild_id, user_id), None)
+            return
+        for key in [key for key in self._windows if key[0] == guild_id]:
+            del self._windows[key]
@@ -0,0 +1,285 @@
+import random
+import asyncio
+import itertools
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.ext import commands
+from discord.guild import BulkBanResult
+
+from database import Database
+from guild_config import GuildConfigStore, DEFAULT_LOG_CHANNEL_ID
+from permissions import PermissionCache
+from member_cache import MemberLRU
+
+# Stand-ins for the parts of discord.py the cogs touch. Every REST call goes
+# through FakeHTTP, which sleeps for a simulated round trip and counts the
+# request by route, so nothing ever leaves the process.
+
+_ids = itertools.count(10**17)
+
+
+def snowflake() -> int:
+    return next(_ids)
+
+
+class FakeHTTP:
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 20):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.calls = Counter()
+
+    async def request(self, route: str):
+        self.calls[route] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeRole:
+    def __init__(self, guild, name: str, role_id: int = None, permissions: discord.Permissions = None):
+        self.guild = guild
+        self.id = role_id or snowflake()
+        self.name = name
+        self.permissions = permissions or discord.Permissions.none()
+        self.mention = f"<@&{self.id}>"
+
+
+class FakeMessage:
+    def __init__(self, http: FakeHTTP, channel, message_id: int = None):
+        self.http = http
+        self.channel = channel
+        self.id = message_id or snowflake()
+
+    async def edit(self, **kwargs):
+        await self.http.request("PATCH /messages")
+
+    async def reply(self, *args, **kwargs):
+        await self.http.request("POST /messages")
+
+    def to_reference(self, **kwargs):
+        return discord.MessageReference(message_id=self.id, channel_id=self.channel.id, **kwargs)
+
+
+class FakeChannel:
+    def __init__(self, http: FakeHTTP, guild, channel_id: int = None):
+        self.http = http
+        self.guild = guild
+        self.id = channel_id or snowflake()
+        self.mention = f"<#{self.id}>"
+
+    async def send(self, *args, **kwargs):
+        await self.http.request("POST /messages")
+        return FakeMessage(self.http, self)
+
+    def get_partial_message(self, message_id: int):
+        return FakeMessage(self.http, self, message_id)
+
+    def overwrites_for(self, target):
+        return discord.PermissionOverwrite()
+
+    async def set_permissions(self, target, **kwargs):
+        await self.http.request("PUT /permissions")
+
+
+class FakeMember:
+    def __init__(self, http: FakeHTTP, guild, member_id: int = None, roles=(), manage_guild: bool = False):
+        self.http = http
+        self.guild = guild
+        self.id = member_id or snowflake()
+        self.name = f"user{self.id % 100000}"
+        self.mention = f"<@{self.id}>"
+        self.roles = list(roles)
+        self.guild_permissions = discord.Permissions(manage_guild=manage_guild)
+        now = datetime.now(timezone.utc)
+        self.created_at = now - timedelta(days=random.randint(1, 2000))
+        self.joined_at = now - timedelta(days=random.randint(0, 500))
+        self.timed_out_until = None
+
+    def __str__(self):
+        return self.name
+
+    def get_role(self, role_id: int):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    def is_timed_out(self) -> bool:
+        return self.timed_out_until is not None and self.timed_out_until > datetime.now(timezone.utc)
+
+    async def send(self, *args, **kwargs):
+        await self.http.request("POST /dm")
+
+    async def add_roles(self, *roles, reason=None):
+        await self.http.request("PUT /member-roles")
+        self.roles.extend(r for r in roles if r not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.http.request("DELETE /member-roles")
+        self.roles = [r for r in self.roles if r not in roles]
+
+    async def kick(self, reason=None):
+        await self.http.request("DELETE /members")
+
+    async def ban(self, reason=None, **kwargs):
+        await self.http.request("PUT /bans")
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP, member_count: int, channel_count: int = 5):
+        self.http = http
+        self.id = snowflake()
+        self.name = "Benchmark Guild"
+        self.chunked = True
+        self.mod_role = FakeRole(self, "Moderator")
+        self.roles = [FakeRole(self, "@everyone", self.id), self.mod_role, FakeRole(self, "Muted")]
+        self.log_channel = FakeChannel(http, self, DEFAULT_LOG_CHANNEL_ID)
+        self.channels = [self.log_channel] + [FakeChannel(http, self) for _ in range(channel_count - 1)]
+        self.me = FakeMember(http, self, manage_guild=True)
+        self.members = [FakeMember(http, self) for _ in range(member_count)]
+        self.moderator = FakeMember(http, self, roles=[self.mod_role])
+        self._members = {m.id: m for m in self.members + [self.me, self.moderator]}
+
+    def get_role(self, role_id: int):
+        return discord.utils.get(self.roles, id=role_id)
+
+    def get_channel(self, channel_id: int):
+        return discord.utils.get(self.channels, id=channel_id)
+
+    def get_member(self, member_id: int):
+        return self._members.get(member_id)
+
+    async def fetch_member(self, member_id: int):
+        await self.http.request("GET /members")
+        member = self._members.get(member_id)
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member")
+        return member
+
+    async def create_role(self, name: str, **kwargs):
+        await self.http.request("POST /roles")
+        role = FakeRole(self, name)
+        self.roles.append(role)
+        return role
+
+    async def unban(self, user, reason=None):
+        await self.http.request("DELETE /bans")
+
+    async def bulk_ban(self, users, reason=None, delete_message_seconds=0):
+        await self.http.request("POST /bulk-ban")
+        return BulkBanResult(banned=[discord.Object(u.id) for u in users], failed=[])
+
+
+class _FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "fake"
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+        self.sent = []    # content of every message sent, for tests
+        self.edits = []   # embed of every message edit
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.sent.append(content)
+        await self.interaction.http.request("POST /interactions/callback")
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        self.edits.append(kwargs.get("embed"))
+        await self.interaction.http.request("POST /interactions/callback")
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+        await self.interaction.http.request("POST /interactions/callback")
+
+
+class FakeFollowup:
+    def __init__(self, http: FakeHTTP):
+        self.http = http
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+        await self.http.request("POST /webhooks")
+
+
+class FakeInteraction:
+    def __init__(self, bot, guild: FakeGuild, channel: FakeChannel, user: FakeMember, message: FakeMessage = None):
+        self.http = bot.http_stub
+        self.client = bot
+        self.id = snowflake()
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.user = user
+        self.message = message
+        self.extras = {}
+        self.command = None
+        self.created_at = discord.utils.utcnow()
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self.http)
+        self._original = None
+
+    async def original_response(self):
+        await self.http.request("GET /messages/@original")
+        if self._original is None:
+            self._original = FakeMessage(self.http, self.channel)
+        return self._original
+
+
+class FakeContext:
+    """Just enough of commands.Context to run checks and call command callbacks"""
+
+    def __init__(self, bot, guild: FakeGuild, author: FakeMember, channel: FakeChannel = None):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.channel = channel or guild.channels[-1]
+        self.command = None
+        self.message = None
+
+    async def send(self, *args, **kwargs):
+        await self.bot.http_stub.request("POST /messages")
+
+
+class BenchBot(commands.Bot):
+    """A bot that never logs in: cogs are added to it and driven directly"""
+
+    def __init__(self, db: Database, http: FakeHTTP):
+        super().__init__(command_prefix=".", intents=discord.Intents.default(), help_command=None)
+        self.db = db
+        self.http_stub = http
+        self.config = GuildConfigStore(db)
+        self.perms = PermissionCache(self, self.config)
+        self.member_cache = MemberLRU(self)
+        self.guild_objects: dict[int, FakeGuild] = {}
+        self.channel_objects: dict[int, FakeChannel] = {}
+
+    def add_guild(self, guild: FakeGuild):
+        self.guild_objects[guild.id] = guild
+        for channel in guild.channels:
+            self.channel_objects[channel.id] = channel
+
+    async def wait_until_ready(self):
+        return
+
+    def get_guild(self, guild_id: int):
+        return self.guild_objects.get(guild_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channel_objects.get(channel_id)
+
+    async def fetch_user(self, user_id: int):
+        await self.http_stub.request("GET /users")
+        return discord.Object(user_id)
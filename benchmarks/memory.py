@@ -0,0 +1,156 @@
+"""Resident memory of the member cache profiles on a simulated large guild.
+
+    python -m benchmarks.memory --members 100000 --active 20000 --events 100000
+
+Each profile runs in its own process: a real discord.py connection state
+receives the GUILD_CREATE of one big guild, the member chunks startup
+chunking would deliver (default profile only), then a stream of messages
+from the active members. RSS is sampled after each step; lookups of active
+members afterwards show how often the caches answer without the API.
+"""
+import os
+import gc
+import sys
+import json
+import random
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = ("default", "low-memory")
+CHUNK_SIZE = 1000   # members per GUILD_MEMBERS_CHUNK, as Discord sends them
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=100000, help="guild size")
+    parser.add_argument("--active", type=int, default=20000, help="distinct members sending messages")
+    parser.add_argument("--events", type=int, default=100000, help="messages received")
+    parser.add_argument("--lookups", type=int, default=10000, help="member lookups after the traffic")
+    parser.add_argument("--lru-size", type=int, default=None, help="MEMBER_CACHE_SIZE (default: the env/module default)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)   # child process
+    return parser.parse_args(argv)
+
+
+# ---------------- PAYLOADS ---------------- #
+
+def guild_payload(guild_id: int, member_count: int) -> dict:
+    return {
+        "id": str(guild_id),
+        "name": "Memory Benchmark",
+        "member_count": member_count,
+        "large": True,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [],
+        "members": [],
+    }
+
+
+def member_payload(user_id: int, joined_at: str) -> dict:
+    return {
+        "user": {"id": str(user_id), "username": f"member{user_id % 10**6}", "discriminator": "0",
+                 "global_name": None, "avatar": None},
+        "roles": [],
+        "joined_at": joined_at,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+# ---------------- ONE PROFILE ---------------- #
+
+async def measure_profile(args) -> dict:
+    import discord
+    from discord.ext import commands
+    import member_cache
+    from benchmarks.fake_discord import snowflake
+    from benchmarks.run import rss_mb
+
+    def sample():
+        gc.collect()
+        return round(rss_mb(), 1)
+
+    random.seed(args.seed)
+    intents = discord.Intents.default()
+    intents.members = True
+    low_memory = args.profile == "low-memory"
+    bot = commands.Bot(command_prefix="!", intents=intents, **member_cache.bot_options(low_memory))
+    lru = member_cache.MemberLRU(bot, max_members=args.lru_size or member_cache.MEMBER_CACHE_SIZE)
+    state = bot._connection
+    rss = {"start": sample()}
+
+    guild = state._add_guild_from_data(guild_payload(snowflake(), args.members))
+    user_ids = [snowflake() for _ in range(args.members)]
+    joined_at = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    if state._chunk_guilds:
+        # what GUILD_MEMBERS_CHUNK handling does for a startup chunk request
+        for i in range(0, len(user_ids), CHUNK_SIZE):
+            for user_id in user_ids[i:i + CHUNK_SIZE]:
+                member = discord.Member(data=member_payload(user_id, joined_at), guild=guild, state=state)
+                if state.member_cache_flags.joined:
+                    guild._add_member(member)
+    rss["chunked"] = sample()
+
+    # every message carries its author; the LRU keeps the ones discord.py doesn't
+    active = user_ids[:args.active]
+    for _ in range(args.events):
+        author = discord.Member(data=member_payload(random.choice(active), joined_at), guild=guild, state=state)
+        lru.put(author)
+    rss["traffic"] = sample()
+
+    answered = sum(lru.get(guild, random.choice(active)) is not None for _ in range(args.lookups))
+    return {
+        "profile": args.profile,
+        "gateway_members": len(guild._members),
+        "lru_members": len(lru),
+        "rss_mb": rss,
+        "answered_pct": round(answered / args.lookups * 100, 1) if args.lookups else None,
+    }
+
+
+# ---------------- REPORT ---------------- #
+
+def run_profile(args, profile: str) -> dict:
+    """A fresh interpreter per profile, so one's heap can't inflate the other's RSS"""
+    argv = [sys.executable, "-m", "benchmarks.memory", "--profile", profile,
+            "--members", str(args.members), "--active", str(args.active), "--events", str(args.events),
+            "--lookups", str(args.lookups), "--seed", str(args.seed)]
+    if args.lru_size:
+        argv += ["--lru-size", str(args.lru_size)]
+    out = subprocess.run(
+        argv, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def print_report(results: list):
+    print(f"{'profile':<12} {'cached':>8} {'lru':>7} {'rss start':>10} {'chunked':>9} {'traffic':>9} {'answered':>9}")
+    for r in results:
+        rss = r["rss_mb"]
+        print(
+            f"{r['profile']:<12} {r['gateway_members']:>8} {r['lru_members']:>7} {rss['start']:>10.1f} "
+            f"{rss['chunked']:>9.1f} {rss['traffic']:>9.1f} {r['answered_pct'] or 0:>8.1f}%"
+        )
+    if len(results) == 2:
+        before, after = (r["rss_mb"]["traffic"] - r["rss_mb"]["start"] for r in results)
+        print(f"member memory: {before:.1f} MB -> {after:.1f} MB")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        print(json.dumps(asyncio.run(measure_profile(args))))
+        return 0
+    print_report([run_profile(args, profile) for profile in PROFILES])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
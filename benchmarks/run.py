@@ -0,0 +1,324 @@
+"""Offline load test: drives the real cogs against benchmarks.fake_discord.
+
+    python -m benchmarks.run --clicks 20000 --users 5000 --concurrency 500
+    python -m benchmarks.run --latency-ms 50 --compare
+    python -m benchmarks.run --remote      # through the shared db_server.py backend
+
+Each run appends one JSON line to benchmarks/results.jsonl (throughput,
+p50/p99 latency, DB statements/s, simulated HTTP calls and memory per
+scenario); the file is git-ignored. --compare checks the run against the last one with the same
+parameters and exits non-zero on a regression.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=5000, help="join button clicks")
+    parser.add_argument("--users", type=int, default=2000, help="distinct members clicking")
+    parser.add_argument("--warns", type=int, default=1000, help="warn commands")
+    parser.add_argument("--mutes", type=int, default=500, help="mute + unmute pairs")
+    parser.add_argument("--targets", type=int, default=300, help="members targeted by moderation commands")
+    parser.add_argument("--concurrency", type=int, default=200, help="operations in flight at once")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated Discord round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--flush-ms", type=int, default=250, help="GIVEAWAY_FLUSH_MS for the entry batcher")
+    parser.add_argument("--readers", type=int, default=4, help="DB reader connections")
+    parser.add_argument("--remote", action="store_true", help="go through db_server.py's shared backend")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--compare", action="store_true", help="compare with the previous matching run")
+    parser.add_argument("--tolerance", type=float, default=20, help="allowed regression in percent")
+    return parser.parse_args(argv)
+
+
+# ---------------- MEASUREMENT ---------------- #
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def sql_statements() -> int:
+    import tracing
+    return sum(stats.count for op, stats in tracing.top(limit=None, by="count") if op.startswith("sql:"))
+
+
+async def measure(name: str, http, operations: list, concurrency: int) -> dict:
+    """Run coroutine factories with bounded concurrency and summarise them"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def run(operation):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                errors += 1
+                logging.exception(f"{name} operation failed")
+            latencies.append(time.perf_counter() - start)
+
+    statements, calls = sql_statements(), http.total
+    start = time.perf_counter()
+    await asyncio.gather(*(run(op) for op in operations))
+    elapsed = time.perf_counter() - start
+    statements, calls = sql_statements() - statements, http.total - calls
+
+    latencies.sort()
+    return {
+        "ops": len(operations),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "ops_per_s": round(len(operations) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0,
+        "db_statements": statements,
+        "db_ops_per_s": round(statements / elapsed, 1) if elapsed else None,
+        "http_calls": calls,
+    }
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to the peak where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ---------------- SCENARIOS ---------------- #
+
+async def run_benchmarks(args) -> dict:
+    from database import Database
+    from db_server import DatabaseServer, RemoteDatabase
+    from migrations import migrate
+    from benchmarks.fake_discord import BenchBot, FakeHTTP, FakeGuild, FakeInteraction, FakeContext
+    from cogs.mod import ModCog
+    import cogs.giveaway_cog as giveaway_cog
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    db = local_db = Database(os.path.join(workdir, "bench.db"), readers=args.readers)
+    await db.connect()
+    await migrate(db)
+    server = None
+    if args.remote:
+        # same cogs, but every statement makes a round trip to a local DatabaseServer
+        server = DatabaseServer(local_db, "127.0.0.1", 0)
+        await server.start()
+        db = RemoteDatabase(f"tcp://127.0.0.1:{server.port}", pool=args.readers)
+        await db.connect()
+
+    http = FakeHTTP(args.latency_ms, args.jitter_ms)
+    bot = BenchBot(db, http)
+    guild = FakeGuild(http, member_count=max(args.users, args.targets))
+    bot.add_guild(guild)
+    await bot.config.set(guild.id, "allowed_roles", frozenset({guild.mod_role.id}))
+
+    mod = ModCog(bot, db)
+    await bot.add_cog(mod)
+    giveaways = giveaway_cog.GiveawayCog(bot, db)
+    await bot.add_cog(giveaways)
+    channel = guild.channels[-1]
+    results = {}
+    memory = {"rss_start_mb": round(rss_mb(), 1)}
+
+    try:
+        # 🎉 giveaway: start, a click storm, then the end + draw
+        start_interaction = FakeInteraction(bot, guild, channel, guild.moderator)
+        await giveaways.giveaway_start.callback(giveaways, start_interaction, "Benchmark", 3, "1h")
+        giveaway_id = await db.fetchval("SELECT MAX(id) FROM giveaways")
+        message = start_interaction._original
+
+        clickers = guild.members[:args.users]
+
+        def click(user):
+            async def op():
+                interaction = FakeInteraction(bot, guild, channel, user, message)
+                await giveaway_cog.JoinGiveawayButton(giveaway_id).callback(interaction)
+            return op
+
+        results["giveaway_clicks"] = await measure(
+            "giveaway_clicks", http, [click(random.choice(clickers)) for _ in range(args.clicks)], args.concurrency
+        )
+        await giveaways.entries.flush()
+        results["giveaway_end"] = await measure(
+            "giveaway_end", http, [lambda: giveaways._end_due_giveaways([giveaway_id])], 1
+        )
+
+        # 🎉 the same storm against a giveaway with enforced requirements, then its re-validated end
+        await giveaways.giveaway_start.callback(
+            giveaways, FakeInteraction(bot, guild, channel, guild.moderator), "Gated", 3, "1h",
+            min_account_age="365d", not_muted=True,
+        )
+        gated_id = await db.fetchval("SELECT MAX(id) FROM giveaways")
+
+        def gated_click(user):
+            async def op():
+                interaction = FakeInteraction(bot, guild, channel, user, message)
+                await giveaway_cog.JoinGiveawayButton(gated_id).callback(interaction)
+            return op
+
+        results["giveaway_gated_clicks"] = await measure(
+            "giveaway_gated_clicks", http, [gated_click(random.choice(clickers)) for _ in range(args.clicks)], args.concurrency
+        )
+        await giveaways.entries.flush()
+        results["giveaway_gated_end"] = await measure(
+            "giveaway_gated_end", http, [lambda: giveaways._end_due_giveaways([gated_id])], 1
+        )
+
+        # 🔨 moderation: warns (with escalation), then mute/unmute pairs
+        targets = guild.members[:args.targets]
+
+        def command(name, *params, **kwargs):
+            async def op():
+                ctx = FakeContext(bot, guild, guild.moderator, channel)
+                cmd = bot.get_command(name)
+                if await cmd.can_run(ctx):
+                    await cmd(ctx, *params, **kwargs)
+            return op
+
+        results["mod_warn"] = await measure(
+            "mod_warn", http, [command("warn", random.choice(targets), reason="benchmark") for _ in range(args.warns)],
+            args.concurrency,
+        )
+        mute_targets = [random.choice(targets) for _ in range(args.mutes)]
+        results["mod_mute"] = await measure(
+            "mod_mute", http, [command("mute", m, "1h", reason="benchmark") for m in mute_targets], args.concurrency
+        )
+        results["mod_unmute"] = await measure(
+            "mod_unmute", http, [command("unmute", m) for m in mute_targets], args.concurrency
+        )
+        await mod.modlog.stop()
+    finally:
+        memory["rss_end_mb"] = round(rss_mb(), 1)
+        memory["rss_peak_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        await bot.remove_cog("GiveawayCog")
+        await bot.remove_cog("ModCog")
+        await db.close()
+        if server is not None:
+            await server.stop()
+            await local_db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"scenarios": results, "memory": memory, "http_routes": dict(http.calls)}
+
+
+# ---------------- RESULTS ---------------- #
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: str, params: dict):
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("params") == params:
+                last = run
+    return last
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> list:
+    """Regressions beyond ``tolerance`` percent in throughput or p99"""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if not before:
+            continue
+        if before.get("ops_per_s") and now.get("ops_per_s"):
+            drop = (before["ops_per_s"] - now["ops_per_s"]) / before["ops_per_s"] * 100
+            if drop > tolerance:
+                regressions.append(f"{name}: throughput -{drop:.0f}% ({before['ops_per_s']} -> {now['ops_per_s']} ops/s)")
+        if before.get("p99_ms") and now.get("p99_ms"):
+            rise = (now["p99_ms"] - before["p99_ms"]) / before["p99_ms"] * 100
+            if rise > tolerance:
+                regressions.append(f"{name}: p99 +{rise:.0f}% ({before['p99_ms']} -> {now['p99_ms']} ms)")
+    return regressions
+
+
+def print_report(run: dict):
+    print(f"{'scenario':<22} {'ops':>7} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'db ops/s':>10} {'http':>7} {'err':>4}")
+    for name, s in run["scenarios"].items():
+        print(
+            f"{name:<22} {s['ops']:>7} {s['ops_per_s'] or 0:>10.1f} {s['p50_ms']:>9.2f} {s['p99_ms']:>9.2f} "
+            f"{s['db_ops_per_s'] or 0:>10.1f} {s['http_calls']:>7} {s['errors']:>4}"
+        )
+    print("memory: " + ", ".join(f"{k}={v}" for k, v in run["memory"].items()))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    # the cog reads its batching knobs at import time
+    os.environ["GIVEAWAY_FLUSH_MS"] = str(args.flush_ms)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    run = asyncio.run(run_benchmarks(args))
+    if args.tracemalloc:
+        run["memory"]["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "tolerance")}
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "params": params,
+        **run,
+    }
+    print_report(run)
+
+    previous = previous_run(args.output, params) if args.compare else None
+    with open(args.output, "a") as f:
+        f.write(json.dumps(run) + "\n")
+
+    if previous:
+        regressions = compare(run, previous, args.tolerance)
+        print(f"compared with {previous['commit']} ({previous['timestamp']}): " + ("OK" if not regressions else "REGRESSION"))
+        for line in regressions:
+            print("  " + line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
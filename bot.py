@@ -1,35 +1,100 @@
+import time
+STARTED = time.perf_counter()
+
 import os
 import asyncio
 import logging
-import aiosqlite
 import discord
 from discord.ext import commands
-from discord import app_commands
-from keep_alive import keep_alive
-from cogs.mod import ModCog
+from keep_alive import KeepAliveServer
+from db_server import open_database
+from migrations import migrate
+from guild_config import GuildConfigStore, DEFAULT_PREFIX
+from permissions import PermissionCache
+from startup import StartupTimer, sync_commands
+import member_cache
+import metrics
+import sharding
+import tracing
 
 logging.basicConfig(level=logging.INFO)
 
-PREFIX = os.getenv("PREFIX", ".")
+startup = StartupTimer(STARTED)
+startup.mark("imports")
+
 TOKEN = os.getenv("DISCORD_TOKEN")
 DB_PATH = os.getenv("MOD_DB", "data/mod.db")
+# tcp://host:port of a shared db_server.py; required once more than one cluster runs
+DB_URL = os.getenv("MOD_DB_URL")
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+
+# loaded before the gateway connects
+EXTENSIONS = ("cogs.mod", "cogs.giveaway_cog", "cogs.automod", "cogs.maintenance")
+# loaded after the first READY; prefix commands only, so they never change the synced tree
+DEFERRED_EXTENSIONS = ("cogs.diagnostics",)
 
 # ✅ Intents
 intents = discord.Intents.default()
 intents.guilds = True
 intents.members = True
 intents.message_content = True
+# ✅ LOW_MEMORY=1 skips chunking and caches only members seen in events (member_cache.py)
+
+# ✅ Sharded mode (SHARD_COUNT/SHARD_IDS, usually set by launcher.py) runs several shards in this process
+BotBase = commands.AutoShardedBot if sharding.SHARDED else commands.Bot
+
+class CustomBot(BotBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **sharding.bot_options(), **member_cache.bot_options(), **kwargs)
+        # ✅ Shared database service (injected into every cog); local SQLite file or the shared server
+        self.db = open_database(DB_URL or DB_PATH, readers=DB_READERS)
+        # ✅ Per-guild settings; changes are announced as on_guild_config_update(guild_id, config)
+        self.config = GuildConfigStore(self.db, notify=lambda guild_id, config: self.dispatch("guild_config_update", guild_id, config))
+        # ✅ Cached moderator decisions used by every cog's permission checks
+        self.perms = PermissionCache(self, self.config)
+        # ✅ Member lookups for converters and background jobs; fetches on a miss when members aren't chunked
+        self.member_cache = member_cache.MemberLRU(self)
+
+    async def setup_hook(self):
+        # runs once after login, before the gateway connects (not again on reconnect)
+        startup.mark("login")
+        await ensure_db()
+        startup.mark("database")
+
+        for extension in EXTENSIONS:
+            await self.load_extension(extension)
+        startup.mark("extensions")
+
+        # the command tree is global, so only one cluster uploads it
+        if sharding.is_primary():
+            await sync_commands(self.tree, self.db)
+        startup.mark("command_sync")
 
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+async def get_prefix(bot: CustomBot, message: discord.Message):
+    if message.guild is None:
+        return DEFAULT_PREFIX
+    return (await bot.config.get(message.guild.id)).prefix
 
-# -------- SLASH COMMAND SYNC --------
+bot = CustomBot(command_prefix=get_prefix, intents=intents, help_command=None, tree_cls=tracing.TracedCommandTree)
+
+# -------- READY --------
 @bot.event
 async def on_ready():
-    await bot.tree.sync()   # 🔑 syncs slash commands
-    logging.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
-    logging.info("Slash commands synced ✅")
+    # fires again after every reconnect; startup work only happens the first time
+    if startup.ready:
+        logging.info("Gateway reconnected")
+        return
+    startup.mark("gateway")
+    startup.report()
+    logging.info(f"Logged in as {bot.user} (ID: {bot.user.id}, {sharding.describe()}, {'low-memory' if member_cache.LOW_MEMORY else 'full'} member cache)")
     logging.info("------")
 
+    for extension in DEFERRED_EXTENSIONS:
+        await bot.load_extension(extension)
+
+# -------- TRACING --------
+tracing.install(bot)   # times every prefix and slash command
+
 # ✅ Public say command
 @bot.command(name="say")
 async def say(ctx, *, message: str):
@@ -38,46 +103,24 @@ async def say(ctx, *, message: str):
 
 # ✅ Database setup
 async def ensure_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS warns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                mod_id INTEGER NOT NULL,
-                reason TEXT,
-                created_at INTEGER NOT NULL,
-                expires_at INTEGER,
-                permanent INTEGER DEFAULT 0
-            )
-        ''')
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS punishments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                type TEXT NOT NULL,
-                expires_at INTEGER NOT NULL
-            )
-        ''')
-        await db.commit()
+    await bot.db.connect()
+    await migrate(bot.db)
 
 # ✅ Main loop
 async def main():
-    await ensure_db()
-    await bot.add_cog(ModCog(bot, DB_PATH))
-
-    # 👇 Load your giveaway cog too
-    await bot.load_extension("cogs.giveaway_cog")
-
-    keep_alive()
-
     if not TOKEN:
         raise RuntimeError("DISCORD_TOKEN environment variable not set")
 
-    await bot.start(TOKEN)
+    metrics.install_rate_limit_counter()
+    server = KeepAliveServer(bot)
+    await server.start()
+    startup.mark("health_server")
+    try:
+        async with bot:
+            await bot.start(TOKEN)
+    finally:
+        await server.stop()
+        await bot.db.close()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+import discord
+from discord.ext import commands
+
+from automod import SpamTracker, ACTIONS, TRACKED
+from tracing import traced
+
+
+class AutoModCog(commands.Cog):
+    """Flood, duplicate and mention spam detection; punishments go through ModCog"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.tracker = SpamTracker()
+        self._acting: set[tuple] = set()    # (guild id, user id) with an action in flight
+
+    async def cog_load(self):
+        TRACKED.track((), lambda: len(self.tracker))
+
+    async def cog_unload(self):
+        TRACKED.untrack(())
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot or not isinstance(message.author, discord.Member):
+            return
+        config = await self.bot.config.get(message.guild.id)
+        if not config.automod:
+            return
+        mentions = len(message.raw_mentions) + len(message.raw_role_mentions)
+        kind = self.tracker.check(message.guild.id, message.author.id, message.content, mentions)
+        if kind is None:
+            return
+        # moderators are counted like everyone else but never punished
+        if await self.bot.perms.allows(message.author):
+            return
+        key = (message.guild.id, message.author.id)
+        if key in self._acting:
+            return
+        self._acting.add(key)
+        try:
+            await self._act(message, kind)
+        finally:
+            self._acting.discard(key)
+
+    @traced("automod.act")
+    async def _act(self, message: discord.Message, kind: str):
+        mod = self.bot.get_cog("ModCog")
+        if mod is None:
+            return
+        action, seconds, reason = ACTIONS[kind]
+        logging.info(f"Automod: {kind} by {message.author} ({message.author.id}) in guild {message.guild.id}")
+        delete = asyncio.create_task(self._delete(message))
+        try:
+            await mod.automod_punish(message.author, action, reason, seconds)
+        except discord.HTTPException as e:
+            logging.warning(f"Automod {action} failed for {message.author.id}: {e}")
+        await delete
+
+    @staticmethod
+    async def _delete(message: discord.Message):
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass  # already gone, or no Manage Messages here
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.tracker.forget(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.tracker.forget(guild.id)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(AutoModCog(bot))
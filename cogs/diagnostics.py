@@ -0,0 +1,72 @@
+import io
+import logging
+
+import discord
+from discord.ext import commands
+
+import tracing
+
+
+class DiagnosticsCog(commands.Cog):
+    """Owner-only views of the tracing stats and runtime profiler"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        return await self.bot.is_owner(ctx.author)
+
+    async def cog_command_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            return
+        logging.error(f"Error in command {ctx.command}", exc_info=error)
+
+    # ---------------- TRACES ---------------- #
+
+    @commands.group(invoke_without_command=True)
+    async def trace(self, ctx, by: str = "total"):
+        """Slowest operations: `trace [total|max|count|errors]`"""
+        if by not in ("total", "max", "count", "errors"):
+            return await ctx.send("Sort by one of: total, max, count, errors.")
+        rows = tracing.top(15, by)
+        if not rows:
+            return await ctx.send("Nothing traced yet.")
+        lines = [f"{'calls':>7} {'avg ms':>8} {'max ms':>8} {'err':>4}  op"]
+        for op, stats in rows:
+            avg = stats.total / stats.count * 1000
+            lines.append(f"{stats.count:>7} {avg:>8.2f} {stats.max * 1000:>8.2f} {stats.errors:>4}  {op[:70]}")
+        await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+    @trace.command(name="reset")
+    async def trace_reset(self, ctx):
+        tracing.reset()
+        await ctx.send("Trace stats cleared.")
+
+    # ---------------- PROFILER ---------------- #
+
+    @commands.group(invoke_without_command=True)
+    async def profile(self, ctx):
+        state = "running" if tracing.profiler.running else "stopped"
+        await ctx.send(f"Profiler ({tracing.profiler.backend}) is {state}.")
+
+    @profile.command(name="start")
+    async def profile_start(self, ctx, seconds: float = 30):
+        """Capture for `seconds` (0 = until `profile stop`)"""
+        if tracing.profiler.running:
+            return await ctx.send("Profiler is already running.")
+        tracing.profiler.start(seconds or None)
+        await ctx.send(f"Profiling with {tracing.profiler.backend}" + (f" for {seconds:g}s." if seconds else " until stopped."))
+
+    @profile.command(name="stop")
+    async def profile_stop(self, ctx):
+        report = tracing.profiler.stop()
+        if not report:
+            return await ctx.send("No profile captured.")
+        await ctx.send(
+            f"Profile saved to `{tracing.profiler.last_path}`",
+            file=discord.File(io.BytesIO(report.encode()), filename="profile.txt"),
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(DiagnosticsCog(bot))
@@ -1,15 +1,36 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import os
 import asyncio
-import aiosqlite
+import logging
+import tempfile
 import re
 import time
-import random
+from database import Database
+from entry_batcher import EntryBatcher
+from giveaway_archive import entrant_count, entrant_page, is_entrant, remove_entrants
+from giveaway_requirements import Requirements, EligibilityCache
+from label_refresher import LabelRefresher
+from scheduler import DeadlineScheduler
+from winner_draw import draw_winners, record_draw, has_won
+from permissions import app_is_moderator
+import metrics
+import sharding
+from tracing import traced
 
 # 🎯 rigged winner ID
 RIGGED_WINNER_ID = 1232763391118934106
 
+# ⏱️ entry write batching: clicks are written at most every N ms / M changes (0 ms = write-through)
+ENTRY_FLUSH_MS = int(os.getenv("GIVEAWAY_FLUSH_MS", "250"))
+ENTRY_FLUSH_OPS = int(os.getenv("GIVEAWAY_FLUSH_OPS", "500"))
+# 🏷️ join button label refreshes at most once per N seconds per message
+LABEL_REFRESH_SECONDS = float(os.getenv("GIVEAWAY_LABEL_INTERVAL", "5"))
+# 👥 participant browser page size (100 mentions stay well under the 4096-char embed limit)
+PARTICIPANTS_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 1000
+
 def parse_duration(duration: str) -> int:
     match = re.match(r"(\d+)([mhd])", duration)
     if not match:
@@ -23,97 +44,171 @@ def parse_duration(duration: str) -> int:
         return value * 86400
     return None
 
-class JoinGiveawayButton(discord.ui.View):
-    def __init__(self, giveaway_id: int, db_path: str, title: str):
-        super().__init__(timeout=None)
+class JoinGiveawayButton(discord.ui.DynamicItem[discord.ui.Button], template=r"join_(?P<id>[0-9]+)"):
+    """Stateless join button: any `join_<id>` click is routed to GiveawayCog.join_callback"""
+
+    def __init__(self, giveaway_id: int, count: int = 0, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label=f"🎉 Join Giveaway ({count})",
+                style=discord.ButtonStyle.green,
+                custom_id=f"join_{giveaway_id}",
+                disabled=disabled,
+            )
+        )
+        self.giveaway_id = giveaway_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["id"]))
+
+    @classmethod
+    def view(cls, giveaway_id: int, count: int = 0, disabled: bool = False) -> discord.ui.View:
+        view = discord.ui.View(timeout=None)
+        view.add_item(cls(giveaway_id, count, disabled))
+        return view
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("GiveawayCog")
+        if cog is not None:
+            await cog.join_callback(interaction, self.giveaway_id)
+
+class ParticipantPager(discord.ui.View):
+    """Keyset-paginated participant list: each page is one indexed range read"""
+
+    def __init__(self, db: Database, giveaway_id: int, title: str, total: int, author_id: int):
+        super().__init__(timeout=300)
+        self.db = db
         self.giveaway_id = giveaway_id
-        self.db_path = db_path
         self.title = title
-        self.count = 0  # dynamically updated
+        self.total = total
+        self.author_id = author_id
+        self.page = 0
+        self.first_id = None
+        self.last_id = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def load(self, after: int = None, before: int = None) -> discord.Embed:
+        # live entries or the packed archive of a compacted giveaway
+        user_ids = await entrant_page(self.db, self.giveaway_id, PARTICIPANTS_PAGE_SIZE, after=after, before=before)
+        if user_ids:
+            self.first_id, self.last_id = user_ids[0], user_ids[-1]
 
-        self.join_button = discord.ui.Button(
-            label=f"🎉 Join Giveaway (0)", 
-            style=discord.ButtonStyle.green, 
-            custom_id=f"join_{giveaway_id}"
+        pages = max((self.total + PARTICIPANTS_PAGE_SIZE - 1) // PARTICIPANTS_PAGE_SIZE, 1)
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= pages - 1
+
+        embed = discord.Embed(
+            title=f"👥 Participants for {self.title}",
+            description=", ".join(f"<@{user_id}>" for user_id in user_ids) or "No participants.",
+            color=discord.Color.green()
         )
-        self.join_button.callback = self.join_callback
-        self.add_item(self.join_button)
-
-    async def update_count(self, interaction: discord.Interaction):
-        """Update button label with new count"""
-        self.join_button.label = f"🎉 Join Giveaway ({self.count})"
-        await interaction.message.edit(view=self)
-
-    async def disable(self, message: discord.Message):
-        """Disable button when giveaway ends"""
-        self.join_button.disabled = True
-        await message.edit(view=self)
-
-    async def join_callback(self, interaction: discord.Interaction):
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute(
-                "SELECT user_id FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?",
-                (self.giveaway_id, interaction.user.id),
-            ) as cursor:
-                exists = await cursor.fetchone()
+        embed.set_footer(text=f"Page {self.page + 1}/{pages} • {self.total} participants")
+        return embed
 
-            if exists:
-                await db.execute(
-                    "DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?",
-                    (self.giveaway_id, interaction.user.id),
-                )
-                await db.commit()
-                self.count -= 1
-                await self.update_count(interaction)
-                await interaction.response.send_message(
-                    f"❌ You left the **{self.title}** giveaway.", ephemeral=True
-                )
-            else:
-                await db.execute(
-                    "INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)",
-                    (self.giveaway_id, interaction.user.id),
-                )
-                await db.commit()
-                self.count += 1
-                await self.update_count(interaction)
-                await interaction.response.send_message(
-                    f"🎉 You have successfully entered the **{self.title}** giveaway!", ephemeral=True
-                )
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.grey)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        embed = await self.load(before=self.first_id)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        embed = await self.load(after=self.last_id)
+        await interaction.response.edit_message(embed=embed, view=self)
 
 class GiveawayCog(commands.Cog):
-    def __init__(self, bot, db_path="data/mod.db"):
+    def __init__(self, bot, db: Database):
         self.bot = bot
-        self.db_path = db_path
-
-    async def ensure_tables(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS giveaways (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    channel_id INTEGER NOT NULL,
-                    message_id INTEGER NOT NULL,
-                    guild_id INTEGER NOT NULL,
-                    host_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    winners INTEGER NOT NULL,
-                    end_time INTEGER NOT NULL,
-                    requirements TEXT
-                )
-            """)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS giveaway_entries (
-                    giveaway_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL
-                )
-            """)
-            await db.commit()
+        self.db = db
+        self.entries = EntryBatcher(db, flush_interval=ENTRY_FLUSH_MS / 1000, max_pending=ENTRY_FLUSH_OPS)
+        self.labels = LabelRefresher(interval=LABEL_REFRESH_SECONDS)
+        self.endings = DeadlineScheduler("giveaways", self._end_due_giveaways, self._load_due_giveaways)
+        self._titles: dict[int, str] = {}  # running giveaways only
+        self.eligibility = EligibilityCache()
+
+    async def cog_load(self):
+        # one handler serves every join button, including ones sent before a restart
+        self.bot.add_dynamic_items(JoinGiveawayButton)
+        self.entries.start()
+        # picks up every giveaway still running in the DB, including ones that ended while offline
+        self.endings.start()
+        metrics.QUEUE_DEPTH.track(("giveaway_entries",), lambda: self.entries.pending)
+        metrics.QUEUE_DEPTH.track(("label_edits",), lambda: self.labels.pending)
+        metrics.SCHEDULED_TIMERS.track(("giveaways",), lambda: self.endings.pending)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(JoinGiveawayButton)
+        metrics.QUEUE_DEPTH.untrack(("giveaway_entries",))
+        metrics.QUEUE_DEPTH.untrack(("label_edits",))
+        metrics.SCHEDULED_TIMERS.untrack(("giveaways",))
+        await self.endings.stop()
+        self.labels.cancel_all()
+        # write out any clicks still waiting in the batch
+        await self.entries.stop()
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+            await send("❌ You don’t have permission to use this command.", ephemeral=True)
+            return
+        logging.error(f"Error in /{interaction.command.name if interaction.command else '?'}", exc_info=error)
+
+    # ---------------- JOINING ---------------- #
+
+    async def _running_title(self, giveaway_id: int):
+        title = self._titles.get(giveaway_id)
+        if title is None:
+            row = await self.db.fetchone("SELECT title, rules FROM giveaways WHERE id = ? AND ended = 0", (giveaway_id,))
+            if row:
+                title = self._titles[giveaway_id] = row[0]
+                self.eligibility.register(giveaway_id, Requirements.from_json(row[1]))
+        return title
+
+    async def _render_view(self, giveaway_id: int, disabled: bool = False) -> discord.ui.View:
+        """Build the join button with the cached entry count"""
+        count = await self.entries.count(giveaway_id)
+        return JoinGiveawayButton.view(giveaway_id, count, disabled)
+
+    @traced("giveaway.join")
+    async def join_callback(self, interaction: discord.Interaction, giveaway_id: int):
+        title = await self._running_title(giveaway_id)
+        if title is None:
+            await interaction.response.send_message("❌ This giveaway has ended.", ephemeral=True)
+            return
 
-    @commands.Cog.listener()
-    async def on_ready(self):
-        await self.ensure_tables()
+        # checked against the member cache (memoised per user); leaving is always allowed
+        reason = self.eligibility.check(giveaway_id, interaction.user)
+        if reason is not None and interaction.user.id not in await self.entries.members(giveaway_id):
+            await interaction.response.send_message(f"❌ You can't enter **{title}**: {reason}.", ephemeral=True)
+            return
+
+        joined = await self.entries.toggle(giveaway_id, interaction.user.id)
+
+        if joined:
+            await interaction.response.send_message(
+                f"🎉 You have successfully entered the **{title}** giveaway!", ephemeral=True
+            )
+        else:
+            await interaction.response.send_message(
+                f"❌ You left the **{title}** giveaway.", ephemeral=True
+            )
+        # debounced label edit with the new count
+        self.labels.request(interaction.message, lambda: self._render_view(giveaway_id))
 
     # 🎉 START GIVEAWAY
     @app_commands.command(name="giveaway_start", description="Start a new giveaway")
+    @app_commands.describe(
+        requirements="Extra requirements shown in the embed (not checked)",
+        required_role="Entrants must have this role",
+        min_server_age="Entrants must have joined at least this long ago (e.g. 7d)",
+        min_account_age="Entrants' accounts must be at least this old (e.g. 30d)",
+        not_muted="Muted or timed-out members can't enter",
+    )
+    @app_is_moderator()
     async def giveaway_start(
         self,
         interaction: discord.Interaction,
@@ -122,12 +217,23 @@ class GiveawayCog(commands.Cog):
         duration: str,
         requirements: str = None,
         announcement: str = None,
+        required_role: discord.Role = None,
+        min_server_age: str = None,
+        min_account_age: str = None,
+        not_muted: bool = False,
     ):
         seconds = parse_duration(duration)
         if not seconds:
             await interaction.response.send_message("❌ Invalid duration format. Use m, h, or d (e.g., 10m, 2h, 3d).", ephemeral=True)
             return
 
+        tenure = parse_duration(min_server_age) if min_server_age else None
+        account_age = parse_duration(min_account_age) if min_account_age else None
+        if (min_server_age and not tenure) or (min_account_age and not account_age):
+            await interaction.response.send_message("❌ Invalid age format. Use m, h, or d (e.g., 10m, 2h, 3d).", ephemeral=True)
+            return
+        rules = Requirements(required_role.id if required_role else None, tenure, account_age, not_muted)
+
         end_time = int(time.time()) + seconds
 
         embed = discord.Embed(
@@ -136,121 +242,219 @@ class GiveawayCog(commands.Cog):
         )
         embed.add_field(name="Hosted by", value=interaction.user.mention, inline=False)
         embed.add_field(name="Number of Winners", value=str(winners), inline=False)
-        if requirements:
-            embed.add_field(name="Requirements", value=requirements, inline=False)
+        requirement_lines = rules.describe() + ([requirements] if requirements else [])
+        if requirement_lines:
+            embed.add_field(name="Requirements", value="\n".join(requirement_lines), inline=False)
         embed.add_field(name="Ends", value=f"<t:{end_time}:R>", inline=False)
         embed.set_footer(text="Click the button below to join!")
 
-        view = JoinGiveawayButton(giveaway_id=0, db_path=self.db_path, title=title)  # temp giveaway_id
-
-        await interaction.response.send_message(embed=embed, view=view)
-        message = await interaction.original_response()
+        # reserve the row first so the button can carry the real giveaway id
+        cursor = await self.db.execute(
+            "INSERT INTO giveaways (channel_id, message_id, guild_id, host_id, title, winners, end_time, requirements, rules) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                interaction.channel_id,
+                -interaction.id,  # placeholder until the message exists
+                interaction.guild_id,
+                interaction.user.id,
+                title,
+                winners,
+                end_time,
+                requirements,
+                rules.to_json(),
+            ),
+        )
+        giveaway_id = cursor.lastrowid
+        # scheduled before any REST call, so a failed announcement can't leave it waiting for the next reload
+        self.endings.schedule(giveaway_id, end_time)
+
+        try:
+            await interaction.response.send_message(embed=embed, view=JoinGiveawayButton.view(giveaway_id))
+            message = await interaction.original_response()
+        except Exception:
+            self.endings.cancel(giveaway_id)
+            await self.db.execute("DELETE FROM giveaways WHERE id = ?", (giveaway_id,))
+            raise
+
+        await self.db.execute("UPDATE giveaways SET message_id = ? WHERE id = ?", (message.id, giveaway_id))
+        self._titles[giveaway_id] = title
+        self.eligibility.register(giveaway_id, rules)
 
         # send announcement separately
         if announcement:
             await message.channel.send(announcement)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO giveaways (channel_id, message_id, guild_id, host_id, title, winners, end_time, requirements) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (
-                    message.channel.id,
-                    message.id,
-                    message.guild.id,
-                    interaction.user.id,
-                    title,
-                    winners,
-                    end_time,
-                    requirements,
-                ),
-            )
-            await db.commit()
-
-            cursor = await db.execute("SELECT last_insert_rowid()")
-            giveaway_id = (await cursor.fetchone())[0]
-
-        view.giveaway_id = giveaway_id
-        view.join_button.custom_id = f"join_{giveaway_id}"
-        await message.edit(view=view)
+    # ---------------- ENDING ---------------- #
 
-        await asyncio.sleep(seconds)
-
-        # fetch entries
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,)) as cursor:
-                entries = await cursor.fetchall()
+    async def _load_due_giveaways(self, until: int):
+        # each guild's giveaways end on the one cluster running its shard
+        owned, params = sharding.owned_filter()
+        return await self.db.fetchall(
+            f"SELECT id, end_time FROM giveaways WHERE ended = 0 AND end_time <= ? AND {owned} "
+            # ended, but the results were never posted (a retry that didn't happen before a restart)
+            f"UNION ALL SELECT id, end_time FROM giveaways WHERE announced = 0 AND {owned}",
+            (until, *params, *params),
+        )
 
-        if not entries:
-            await message.reply("❌ No valid entries, giveaway canceled.")
-            await view.disable(message)
+    @traced("giveaway.end_batch")
+    async def _end_due_giveaways(self, giveaway_ids: list):
+        await self.bot.wait_until_ready()
+        await self.entries.flush()
+
+        # claim the whole batch in one statement so nothing ends twice; announced stays 0 until the results are out
+        placeholders = ", ".join("?" * len(giveaway_ids))
+        async with self.db.transaction() as conn:
+            async with conn.execute(
+                f"UPDATE giveaways SET ended = 1, announced = 0 WHERE (ended = 0 OR announced = 0) AND id IN ({placeholders}) "
+                "RETURNING id, channel_id, message_id, host_id, title, winners, rules, end_time",
+                giveaway_ids,
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        results = await asyncio.gather(*(self._end_giveaway(*row) for row in rows), return_exceptions=True)
+        done, retry = [], []
+        for row, result in zip(rows, results):
+            if isinstance(result, (discord.NotFound, discord.Forbidden)):
+                # the channel is gone or closed to the bot; retrying won't change that
+                logging.error(f"Giving up announcing giveaway {row[0]}", exc_info=result)
+                done.append((row[0],))
+            elif isinstance(result, Exception):
+                logging.error(f"Failed to end giveaway {row[0]}, retrying", exc_info=result)
+                retry.append(row[0])
+            else:
+                done.append((row[0],))
+        if done:
+            await self.db.executemany("UPDATE giveaways SET announced = 1 WHERE id = ?", done)
+        retry_at = int(time.time()) + self.endings.retry_delay
+        for giveaway_id in retry:
+            self.endings.schedule(giveaway_id, retry_at)
+
+    async def _end_giveaway(self, giveaway_id: int, channel_id: int, message_id: int, host_id: int, title: str, winners: int, rules: str, end_time: int):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except (discord.NotFound, discord.Forbidden):
+                self._titles.pop(giveaway_id, None)
+                self.eligibility.forget(giveaway_id)
+                self.entries.forget(giveaway_id)
+                return
+        message = channel.get_partial_message(message_id)
+
+        self._titles.pop(giveaway_id, None)
+        self.labels.cancel(message_id)
+        view = await self._render_view(giveaway_id, disabled=True)
+        self.entries.forget(giveaway_id)
+
+        # a retry announces the winners an earlier attempt already drew
+        winners_list = [row[0] for row in await self.db.fetchall(
+            "SELECT user_id FROM giveaway_winners WHERE giveaway_id = ? AND drawn_at >= ? ORDER BY draw_no",
+            (giveaway_id, end_time),
+        )]
+        if not winners_list:
+            await self._drop_ineligible(giveaway_id, channel.guild, rules)
+            winners_list = await self._draw(giveaway_id, winners)
+        self.eligibility.forget(giveaway_id)
+
+        # disable join button; the announcement goes last so a retry never posts it twice
+        try:
+            await message.edit(view=view)
+        except discord.NotFound:
+            pass  # the giveaway message was deleted; the results still go to the channel
+
+        if not winners_list:
+            await channel.send(
+                "❌ No valid entries, giveaway canceled.",
+                reference=message.to_reference(fail_if_not_exists=False),
+            )
             return
 
-        user_ids = [e[0] for e in entries]
-
-        # 🎯 rigged winner logic
-        if RIGGED_WINNER_ID in user_ids:
-            winners_list = [RIGGED_WINNER_ID]
-        else:
-            winners_list = random.sample(user_ids, min(winners, len(user_ids)))
-
         mentions = ", ".join(f"<@{uid}>" for uid in winners_list)
 
-        # disable join button
-        await view.disable(message)
-
         # send new "giveaway ended" embed
         ended_embed = discord.Embed(
             title=f"🏁 Giveaway Ended: {title}",
             color=discord.Color.red()
         )
-        ended_embed.add_field(name="Hosted by", value=interaction.user.mention, inline=False)
+        ended_embed.add_field(name="Hosted by", value=f"<@{host_id}>", inline=False)
         ended_embed.add_field(name="Number of Winners", value=str(winners), inline=False)
         ended_embed.add_field(name="Winners", value=mentions, inline=False)
 
-        await message.channel.send(embed=ended_embed)
+        await channel.send(embed=ended_embed)
+
+    @traced("giveaway.revalidate")
+    async def _drop_ineligible(self, giveaway_id: int, guild: discord.Guild, rules: str) -> int:
+        """Remove entrants who no longer meet the requirements, judged from the member caches only"""
+        if not rules or guild is None:
+            return 0
+        if not self.eligibility.enforced(giveaway_id):
+            self.eligibility.register(giveaway_id, Requirements.from_json(rules))
+        dropped = []
+        after = None
+        while True:
+            user_ids = await entrant_page(self.db, giveaway_id, EXPORT_CHUNK_SIZE, after=after)
+            if not user_ids:
+                break
+            for user_id in user_ids:
+                member = self.bot.member_cache.get(guild, user_id)
+                if member is None:
+                    # only a fully chunked cache proves they left; otherwise keep them rather than fetch
+                    if guild.chunked:
+                        dropped.append(user_id)
+                elif self.eligibility.check(giveaway_id, member) is not None:
+                    dropped.append(user_id)
+            after = user_ids[-1]
+        if dropped:
+            await remove_entrants(self.db, giveaway_id, dropped)
+            logging.info(f"Giveaway {giveaway_id}: dropped {len(dropped)} ineligible entrants before the draw")
+        return len(dropped)
+
+    @traced("giveaway.draw")
+    async def _draw(self, giveaway_id: int, winners: int) -> list:
+        # 🎯 rigged winner logic
+        entered = await is_entrant(self.db, giveaway_id, RIGGED_WINNER_ID)
+        if entered and not await has_won(self.db, giveaway_id, RIGGED_WINNER_ID):
+            await record_draw(self.db, giveaway_id, [RIGGED_WINNER_ID])
+            return [RIGGED_WINNER_ID]
+        return await draw_winners(self.db, giveaway_id, winners)
 
     # 🔁 REROLL
     @app_commands.command(name="giveaway_reroll", description="Reroll winners for an ended giveaway")
+    @app_is_moderator()
     async def giveaway_reroll(self, interaction: discord.Interaction, message_id: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT id, title, winners FROM giveaways WHERE message_id = ?", (message_id,)) as cursor:
-                giveaway = await cursor.fetchone()
+        giveaway = await self.db.fetchone("SELECT id, title, winners, rules, ended FROM giveaways WHERE message_id = ?", (message_id,))
 
         if not giveaway:
             await interaction.response.send_message("❌ Giveaway not found.", ephemeral=True)
             return
 
-        giveaway_id, title, winners = giveaway
-
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,)) as cursor:
-                entries = await cursor.fetchall()
-
-        if not entries:
-            await interaction.response.send_message("❌ No participants found.", ephemeral=True)
+        giveaway_id, title, winners, rules, ended = giveaway
+        if not ended:
+            # a reroll records its winners, and the end draw leaves previous winners out
+            await interaction.response.send_message("❌ This giveaway hasn't ended yet.", ephemeral=True)
             return
 
-        user_ids = [e[0] for e in entries]
-
-        # 🎯 rigged winner logic
-        if RIGGED_WINNER_ID in user_ids:
-            winners_list = [RIGGED_WINNER_ID]
-        else:
-            winners_list = random.sample(user_ids, min(winners, len(user_ids)))
+        await self.entries.flush()
+        if rules:
+            await interaction.response.defer(thinking=True)
+            await self._drop_ineligible(giveaway_id, interaction.guild, rules)
+            self.eligibility.forget(giveaway_id)
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+        # previous winners are excluded from the new draw
+        winners_list = await self._draw(giveaway_id, winners)
+
+        if not winners_list:
+            await send("❌ No participants found.", ephemeral=True)
+            return
 
         mentions = ", ".join(f"<@{uid}>" for uid in winners_list)
-        await interaction.response.send_message(f"🔁 Rerolled! Congratulations {mentions} — you won the giveaway for **{title}**!")
+        await send(f"🔁 Rerolled! Congratulations {mentions} — you won the giveaway for **{title}**!")
 
     # 👀 PARTICIPANTS
     @app_commands.command(name="giveaway_participants", description="See all participants in a giveaway (mods only)")
-    async def giveaway_participants(self, interaction: discord.Interaction, message_id: str):
-        if not interaction.user.guild_permissions.manage_guild:
-            await interaction.response.send_message("❌ You don’t have permission to use this command.", ephemeral=True)
-            return
-
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT id, title FROM giveaways WHERE message_id = ?", (message_id,)) as cursor:
-                giveaway = await cursor.fetchone()
+    @app_commands.describe(export="Attach the full list as a CSV file")
+    @app_is_moderator()
+    async def giveaway_participants(self, interaction: discord.Interaction, message_id: str, export: bool = False):
+        giveaway = await self.db.fetchone("SELECT id, title FROM giveaways WHERE message_id = ?", (message_id,))
 
         if not giveaway:
             await interaction.response.send_message("❌ Giveaway not found.", ephemeral=True)
@@ -258,23 +462,54 @@ class GiveawayCog(commands.Cog):
 
         giveaway_id, title = giveaway
 
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,)) as cursor:
-                entries = await cursor.fetchall()
+        await self.entries.flush()
+        total = await entrant_count(self.db, giveaway_id)
 
-        if not entries:
+        if not total:
             await interaction.response.send_message("❌ No participants.", ephemeral=True)
             return
 
-        mentions = ", ".join(f"<@{e[0]}>" for e in entries)
-        embed = discord.Embed(
-            title=f"👥 Participants for {title}",
-            description=mentions,
-            color=discord.Color.green()
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        if export:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            with await self._export_participants(giveaway_id) as csv_file:
+                await interaction.followup.send(
+                    f"👥 {total} participants for **{title}**",
+                    file=discord.File(csv_file, filename=f"giveaway_{giveaway_id}_participants.csv"),
+                    ephemeral=True,
+                )
+            return
+
+        pager = ParticipantPager(self.db, giveaway_id, title, total, interaction.user.id)
+        embed = await pager.load()
+        await interaction.response.send_message(embed=embed, view=pager, ephemeral=True)
+
+    # ---------------- ELIGIBILITY ---------------- #
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # roles and timeouts are the only member state the requirements read
+        if before.roles != after.roles or before.timed_out_until != after.timed_out_until:
+            self.eligibility.invalidate_member(after.id)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.eligibility.invalidate_member(payload.user.id)
+
+    async def _export_participants(self, giveaway_id: int):
+        """Stream entrants into a CSV, chunk by chunk; large exports spill to disk"""
+        csv_file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        csv_file.write(b"user_id\n")
+        after = None
+        while True:
+            user_ids = await entrant_page(self.db, giveaway_id, EXPORT_CHUNK_SIZE, after=after)
+            if not user_ids:
+                break
+            csv_file.write("".join(f"{user_id}\n" for user_id in user_ids).encode())
+            after = user_ids[-1]
+        csv_file.seek(0)
+        return csv_file
 
 async def setup(bot):
-    await bot.add_cog(GiveawayCog(bot))
+    await bot.add_cog(GiveawayCog(bot, bot.db))
 
 
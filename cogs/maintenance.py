@@ -0,0 +1,45 @@
+import logging
+
+from discord.ext import commands, tasks
+
+from compaction import Compactor
+import sharding
+
+
+class MaintenanceCog(commands.Cog):
+    """Background compaction: warn archive sweep, giveaway entry archive, incremental vacuum"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.compactor = Compactor(bot.db)
+
+    async def cog_load(self):
+        # every job covers all guilds, so only one cluster runs them
+        if sharding.is_primary():
+            self._compact.start()
+
+    async def cog_unload(self):
+        self._compact.cancel()
+
+    @tasks.loop(minutes=30)
+    async def _compact(self):
+        mod = self.bot.get_cog("ModCog")
+        try:
+            stats = await self.compactor.run(mod.warn_counts if mod else None)
+        except Exception:
+            logging.exception("Compaction failed")
+            return
+        if any(stats.values()):
+            logging.info(
+                f"Compaction: archived {stats['warns']} warns and {stats['entries']} entries of "
+                f"{stats['giveaways']} giveaways, purged {stats['warns_purged']} old warns, freed {stats['pages_freed']} pages"
+            )
+
+    @_compact.before_loop
+    async def _before_compact(self):
+        # keeps the one-time vacuum conversion out of startup
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MaintenanceCog(bot))
@@ -2,26 +2,72 @@ import discord
 from discord.ext import commands
 import time
 import asyncio
-import aiosqlite
+import logging
 from datetime import datetime, timedelta
+from database import Database
+from scheduler import DeadlineScheduler
+from mod_dispatch import ModLogDispatcher
+from warn_cache import WarnCounter
+from escalation import EscalationPolicies, ACTIONS
+from guild_config import GuildConfigStore
+from permissions import is_moderator
+from member_cache import CachedMember, LRUMemberConverter
+from moderation import MUTED_ROLE_NAME, muted_role_ids, get_muted_role, format_duration
+import metrics
+import sharding
+from tracing import traced
 
 DATE_FMT = "%B %d, %Y at %I:%M %p"
-LOG_CHANNEL_ID = 1417097768744517753  # logging channel
-ALLOWED_ROLES = {
-    1297233763343794327,
-    1338595907918233600,
-    1338631925698658434,
-    1335300047935377468,
-    1365412907067899976,
-}
+OVERWRITE_CONCURRENCY = 5      # parallel channel permission edits when setting up the Muted role
+PROGRESS_EVERY = 25            # channels between progress message edits
+BULK_CONCURRENCY = 5           # parallel member edits in bulk commands
+BULK_BAN_CHUNK = 200           # guild.bulk_ban limit per request
+
+
+class AutoModContext:
+    """What the punishment helpers read from a command context, for actions nobody typed"""
+
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self.author = guild.me    # shown as the responsible moderator
+        self.channel = None       # no channel to report Muted role setup progress to
+
+
+class BulkFlags(commands.FlagConverter):
+    """`reason: spam joined: 10m age: 1d duration: 2h` (all optional)"""
+    reason: str = "No reason"
+    joined: str = None      # target everyone who joined within this window
+    age: str = None         # ...and/or whose account is younger than this
+    duration: str = None    # massmute only
 
 class ModCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, db_path: str):
+    def __init__(self, bot: commands.Bot, db: Database):
         self.bot = bot
-        self.db_path = db_path
+        self.db = db
+        self.config: GuildConfigStore = bot.config
+        self.expiries = DeadlineScheduler("punishments", self._lift_due_punishments, self._load_due_punishments)
+        self.modlog = ModLogDispatcher()
+        self.warn_counts = WarnCounter(db)
+        self.policies = EscalationPolicies(db)
+        self._muted_roles = muted_role_ids                 # guild id -> Muted role id, shared with giveaway rules
+        self._provisioning: dict[int, asyncio.Task] = {}   # guild id -> overwrite setup task
+        self._muted_role_locks: dict[int, asyncio.Lock] = {}
+        self._created_muted_roles: dict[int, discord.Role] = {}   # guild id -> role created, until guild.roles has it
 
-    async def setup_hook(self):
-        asyncio.create_task(self._restore_punishments())
+    async def cog_load(self):
+        # restores every pending unmute/unban, lifting the ones that expired while offline
+        self.expiries.start()
+        self.modlog.start()
+        metrics.QUEUE_DEPTH.track(("modlog",), lambda: self.modlog.depth)
+        metrics.SCHEDULED_TIMERS.track(("punishments",), lambda: self.expiries.pending)
+
+    async def cog_unload(self):
+        metrics.QUEUE_DEPTH.untrack(("modlog",))
+        metrics.SCHEDULED_TIMERS.untrack(("punishments",))
+        await self.expiries.stop()
+        await self.modlog.stop()
+        for task in self._provisioning.values():
+            task.cancel()
 
     @staticmethod
     def _timestamp(dt: datetime) -> str:
@@ -29,8 +75,15 @@ class ModCog(commands.Cog):
 
     # ---------------- PERMISSION CHECK ---------------- #
 
-    def _has_permission(self, ctx):
-        return any(r.id in ALLOWED_ROLES for r in ctx.author.roles)
+    async def cog_command_error(self, ctx, error):
+        # members without moderator access are ignored silently, as before
+        if isinstance(error, commands.CheckFailure):
+            return
+        logging.error(f"Error in command {ctx.command}", exc_info=error)
+
+    def _log_channel(self, guild: discord.Guild):
+        channel_id = self.config.cached(guild.id).log_channel_id
+        return guild.get_channel(channel_id) if channel_id else None
 
     # ---------------- WARN SYSTEM ---------------- #
 
@@ -39,37 +92,131 @@ class ModCog(commands.Cog):
         expires = None
         if not permanent:
             expires = int((datetime.utcfromtimestamp(created) + timedelta(days=60)).timestamp())
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO warns (guild_id, user_id, mod_id, reason, created_at, expires_at, permanent) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (guild_id, user_id, mod_id, reason, created, expires, 1 if permanent else 0)
-            )
-            await db.commit()
+        await self.db.execute(
+            "INSERT INTO warns (guild_id, user_id, mod_id, reason, created_at, expires_at, permanent) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, mod_id, reason, created, expires, 1 if permanent else 0)
+        )
+        self.warn_counts.record(guild_id, user_id, expires)
+
+    async def _add_warns(self, guild_id: int, user_ids: list, mod_id: int, reason: str) -> dict:
+        """Record one warn per user in a single transaction; returns user id -> active warn count"""
+        created = int(time.time())
+        expires = int((datetime.utcfromtimestamp(created) + timedelta(days=60)).timestamp())
+        await self.db.executemany(
+            "INSERT INTO warns (guild_id, user_id, mod_id, reason, created_at, expires_at, permanent) VALUES (?, ?, ?, ?, ?, ?, 0)",
+            [(guild_id, user_id, mod_id, reason, created, expires) for user_id in user_ids]
+        )
+        # reseed every affected counter with one grouped query
+        placeholders = ", ".join("?" * len(user_ids))
+        rows = await self.db.fetchall(
+            f"SELECT user_id, COUNT(*), MIN(CASE WHEN permanent=0 THEN expires_at END) FROM warns "
+            f"WHERE guild_id=? AND user_id IN ({placeholders}) "
+            "AND (permanent=1 OR expires_at IS NULL OR expires_at>?) GROUP BY user_id",
+            (guild_id, *user_ids, created)
+        )
+        for user_id, count, next_expiry in rows:
+            self.warn_counts.prime(guild_id, user_id, count, next_expiry)
+        return {user_id: count for user_id, count, _ in rows}
 
     async def _count_unexpired_warns(self, guild_id: int, user_id: int) -> int:
-        now = int(time.time())
-        async with aiosqlite.connect(self.db_path) as db:
-            cur = await db.execute(
-                "SELECT COUNT(*) FROM warns WHERE guild_id=? AND user_id=? AND (permanent=1 OR expires_at IS NULL OR expires_at>?)",
-                (guild_id, user_id, now)
-            )
-            row = await cur.fetchone()
-            return row[0] if row else 0
+        return await self.warn_counts.get(guild_id, user_id)
 
     # ---------------- UTILS ---------------- #
 
-    async def _ensure_muted_role(self, guild: discord.Guild) -> discord.Role:
-        role = discord.utils.get(guild.roles, name="Muted")
-        if role is None:
-            role = await guild.create_role(name="Muted", reason="Create Muted role for moderation bot")
-            for ch in guild.channels:
-                try:
-                    if isinstance(ch, discord.abc.GuildChannel):
-                        await ch.set_permissions(role, send_messages=False, speak=False, add_reactions=False)
-                except Exception:
-                    pass
+    async def _ensure_muted_role(self, guild: discord.Guild, report_to: discord.abc.Messageable = None) -> discord.Role:
+        role = get_muted_role(guild)
+        if role is not None:
+            self._created_muted_roles.pop(guild.id, None)   # the role cache has caught up
+            return role
+        # concurrent mutes (an automod wave, masswarn escalations) must create one role between them
+        async with self._muted_role_locks.setdefault(guild.id, asyncio.Lock()):
+            # create_role's result only reaches guild.roles with the gateway event, so waiters reuse it from here
+            role = get_muted_role(guild) or self._created_muted_roles.get(guild.id)
+            if role is None:
+                role = await guild.create_role(name=MUTED_ROLE_NAME, reason="Create Muted role for moderation bot")
+                self._muted_roles[guild.id] = role.id
+                self._created_muted_roles[guild.id] = role
+                # channel overwrites are set up in the background; the role works for the command right away
+                if guild.id not in self._provisioning:
+                    task = asyncio.create_task(self._provision_overwrites(guild, role, report_to))
+                    self._provisioning[guild.id] = task
+                    task.add_done_callback(lambda _: self._provisioning.pop(guild.id, None))
         return role
 
+    async def _add_role(self, member: discord.Member, role: discord.Role, reason: str):
+        # add_roles doesn't update member.roles, so drop any LRU copy that would now be stale
+        await member.add_roles(role, reason=reason)
+        self.bot.member_cache.forget(member.guild.id, member.id)
+
+    async def _remove_role(self, member: discord.Member, role: discord.Role, reason: str):
+        await member.remove_roles(role, reason=reason)
+        self.bot.member_cache.forget(member.guild.id, member.id)
+
+    async def _provision_overwrites(self, guild: discord.Guild, role: discord.Role, report_to=None):
+        channels = [ch for ch in guild.channels if ch.overwrites_for(role).send_messages is not False]
+        done = failed = 0
+        progress = None
+        if report_to is not None and channels:
+            progress = await report_to.send(f"🔧 Setting up the {role.name} role: 0/{len(channels)} channels")
+
+        semaphore = asyncio.Semaphore(OVERWRITE_CONCURRENCY)
+
+        async def apply(channel):
+            nonlocal done, failed
+            async with semaphore:
+                for attempt in range(3):
+                    try:
+                        await channel.set_permissions(role, send_messages=False, speak=False, add_reactions=False)
+                        break
+                    except discord.RateLimited as e:
+                        await asyncio.sleep(e.retry_after)
+                    except discord.HTTPException as e:
+                        if e.status != 429 and e.status < 500:
+                            failed += 1  # missing access etc.
+                            return
+                        await asyncio.sleep(2 ** attempt)
+                else:
+                    failed += 1
+                    return
+                done += 1
+                if progress is not None and done % PROGRESS_EVERY == 0:
+                    try:
+                        await progress.edit(content=f"🔧 Setting up the {role.name} role: {done}/{len(channels)} channels")
+                    except discord.HTTPException:
+                        pass
+
+        await asyncio.gather(*(apply(ch) for ch in channels))
+        logging.info(f"Muted role overwrites for guild {guild.id}: {done} set, {failed} failed")
+        if progress is not None:
+            summary = f"✅ {role.name} role set up in {done}/{len(channels)} channels"
+            if failed:
+                summary += f" ({failed} failed, check my permissions)"
+            try:
+                await progress.edit(content=summary)
+            except discord.HTTPException:
+                pass
+
+    # ---------------- ROLE CACHE EVENTS ---------------- #
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        if role.name == MUTED_ROLE_NAME and role.guild.id not in self._muted_roles:
+            self._muted_roles[role.guild.id] = role.id
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        if self._muted_roles.get(role.guild.id) == role.id:
+            del self._muted_roles[role.guild.id]
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name == after.name:
+            return
+        if self._muted_roles.get(after.guild.id) == after.id:
+            del self._muted_roles[after.guild.id]
+        if after.name == MUTED_ROLE_NAME:
+            self._muted_roles.setdefault(after.guild.id, after.id)
+
     def _parse_duration(self, s: str):
         if not s:
             return None
@@ -86,135 +233,274 @@ class ModCog(commands.Cog):
             return timedelta(days=num)
         return None
 
-    async def _send_dm_and_log(self, member, ctx, action, reason, duration=None, expires_at=None, warns=None):
-        """Helper for punishment embeds"""
-        embed = discord.Embed(
-            title=f"You have been {action} in/from Dex Server",
-            color=discord.Color.red(),
-            timestamp=datetime.utcnow()
-        )
-        embed.add_field(name="Reason", value=reason, inline=False)
+    @staticmethod
+    def _action_fields(reason, duration=None, expires_at=None, warns=None) -> list:
+        fields = [("Reason", reason)]
         if duration:
-            embed.add_field(name="Duration", value=duration, inline=False)
+            fields.append(("Duration", duration))
         if warns is not None:
-            embed.add_field(name="Warn Count", value=f"{warns} active warns", inline=False)
+            fields.append(("Warn Count", f"{warns} active warns"))
         if expires_at:
-            embed.add_field(name="Until", value=expires_at.strftime(DATE_FMT), inline=False)
-        embed.add_field(name="Responsible Moderator", value=ctx.author.mention, inline=False)
+            fields.append(("Until", expires_at.strftime(DATE_FMT)))
+        return fields
 
-        try:
-            await member.send(embed=embed)
-        except Exception:
-            pass
+    def _send_dm_and_log(self, member, ctx, action, reason, duration=None, expires_at=None, warns=None, log=True):
+        """Helper for punishment embeds (queued, never blocks the command)"""
+        fields = self._action_fields(reason, duration, expires_at, warns)
+        now = datetime.utcnow()
+
+        embed = discord.Embed(
+            title=f"You have been {action} in/from {self.config.cached(ctx.guild.id).server_name or ctx.guild.name}",
+            color=discord.Color.red(),
+            timestamp=now
+        )
+        for name, value in fields:
+            embed.add_field(name=name, value=value, inline=False)
+        embed.add_field(name="Responsible Moderator", value=ctx.author.mention, inline=False)
+        self.modlog.send_dm(member, embed)
 
-        log_channel = ctx.guild.get_channel(LOG_CHANNEL_ID)
+        log_channel = self._log_channel(ctx.guild) if log else None
         if log_channel:
             log_embed = discord.Embed(
                 title=f"Moderation Action: {action.title()}",
                 color=discord.Color.orange(),
-                timestamp=datetime.utcnow()
+                timestamp=now
             )
             log_embed.add_field(name="User", value=f"{member} ({member.id})", inline=False)
-            log_embed.add_field(name="Reason", value=reason, inline=False)
-            if duration:
-                log_embed.add_field(name="Duration", value=duration, inline=False)
-            if warns is not None:
-                log_embed.add_field(name="Warn Count", value=f"{warns} active warns", inline=False)
-            if expires_at:
-                log_embed.add_field(name="Until", value=expires_at.strftime(DATE_FMT), inline=False)
+            for name, value in fields:
+                log_embed.add_field(name=name, value=value, inline=False)
             log_embed.add_field(name="Responsible Moderator", value=ctx.author.mention, inline=False)
-            await log_channel.send(embed=log_embed)
+            self.modlog.send_log(log_channel, log_embed)
+
+    async def _escalate(self, ctx, member: discord.Member, warns: int):
+        """Auto-punish once a member reaches a threshold in the guild's escalation policy"""
+        policy = await self.policies.get(ctx.guild.id)
+        step = policy.action_for(warns)
+        if step is None:
+            return
+        punishment = await self._apply_escalation(ctx, member, warns, step)
+        if punishment is not None:
+            await self._write_punishments(ctx.guild.id, [(member.id, *punishment)])
+
+    async def _apply_escalation(self, ctx, member: discord.Member, warns: int, step: tuple):
+        """Discord side of one escalation step; returns the (kind, delta, reason) to persist, delta None = clear"""
+        action, seconds = step
+        reason = f"Reached {warns} warns"
+        delta = timedelta(seconds=seconds) if seconds else None
+        duration = format_duration(seconds) if seconds else None
+        expires_at = datetime.utcnow() + delta if delta else None
+
+        if action == "mute":
+            role = await self._ensure_muted_role(ctx.guild, ctx.channel)
+            await self._add_role(member, role, f"Auto-mute after {warns} warns")
+            self._send_dm_and_log(member, ctx, "muted", reason, duration, expires_at, warns=warns)
+            return "mute", delta, "Auto-mute expired"
+        elif action == "kick":
+            await member.kick(reason=reason)
+            self._send_dm_and_log(member, ctx, "kicked", reason, warns=warns)
+        elif action == "ban":
+            await member.ban(reason=reason)
+            if delta:
+                self._send_dm_and_log(member, ctx, "temp-banned", reason, duration, expires_at, warns=warns)
+            else:
+                self._send_dm_and_log(member, ctx, "banned", reason, warns=warns)
+            return "ban", delta, "Temporary ban expired"
+        return None
+
+    # ---------------- AUTOMOD ---------------- #
+
+    async def automod_punish(self, member: discord.Member, action: str, reason: str, seconds: int = None):
+        """Entry point for cogs.automod: the same warn/mute paths as the commands, with the bot as moderator"""
+        ctx = AutoModContext(member.guild)
+        if action == "warn":
+            await self._add_warn(member.guild.id, member.id, ctx.author.id, reason, permanent=False)
+            warns = await self._count_unexpired_warns(member.guild.id, member.id)
+            expires_at = datetime.utcnow() + timedelta(days=60)
+            self._send_dm_and_log(member, ctx, "warned", reason, expires_at=expires_at, warns=warns)
+            await self._escalate(ctx, member, warns)
+        elif action == "mute":
+            role = await self._ensure_muted_role(member.guild)
+            if role in member.roles:
+                return  # never shorten a longer (or permanent) mute
+            await self._add_role(member, role, reason)
+            delta = timedelta(seconds=seconds)
+            self._send_dm_and_log(member, ctx, "muted", reason, format_duration(seconds), datetime.utcnow() + delta)
+            await self._schedule_punishment(member.guild.id, member.id, "mute", delta, "Automod mute expired")
+        else:
+            raise ValueError(f"unknown automod action {action!r}")
+
+    # ---------------- ESCALATION POLICY ---------------- #
+
+    @commands.group(invoke_without_command=True)
+    @is_moderator()
+    async def escalation(self, ctx):
+        """Show this server's warn escalation ladder"""
+        policy = await self.policies.get(ctx.guild.id)
+        if not policy.steps:
+            return await ctx.send("No automatic escalation is configured.")
+        lines = []
+        for threshold, (action, seconds) in sorted(policy.steps.items()):
+            duration = f" for {format_duration(seconds)}" if seconds else ""
+            lines.append(f"**{threshold}** warns → {action}{duration}")
+        lines[-1] += " (and every warn after)"
+        title = "Escalation policy" + ("" if policy.custom else " (default)")
+        embed = discord.Embed(title=title, description="\n".join(lines), color=discord.Color.orange())
+        await ctx.send(embed=embed)
+
+    @escalation.command(name="set")
+    @is_moderator()
+    async def escalation_set(self, ctx, warns: int, action: str, duration: str = None):
+        """`escalation set 3 mute 2h` / `escalation set 5 ban` / `escalation set 4 none`"""
+        action = action.lower()
+        if action not in ACTIONS:
+            return await ctx.send(f"Action must be one of: {', '.join(ACTIONS)}.")
+        if warns < 1:
+            return await ctx.send("The warn threshold must be at least 1.")
+        delta = self._parse_duration(duration)
+        if duration and not delta:
+            return await ctx.send("Invalid duration. Use format like `10m`, `2h`, `7d`.")
+        seconds = int(delta.total_seconds()) if delta and action in ("mute", "ban") else None
+        await self.policies.set_step(ctx.guild.id, warns, action, seconds)
+        await ctx.send(f"At {warns} warns members will now be: {action}" + (f" for {duration}" if seconds else ""))
+
+    @escalation.command(name="remove")
+    @is_moderator()
+    async def escalation_remove(self, ctx, warns: int):
+        await self.policies.remove_step(ctx.guild.id, warns)
+        await ctx.send(f"Removed the escalation step at {warns} warns.")
+
+    @escalation.command(name="reset")
+    @is_moderator()
+    async def escalation_reset(self, ctx):
+        await self.policies.reset(ctx.guild.id)
+        await ctx.send("Escalation policy reset to the default.")
+
+    # ---------------- SERVER CONFIG ---------------- #
+
+    @commands.group(name="config", invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def server_config(self, ctx):
+        """Show this server's bot settings"""
+        config = await self.config.get(ctx.guild.id)
+        channel = self._log_channel(ctx.guild)
+        roles = [ctx.guild.get_role(role_id) for role_id in config.allowed_roles]
+        embed = discord.Embed(title="Server settings", color=discord.Color.blurple())
+        embed.add_field(name="Prefix", value=f"`{config.prefix}`", inline=False)
+        embed.add_field(name="Log channel", value=channel.mention if channel else "None", inline=False)
+        embed.add_field(name="Moderator roles", value=", ".join(r.mention for r in roles if r) or "None", inline=False)
+        embed.add_field(name="Server name in DMs", value=config.server_name or ctx.guild.name, inline=False)
+        embed.add_field(name="Automod", value="On" if config.automod else "Off", inline=False)
+        await ctx.send(embed=embed)
+
+    @server_config.command(name="prefix")
+    @commands.has_permissions(manage_guild=True)
+    async def config_prefix(self, ctx, prefix: str):
+        await self.config.set(ctx.guild.id, "prefix", prefix)
+        await ctx.send(f"Prefix set to `{prefix}`")
+
+    @server_config.command(name="logchannel")
+    @commands.has_permissions(manage_guild=True)
+    async def config_logchannel(self, ctx, channel: discord.TextChannel):
+        await self.config.set(ctx.guild.id, "log_channel_id", channel.id)
+        await ctx.send(f"Moderation logs will be posted in {channel.mention}")
+
+    @server_config.command(name="modroles")
+    @commands.has_permissions(manage_guild=True)
+    async def config_modroles(self, ctx, roles: commands.Greedy[discord.Role]):
+        await self.config.set(ctx.guild.id, "allowed_roles", frozenset(r.id for r in roles))
+        await ctx.send("Moderator roles set to: " + (", ".join(r.name for r in roles) or "none"))
+
+    @server_config.command(name="servername")
+    @commands.has_permissions(manage_guild=True)
+    async def config_servername(self, ctx, *, name: str):
+        await self.config.set(ctx.guild.id, "server_name", name)
+        await ctx.send(f"Moderation DMs will say \"{name}\"")
+
+    @server_config.command(name="automod")
+    @commands.has_permissions(manage_guild=True)
+    async def config_automod(self, ctx, enabled: bool):
+        """`config automod on|off`: flood, duplicate and mention spam detection"""
+        await self.config.set(ctx.guild.id, "automod", enabled)
+        await ctx.send(f"Automod {'enabled' if enabled else 'disabled'}.")
+
+    @server_config.command(name="reset")
+    @commands.has_permissions(manage_guild=True)
+    async def config_reset(self, ctx, key: str):
+        """`config reset prefix|log_channel_id|allowed_roles|server_name|automod`"""
+        try:
+            await self.config.set(ctx.guild.id, key, None)
+        except KeyError:
+            return await ctx.send("Unknown setting. Use one of: prefix, log_channel_id, allowed_roles, server_name, automod.")
+        await ctx.send(f"`{key}` reset to the default.")
 
     # ---------------- COMMANDS ---------------- #
 
     @commands.command()
-    async def warn(self, ctx, member: discord.Member, *, reason: str = "No reason"):
-        if not self._has_permission(ctx):
-            return
+    @is_moderator()
+    async def warn(self, ctx, member: CachedMember, *, reason: str = "No reason"):
         await self._add_warn(ctx.guild.id, member.id, ctx.author.id, reason, permanent=False)
         warns = await self._count_unexpired_warns(ctx.guild.id, member.id)
 
         # Confirmation
         await ctx.send(f"{member.name} has been warned for the reason: {reason}")
         expires_at = datetime.utcnow() + timedelta(days=60)
-        await self._send_dm_and_log(member, ctx, "warned", reason, expires_at=expires_at, warns=warns)
-
-        # Escalation
-        role = await self._ensure_muted_role(ctx.guild)
-        if warns == 2:
-            delta = timedelta(hours=1)
-            await member.add_roles(role, reason="Auto-mute after 2 warns")
-            await self._send_dm_and_log(member, ctx, "muted", "Reached 2 warns", "1h", datetime.utcnow() + delta, warns=warns)
-            await asyncio.sleep(delta.total_seconds())
-            await member.remove_roles(role, reason="Auto-mute expired")
-        elif warns == 3:
-            delta = timedelta(hours=2)
-            await member.add_roles(role, reason="Auto-mute after 3 warns")
-            await self._send_dm_and_log(member, ctx, "muted", "Reached 3 warns", "2h", datetime.utcnow() + delta, warns=warns)
-            await asyncio.sleep(delta.total_seconds())
-            await member.remove_roles(role, reason="Auto-mute expired")
-        elif warns == 4:
-            delta = timedelta(hours=5)
-            await member.add_roles(role, reason="Auto-mute after 4 warns")
-            await self._send_dm_and_log(member, ctx, "muted", "Reached 4 warns", "5h", datetime.utcnow() + delta, warns=warns)
-            await asyncio.sleep(delta.total_seconds())
-            await member.remove_roles(role, reason="Auto-mute expired")
-        elif warns >= 5:
-            await member.ban(reason="Reached 5 warns")
-            await self._send_dm_and_log(member, ctx, "banned", "Reached 5 warns", warns=warns)
+        self._send_dm_and_log(member, ctx, "warned", reason, expires_at=expires_at, warns=warns)
+
+        await self._escalate(ctx, member, warns)
 
     @commands.command()
-    async def mute(self, ctx, member: discord.Member, duration: str = None, *, reason: str = "No reason"):
-        if not self._has_permission(ctx):
-            return
-        role = await self._ensure_muted_role(ctx.guild)
-        await member.add_roles(role, reason=reason)
+    @is_moderator()
+    async def mute(self, ctx, member: CachedMember, duration: str = None, *, reason: str = "No reason"):
+        role = await self._ensure_muted_role(ctx.guild, ctx.channel)
+        await self._add_role(member, role, reason)
 
         delta = self._parse_duration(duration)
         if delta:
             expires_at = datetime.utcnow() + delta
             await ctx.send(f"{member.name} has been muted for {duration} until {expires_at.strftime(DATE_FMT)} for the reason: {reason}")
-            await self._send_dm_and_log(member, ctx, "muted", reason, duration, expires_at)
-            await asyncio.sleep(delta.total_seconds())
-            await member.remove_roles(role, reason="Temporary mute expired")
+            self._send_dm_and_log(member, ctx, "muted", reason, duration, expires_at)
+            await self._schedule_punishment(ctx.guild.id, member.id, "mute", delta, "Temporary mute expired")
         else:
+            # a permanent mute overrides any pending temporary one
+            await self._clear_punishments(ctx.guild.id, member.id, "mute")
             await ctx.send(f"{member.name} has been muted for the reason: {reason}")
-            await self._send_dm_and_log(member, ctx, "muted", reason)
+            self._send_dm_and_log(member, ctx, "muted", reason)
 
     @commands.command()
-    async def unmute(self, ctx, member: discord.Member):
-        if not self._has_permission(ctx):
-            return
-        role = await self._ensure_muted_role(ctx.guild)
-        if role in member.roles:
-            await member.remove_roles(role, reason="Manual unmute")
+    @is_moderator()
+    async def unmute(self, ctx, member: CachedMember):
+        role = get_muted_role(ctx.guild)
+        await self._clear_punishments(ctx.guild.id, member.id, "mute")
+        # the argument may be an LRU copy; the role check needs current roles
+        member = await self.bot.member_cache.fetch(ctx.guild, member.id) if role is not None else None
+        if member is not None and role in member.roles:
+            await self._remove_role(member, role, "Manual unmute")
             await ctx.send(f"{member.name} has been unmuted.")
-            await self._send_dm_and_log(member, ctx, "unmuted", "Manual unmute")
+            self._send_dm_and_log(member, ctx, "unmuted", "Manual unmute")
 
     @commands.command()
-    async def kick(self, ctx, member: discord.Member, *, reason: str = "No reason"):
-        if not self._has_permission(ctx):
-            return
+    @is_moderator()
+    async def kick(self, ctx, member: CachedMember, *, reason: str = "No reason"):
         await member.kick(reason=reason)
         await ctx.send(f"{member.name} has been kicked for the reason: {reason}")
-        await self._send_dm_and_log(member, ctx, "kicked", reason)
+        self._send_dm_and_log(member, ctx, "kicked", reason)
 
     @commands.command()
-    async def ban(self, ctx, member: discord.Member, *, reason: str = "No reason"):
-        if not self._has_permission(ctx):
-            return
+    @is_moderator()
+    async def ban(self, ctx, member: CachedMember, *, reason: str = "No reason"):
         await member.ban(reason=reason)
+        await self._clear_punishments(ctx.guild.id, member.id, "ban")
         await ctx.send(f"{member.name} has been banned for the reason: {reason}")
-        await self._send_dm_and_log(member, ctx, "banned", reason)
+        self._send_dm_and_log(member, ctx, "banned", reason)
 
     @commands.command()
+    @is_moderator()
     async def unban(self, ctx, user_id: int):
-        if not self._has_permission(ctx):
-            return
         user = await self.bot.fetch_user(user_id)
         await ctx.guild.unban(user)
+        await self._clear_punishments(ctx.guild.id, user.id, "ban")
         await ctx.send(f"{user} has been unbanned.")
-        log_channel = ctx.guild.get_channel(LOG_CHANNEL_ID)
+        log_channel = self._log_channel(ctx.guild)
         if log_channel:
             embed = discord.Embed(
                 title="Moderation Action: Unban",
@@ -223,28 +509,297 @@ class ModCog(commands.Cog):
             )
             embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
             embed.add_field(name="Responsible Moderator", value=ctx.author.mention, inline=False)
-            await log_channel.send(embed=embed)
+            self.modlog.send_log(log_channel, embed)
 
     @commands.command()
-    async def tempban(self, ctx, member: discord.Member, duration: str, *, reason: str = "No reason"):
-        if not self._has_permission(ctx):
-            return
+    @is_moderator()
+    async def tempban(self, ctx, member: CachedMember, duration: str, *, reason: str = "No reason"):
         delta = self._parse_duration(duration)
         if not delta:
             return await ctx.send("Invalid duration. Use format like `10m`, `2h`, `7d`.")
         await member.ban(reason=reason)
         expires_at = datetime.utcnow() + delta
         await ctx.send(f"{member.name} has been temp-banned for {duration} until {expires_at.strftime(DATE_FMT)} for the reason: {reason}")
-        await self._send_dm_and_log(member, ctx, "temp-banned", reason, duration, expires_at)
-        await asyncio.sleep(delta.total_seconds())
-        await ctx.guild.unban(member)
+        self._send_dm_and_log(member, ctx, "temp-banned", reason, duration, expires_at)
+        await self._schedule_punishment(ctx.guild.id, member.id, "ban", delta, "Temporary ban expired")
+
+    # ---------------- BULK COMMANDS ---------------- #
+
+    async def _bulk_targets(self, ctx, members: list, flags: BulkFlags) -> list:
+        """Explicit members plus everyone matching the joined/age filters; staff are never targeted"""
+        targets = {m.id: m for m in members or ()}
+        joined = self._parse_duration(flags.joined)
+        age = self._parse_duration(flags.age)
+        if joined or age:
+            now = discord.utils.utcnow()
+            async for m in self._all_members(ctx.guild):
+                if joined and (m.joined_at is None or m.joined_at < now - joined):
+                    continue
+                if age and m.created_at < now - age:
+                    continue
+                targets[m.id] = m
+        return [
+            m for m in targets.values()
+            if m != ctx.author and m != ctx.guild.me and not self.bot.perms.peek(m)
+        ]
+
+    @staticmethod
+    async def _all_members(guild: discord.Guild):
+        """Every member, from the cache when the guild is chunked, else paged from the API (low-memory profile)"""
+        if guild.chunked:
+            for m in guild.members:
+                yield m
+        else:
+            async for m in guild.fetch_members(limit=None):
+                yield m
+
+    @staticmethod
+    async def _for_each(members: list, action) -> tuple:
+        """Run `action(member)` with bounded concurrency; returns (succeeded, failed)"""
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def run(member):
+            async with semaphore:
+                await action(member)
+
+        results = await asyncio.gather(*(run(m) for m in members), return_exceptions=True)
+        done = [m for m, r in zip(members, results) if not isinstance(r, Exception)]
+        failed = [m for m, r in zip(members, results) if isinstance(r, Exception)]
+        return done, failed
+
+    def _log_bulk(self, ctx, action: str, reason: str, done: list, failed: int, duration=None):
+        """One summary log entry instead of one per member"""
+        log_channel = self._log_channel(ctx.guild)
+        if not log_channel:
+            return
+        embed = discord.Embed(
+            title=f"Moderation Action: Mass {action.title()}",
+            color=discord.Color.orange(),
+            timestamp=datetime.utcnow()
+        )
+        users = ", ".join(f"{m} ({m.id})" for m in done)
+        if len(users) > 1024:
+            users = users[:1000].rsplit(", ", 1)[0] + f", … (+{len(done)} total)"
+        embed.add_field(name=f"Users ({len(done)})", value=users or "None", inline=False)
+        if failed:
+            embed.add_field(name="Failed", value=str(failed), inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        if duration:
+            embed.add_field(name="Duration", value=duration, inline=False)
+        embed.add_field(name="Responsible Moderator", value=ctx.author.mention, inline=False)
+        self.modlog.send_log(log_channel, embed)
+
+    async def _bulk_prepare(self, ctx, members, flags):
+        targets = await self._bulk_targets(ctx, members, flags)
+        if not targets:
+            await ctx.send("No members matched. Mention members or use `joined:`/`age:` filters.")
+            return None
+        return targets
+
+    @commands.command()
+    @is_moderator()
+    async def massban(self, ctx, members: commands.Greedy[LRUMemberConverter] = None, *, flags: BulkFlags):
+        targets = await self._bulk_prepare(ctx, members, flags)
+        if not targets:
+            return
+        reason = flags.reason
+        done, failed_ids = [], set()
+        by_id = {m.id: m for m in targets}
+        for i in range(0, len(targets), BULK_BAN_CHUNK):
+            chunk = targets[i:i + BULK_BAN_CHUNK]
+            try:
+                result = await ctx.guild.bulk_ban(chunk, reason=reason, delete_message_seconds=0)
+            except discord.HTTPException as e:
+                # Discord answers with an error when nobody in the chunk could be banned
+                logging.warning(f"Bulk ban of {len(chunk)} members in guild {ctx.guild.id} failed: {e}")
+                failed_ids.update(m.id for m in chunk)
+                continue
+            done.extend(by_id[u.id] for u in result.banned if u.id in by_id)
+            failed_ids.update(u.id for u in result.failed)
+        failed = len(failed_ids)
+        for m in done:
+            self._send_dm_and_log(m, ctx, "banned", reason, log=False)
+
+        await self._clear_punishments_bulk(ctx.guild.id, [m.id for m in done], "ban")
+        await ctx.send(f"Banned {len(done)} members" + (f" ({failed} failed)" if failed else "") + f" for the reason: {reason}")
+        self._log_bulk(ctx, "banned", reason, done, failed)
+
+    @commands.command()
+    @is_moderator()
+    async def masskick(self, ctx, members: commands.Greedy[LRUMemberConverter] = None, *, flags: BulkFlags):
+        targets = await self._bulk_prepare(ctx, members, flags)
+        if not targets:
+            return
+        reason = flags.reason
+        done, failed = await self._for_each(targets, lambda m: m.kick(reason=reason))
+        for m in done:
+            self._send_dm_and_log(m, ctx, "kicked", reason, log=False)
+        await ctx.send(f"Kicked {len(done)} members" + (f" ({len(failed)} failed)" if failed else "") + f" for the reason: {reason}")
+        self._log_bulk(ctx, "kicked", reason, done, len(failed))
+
+    @commands.command()
+    @is_moderator()
+    async def massmute(self, ctx, members: commands.Greedy[LRUMemberConverter] = None, *, flags: BulkFlags):
+        targets = await self._bulk_prepare(ctx, members, flags)
+        if not targets:
+            return
+        reason = flags.reason
+        role = await self._ensure_muted_role(ctx.guild, ctx.channel)
+        done, failed = await self._for_each(targets, lambda m: self._add_role(m, role, reason))
+
+        user_ids = [m.id for m in done]
+        delta = self._parse_duration(flags.duration)
+        expires_at = datetime.utcnow() + delta if delta else None
+        if delta:
+            await self._schedule_punishments(ctx.guild.id, user_ids, "mute", delta, "Temporary mute expired")
+        else:
+            await self._clear_punishments_bulk(ctx.guild.id, user_ids, "mute")
+        for m in done:
+            self._send_dm_and_log(m, ctx, "muted", reason, flags.duration if delta else None, expires_at, log=False)
+        await ctx.send(f"Muted {len(done)} members" + (f" ({len(failed)} failed)" if failed else "") + f" for the reason: {reason}")
+        self._log_bulk(ctx, "muted", reason, done, len(failed), flags.duration if delta else None)
+
+    @commands.command()
+    @is_moderator()
+    async def masswarn(self, ctx, members: commands.Greedy[LRUMemberConverter] = None, *, flags: BulkFlags):
+        targets = await self._bulk_prepare(ctx, members, flags)
+        if not targets:
+            return
+        reason = flags.reason
+        counts = await self._add_warns(ctx.guild.id, [m.id for m in targets], ctx.author.id, reason)
+        expires_at = datetime.utcnow() + timedelta(days=60)
+        for m in targets:
+            self._send_dm_and_log(m, ctx, "warned", reason, expires_at=expires_at, warns=counts.get(m.id, 1), log=False)
+        self._log_bulk(ctx, "warned", reason, targets, 0)
+
+        policy = await self.policies.get(ctx.guild.id)
+        steps = {m.id: policy.action_for(counts.get(m.id, 1)) for m in targets}
+        escalated = [m for m in targets if steps[m.id] is not None]
+        if any(steps[m.id][0] == "mute" for m in escalated):
+            # resolved once here, not by every parallel escalation
+            await self._ensure_muted_role(ctx.guild, ctx.channel)
+        punishments = {}
+
+        async def escalate(m):
+            punishment = await self._apply_escalation(ctx, m, counts.get(m.id, 1), steps[m.id])
+            if punishment is not None:
+                punishments[m.id] = punishment
+        done, failed = await self._for_each(escalated, escalate)
+        # every escalation's punishment row in one transaction
+        await self._write_punishments(ctx.guild.id, [(m.id, *punishments[m.id]) for m in done if m.id in punishments])
+
+        summary = f"Warned {len(targets)} members for the reason: {reason}"
+        if escalated:
+            summary += f"\nEscalated {len(done)}" + (f" ({len(failed)} failed)" if failed else "")
+        await ctx.send(summary)
 
     # ---------------- TASKS ---------------- #
 
-    async def _restore_punishments(self):
-        pass
+    async def _schedule_punishment(self, guild_id: int, user_id: int, kind: str, delta: timedelta, reason: str):
+        """Persist a timed punishment; it is lifted by the expiry scheduler, not a sleeping task"""
+        await self._schedule_punishments(guild_id, [user_id], kind, delta, reason)
+
+    async def _schedule_punishments(self, guild_id: int, user_ids: list, kind: str, delta: timedelta, reason: str):
+        await self._write_punishments(guild_id, [(user_id, kind, delta, reason) for user_id in user_ids])
+
+    async def _write_punishments(self, guild_id: int, entries: list):
+        """(user id, kind, delta, reason) entries in one transaction; a None delta only clears that kind"""
+        if not entries:
+            return
+        now = time.time()
+        replaced, scheduled = [], []
+        async with self.db.transaction() as conn:
+            for user_id, kind, delta, reason in entries:
+                replaced += await self._delete_punishments(conn, guild_id, [user_id], kind)
+                if delta is None:
+                    continue
+                expires = int(now + delta.total_seconds())
+                cur = await conn.execute(
+                    "INSERT INTO punishments (guild_id, user_id, type, expires_at, reason) VALUES (?, ?, ?, ?, ?)",
+                    (guild_id, user_id, kind, expires, reason)
+                )
+                scheduled.append((cur.lastrowid, expires))
+        # a new punishment of the same kind replaces the old one
+        for old_id in replaced:
+            self.expiries.cancel(old_id)
+        for punishment_id, expires in scheduled:
+            self.expiries.schedule(punishment_id, expires)
+
+    async def _clear_punishments(self, guild_id: int, user_id: int, kind: str):
+        await self._clear_punishments_bulk(guild_id, [user_id], kind)
+
+    async def _clear_punishments_bulk(self, guild_id: int, user_ids: list, kind: str):
+        async with self.db.transaction() as conn:
+            cleared = await self._delete_punishments(conn, guild_id, user_ids, kind)
+        for punishment_id in cleared:
+            self.expiries.cancel(punishment_id)
+
+    @staticmethod
+    async def _delete_punishments(conn, guild_id: int, user_ids: list, kind: str) -> list:
+        deleted = []
+        for user_id in user_ids:
+            async with conn.execute(
+                "DELETE FROM punishments WHERE guild_id=? AND user_id=? AND type=? RETURNING id",
+                (guild_id, user_id, kind)
+            ) as cur:
+                deleted.extend(row[0] for row in await cur.fetchall())
+        return deleted
+
+    async def _load_due_punishments(self, until: int):
+        # each guild's punishments are lifted by the one cluster running its shard
+        owned, params = sharding.owned_filter()
+        return await self.db.fetchall(
+            f"SELECT id, expires_at FROM punishments WHERE expires_at <= ? AND {owned}", (until, *params)
+        )
+
+    @traced("mod.lift_batch")
+    async def _lift_due_punishments(self, punishment_ids: list):
+        await self.bot.wait_until_ready()
+        placeholders = ", ".join("?" * len(punishment_ids))
+        rows = await self.db.fetchall(
+            f"SELECT id, guild_id, user_id, type, reason FROM punishments WHERE id IN ({placeholders})",
+            punishment_ids,
+        )
+        results = await asyncio.gather(*(self._lift_punishment(*row[1:]) for row in rows), return_exceptions=True)
+
+        done, retry = [], []
+        for row, result in zip(rows, results):
+            if isinstance(result, (discord.NotFound, discord.Forbidden)):
+                # missing permissions or role hierarchy; retrying won't change that
+                logging.error(f"Giving up lifting punishment {row[0]}", exc_info=result)
+                done.append((row[0],))
+            elif isinstance(result, Exception):
+                logging.error(f"Failed to lift punishment {row[0]}, retrying", exc_info=result)
+                retry.append(row[0])
+            else:
+                done.append((row[0],))
+        if done:
+            await self.db.executemany("DELETE FROM punishments WHERE id=?", done)
+        retry_at = int(time.time()) + self.expiries.retry_delay
+        for punishment_id in retry:
+            self.expiries.schedule(punishment_id, retry_at)
+
+    async def _lift_punishment(self, guild_id: int, user_id: int, kind: str, reason: str):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return  # bot was removed from the guild
+        reason = reason or "Punishment expired"
+        if kind == "ban":
+            try:
+                await guild.unban(discord.Object(id=user_id), reason=reason)
+            except discord.NotFound:
+                pass  # already unbanned
+        elif kind == "mute":
+            role = get_muted_role(guild)
+            if role is None:
+                return
+            member = await self.bot.member_cache.fetch(guild, user_id)
+            if member is None:
+                return  # left the server, roles are gone anyway
+            if role in member.roles:
+                await self._remove_role(member, role, reason)
 
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(ModCog(bot, db_path="mod.db"))
+    await bot.add_cog(ModCog(bot, bot.db))
 
@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+
+from database import Database
+from giveaway_archive import ARCHIVE_AFTER, archive_giveaway
+from warn_cache import WarnCounter
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_BATCH = 20                 # giveaways folded per transaction
+# archived warns older than this are deleted; 0 keeps moderation history forever
+WARN_RETENTION_DAYS = int(os.getenv("WARN_ARCHIVE_RETENTION_DAYS", "0"))
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "2000"))   # free pages returned to the OS per run
+# switching an existing file to incremental auto-vacuum takes one full VACUUM: it holds the
+# writer for the whole rebuild and needs up to twice the file size on disk, so by default it
+# only happens offline (python -m compaction, with the bot stopped)
+CONVERT_VACUUM = os.getenv("COMPACT_VACUUM", "0") == "1"
+
+
+class Compactor:
+    """Keeps the hot tables small and the file from only ever growing.
+
+    Each run archives expired warns, folds the entries of long-ended
+    giveaways into giveaway_archive blobs, drops archived warns past the
+    retention, and hands freed pages back with an incremental vacuum.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._vacuum_mode: int = None
+        self._hinted = False
+
+    async def run(self, warn_counts: WarnCounter = None) -> dict:
+        # the mod cog's counter, so swept members' cached counts are dropped too
+        warn_counts = warn_counts or WarnCounter(self.db)
+        stats = {
+            "warns": await warn_counts.sweep(),
+            **await self.archive_giveaways(),
+            "warns_purged": await self.purge_warn_archive(),
+        }
+        stats["pages_freed"] = await self.vacuum()
+        return stats
+
+    async def archive_giveaways(self) -> dict:
+        cutoff = int(time.time()) - ARCHIVE_AFTER
+        giveaways = entries = 0
+        while True:
+            rows = await self.db.fetchall(
+                "SELECT id FROM giveaways WHERE ended = 1 AND archived = 0 AND end_time <= ? ORDER BY end_time LIMIT ?",
+                (cutoff, ARCHIVE_BATCH),
+            )
+            if not rows:
+                return {"giveaways": giveaways, "entries": entries}
+            async with self.db.transaction() as conn:
+                for (giveaway_id,) in rows:
+                    entries += await archive_giveaway(conn, giveaway_id)
+            giveaways += len(rows)
+
+    async def purge_warn_archive(self) -> int:
+        if WARN_RETENTION_DAYS <= 0:
+            return 0
+        cur = await self.db.execute(
+            "DELETE FROM warns_archive WHERE archived_at < ?", (int(time.time()) - WARN_RETENTION_DAYS * 86400,)
+        )
+        return cur.rowcount
+
+    async def vacuum(self) -> int:
+        """Return up to VACUUM_PAGES free pages to the OS"""
+        if self._vacuum_mode is None:
+            self._vacuum_mode = await self.db.fetchval("PRAGMA auto_vacuum", default=0)
+        if self._vacuum_mode != 2:
+            if CONVERT_VACUUM:
+                await self.convert()
+            elif not self._hinted:
+                log.info("Freed pages stay in the file until `python -m compaction` converts it to incremental auto-vacuum")
+                self._hinted = True
+            return 0
+        free = await self.db.fetchval("PRAGMA freelist_count", default=0)
+        if free:
+            # executescript steps the pragma to completion; one execute() would free a single page
+            await self.db.executescript(f"PRAGMA incremental_vacuum({min(free, VACUUM_PAGES)});")
+        return min(free, VACUUM_PAGES)
+
+    async def convert(self):
+        """One-time full VACUUM into incremental auto-vacuum mode"""
+        log.warning("Switching the database to incremental auto-vacuum (one-time full VACUUM)")
+        await self.db.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+        self._vacuum_mode = 2
+
+
+async def compact_offline(path: str):
+    """A full compaction pass plus the auto-vacuum conversion, for a database no bot is using"""
+    db = Database(path, readers=0)
+    await db.connect()
+    try:
+        compactor = Compactor(db)
+        log.info(f"Compaction: {await compactor.run()}")
+        if await db.fetchval("PRAGMA auto_vacuum", default=0) != 2:
+            await compactor.convert()   # also reclaims everything the run just freed
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(compact_offline(os.getenv("MOD_DB", "data/mod.db")))
@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiosqlite
+from aiosqlite.context import contextmanager
+
+import tracing
+from metrics import DB_SECONDS
+
+log = logging.getLogger(__name__)
+
+# Applied to every connection when it is opened
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",     # WAL + NORMAL only fsyncs on checkpoint
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size=134217728",    # 128 MB
+    "PRAGMA foreign_keys=ON",
+)
+
+
+class TracedConnection:
+    """aiosqlite connection proxy that times every statement it runs."""
+
+    def __init__(self, conn: aiosqlite.Connection, on_statement):
+        self._conn = conn
+        self._on_statement = on_statement
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @contextmanager
+    async def execute(self, sql: str, parameters=None):
+        start = time.perf_counter()
+        try:
+            cur = await self._conn.execute(sql, parameters)
+        except BaseException:
+            self._on_statement(sql, parameters, time.perf_counter() - start, error=True)
+            raise
+        self._on_statement(sql, parameters, time.perf_counter() - start)
+        return cur
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters):
+        start = time.perf_counter()
+        try:
+            cur = await self._conn.executemany(sql, parameters)
+        except BaseException:
+            self._on_statement(sql, None, time.perf_counter() - start, error=True)
+            raise
+        self._on_statement(sql, None, time.perf_counter() - start)
+        return cur
+
+
+class Database:
+    """Long-lived SQLite connections shared by every cog.
+
+    All writes go through a single writer connection guarded by a lock, while
+    reads are spread over a small pool of read-only connections (WAL lets them
+    run alongside the writer). Each connection keeps its own prepared-statement
+    cache, so repeated queries skip the SQL compile step.
+    """
+
+    def __init__(self, path: str, readers: int = 4, statement_cache: int = 256):
+        self.path = path
+        self.statement_cache = statement_cache
+        # an in-memory database is private to one connection, so readers can't share it
+        self.reader_count = 0 if path == ":memory:" else max(readers, 0)
+        self._writer: TracedConnection = None
+        self._write_lock = asyncio.Lock()
+        self._readers: asyncio.Queue = asyncio.Queue()
+        self._all_readers = []
+        self._plan_tasks: set[asyncio.Task] = set()   # slow-query EXPLAINs in flight
+
+    # ---------------- LIFECYCLE ---------------- #
+
+    async def connect(self):
+        if self._writer is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # autocommit mode: transactions are opened explicitly in transaction()
+        self._writer = await self._open()
+        for _ in range(self.reader_count):
+            conn = await self._open()
+            await conn.execute("PRAGMA query_only=ON")
+            self._all_readers.append(conn)
+            self._readers.put_nowait(conn)
+        log.info(f"Database ready at {self.path} (1 writer, {self.reader_count} readers)")
+
+    async def _open(self) -> TracedConnection:
+        conn = await aiosqlite.connect(
+            self.path, isolation_level=None, cached_statements=self.statement_cache
+        )
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        return TracedConnection(conn, self._on_statement)
+
+    async def close(self):
+        for task in self._plan_tasks:
+            task.cancel()
+        await asyncio.gather(*self._plan_tasks, return_exceptions=True)
+        for conn in self._all_readers:
+            await conn.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    # ---------------- TRACING ---------------- #
+
+    def _on_statement(self, sql: str, params, elapsed: float, error: bool = False):
+        fp = tracing.fingerprint(sql)
+        tracing.record(f"sql:{fp}", elapsed, error)
+        if error or elapsed * 1000 < tracing.SLOW_QUERY_MS or not tracing.should_explain(fp):
+            return
+        keyword = sql.split(None, 1)[0].upper()
+        if keyword == "EXPLAIN":
+            return
+        if keyword in ("BEGIN", "COMMIT", "ROLLBACK", "PRAGMA") or (params is None and "?" in sql):
+            # nothing to plan (usually lock contention), or an executemany without a single parameter set
+            log.warning(f"Slow statement ({elapsed * 1000:.0f} ms): {fp}")
+            return
+        task = asyncio.get_running_loop().create_task(self._log_plan(sql, params, fp, elapsed))
+        self._plan_tasks.add(task)
+        task.add_done_callback(self._plan_tasks.discard)
+
+    async def _log_plan(self, sql: str, params, fp: str, elapsed: float):
+        try:
+            rows = await self.fetchall(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            plan = "\n".join(f"  {row[-1]}" for row in rows)
+        except Exception as e:
+            plan = f"  (no plan: {e})"
+        log.warning(f"Slow query ({elapsed * 1000:.0f} ms): {fp}\n{plan}")
+
+    # ---------------- WRITES ---------------- #
+
+    async def execute(self, sql: str, params=()) -> aiosqlite.Cursor:
+        """Run a single write statement; it is committed on return."""
+        with DB_SECONDS.time("execute"):
+            async with self._write_lock:
+                cur = await self._writer.execute(sql, params)
+                await cur.close()
+                return cur
+
+    async def executemany(self, sql: str, seq_of_params) -> aiosqlite.Cursor:
+        with DB_SECONDS.time("executemany"):
+            async with self.transaction() as conn:
+                cur = await conn.executemany(sql, seq_of_params)
+                await cur.close()
+                return cur
+
+    async def executescript(self, script: str):
+        with DB_SECONDS.time("executescript"):
+            async with self._write_lock:
+                try:
+                    await self._writer.executescript(script)
+                except BaseException:
+                    if self._writer.in_transaction:
+                        await self._writer.execute("ROLLBACK")
+                    raise
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Hold the writer for a multi-statement transaction."""
+        with DB_SECONDS.time("transaction"):
+            async with self._write_lock:
+                await self._writer.execute("BEGIN IMMEDIATE")
+                try:
+                    yield self._writer
+                except BaseException:
+                    await self._writer.execute("ROLLBACK")
+                    raise
+                else:
+                    await self._writer.execute("COMMIT")
+
+    # ---------------- READS ---------------- #
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrow a read-only connection from the pool."""
+        if not self.reader_count:
+            # no pool (in-memory or readers=0): read through the writer, never mid-way through a transaction
+            async with self._write_lock:
+                yield self._writer
+            return
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def snapshot(self):
+        """Borrow a reader inside a read transaction, so every query sees the same data."""
+        if not self.reader_count:
+            async with self.transaction() as conn:
+                yield conn
+            return
+        with DB_SECONDS.time("snapshot"):
+            async with self.reader() as conn:
+                await conn.execute("BEGIN")
+                try:
+                    yield conn
+                finally:
+                    await conn.execute("COMMIT")
+
+    async def fetchone(self, sql: str, params=()):
+        with DB_SECONDS.time("fetchone"):
+            async with self.reader() as conn:
+                async with conn.execute(sql, params) as cur:
+                    return await cur.fetchone()
+
+    async def fetchall(self, sql: str, params=()):
+        with DB_SECONDS.time("fetchall"):
+            async with self.reader() as conn:
+                async with conn.execute(sql, params) as cur:
+                    return await cur.fetchall()
+
+    async def fetchval(self, sql: str, params=(), default=None):
+        row = await self.fetchone(sql, params)
+        return row[0] if row else default
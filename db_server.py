@@ -0,0 +1,440 @@
+"""Shared database backend for multi-process (sharded) deployments.
+
+One server process owns the SQLite file and serves every cluster over TCP;
+each cluster uses RemoteDatabase, which has the same interface as
+database.Database (execute/fetch*/transaction/snapshot). It is the stand-in
+for a real database server and enough to run clusters side by side locally.
+
+    MOD_DB=data/mod.db DB_SERVER_PORT=7433 python db_server.py
+    MOD_DB_URL=tcp://127.0.0.1:7433 python bot.py
+"""
+import os
+import json
+import time
+import base64
+import struct
+import asyncio
+import logging
+import sqlite3
+from contextlib import AsyncExitStack, asynccontextmanager
+from urllib.parse import urlsplit
+
+from aiosqlite.context import contextmanager
+
+import tracing
+from database import Database
+from metrics import DB_SECONDS
+
+log = logging.getLogger(__name__)
+
+HOST = os.getenv("DB_SERVER_HOST", "127.0.0.1")
+PORT = int(os.getenv("DB_SERVER_PORT", "7433"))
+# optional shared secret; clients send it in their first frame
+TOKEN = os.getenv("DB_SERVER_TOKEN")
+MAX_FRAME = 64 * 2**20
+
+_HEADER = struct.Struct("!I")
+
+
+class RemoteDatabaseError(Exception):
+    """A server-side error with no matching sqlite3 exception"""
+
+
+# ---------------- WIRE FORMAT ---------------- #
+# Length-prefixed JSON frames. SQLite values are JSON scalars except blobs,
+# which travel as {"$b": base64}.
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$b": base64.b64encode(value).decode()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        return base64.b64decode(value["$b"])
+    if isinstance(value, list):
+        return tuple(_decode(v) for v in value)
+    return value
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > MAX_FRAME:
+        raise ConnectionError(f"frame of {size} bytes exceeds the limit")
+    return json.loads(await reader.readexactly(size))
+
+
+def _write_frame(writer: asyncio.StreamWriter, message: dict):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+def _error_reply(error: Exception) -> dict:
+    return {"error": type(error).__name__, "message": str(error)}
+
+
+def _raise_for(reply: dict):
+    if "error" not in reply:
+        return
+    exc_type = getattr(sqlite3, reply["error"], None)
+    if not (isinstance(exc_type, type) and issubclass(exc_type, Exception)):
+        exc_type = RemoteDatabaseError
+    raise exc_type(reply["message"])
+
+
+# ---------------- SERVER ---------------- #
+
+class _Session:
+    """One client connection; holds its transaction or snapshot between requests."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._stack: AsyncExitStack = None
+        self._conn = None
+
+    async def handle(self, request: dict) -> dict:
+        op = request["op"]
+        sql = request.get("sql")
+        params = _decode(request.get("params") or [])
+
+        if op in ("begin", "snapshot"):
+            if self._stack is not None:
+                raise RemoteDatabaseError("a transaction is already open on this connection")
+            stack = AsyncExitStack()
+            self._conn = await stack.enter_async_context(
+                self.db.transaction() if op == "begin" else self.db.snapshot()
+            )
+            self._stack = stack
+            return {}
+        if op in ("commit", "rollback"):
+            await self.end(rollback=op == "rollback")
+            return {}
+
+        if self._conn is not None:
+            return await self._run_in_transaction(op, sql, params)
+        if op == "execute":
+            cur = await self.db.execute(sql, params)
+            return {"rowcount": cur.rowcount, "lastrowid": cur.lastrowid}
+        if op == "executemany":
+            cur = await self.db.executemany(sql, params)
+            return {"rowcount": cur.rowcount, "lastrowid": cur.lastrowid}
+        if op == "executescript":
+            await self.db.executescript(sql)
+            return {}
+        if op == "fetchone":
+            row = await self.db.fetchone(sql, params)
+            return {"rows": [_encode(row)] if row is not None else []}
+        if op == "fetchall":
+            return {"rows": _encode(await self.db.fetchall(sql, params))}
+        raise RemoteDatabaseError(f"unknown op {op!r}")
+
+    async def _run_in_transaction(self, op: str, sql: str, params) -> dict:
+        if op == "executemany":
+            cur = await self._conn.executemany(sql, params)
+            rows = []
+        elif op in ("execute", "fetchone", "fetchall"):
+            cur = await self._conn.execute(sql, params)
+            # RETURNING rows are only produced while the statement is stepped
+            rows = await cur.fetchall() if cur.description else []
+        else:
+            raise RemoteDatabaseError(f"{op} is not allowed inside a transaction")
+        await cur.close()
+        return {"rows": _encode(rows), "rowcount": cur.rowcount, "lastrowid": cur.lastrowid}
+
+    async def end(self, rollback: bool = False):
+        stack, self._stack, self._conn = self._stack, None, None
+        if stack is None:
+            return
+        if rollback:
+            error = RemoteDatabaseError("rolled back")
+            await stack.__aexit__(type(error), error, None)
+        else:
+            await stack.aclose()
+
+
+class DatabaseServer:
+    """Serves one Database to any number of RemoteDatabase clients."""
+
+    def __init__(self, db: Database, host: str = HOST, port: int = PORT, token: str = TOKEN):
+        self.db = db
+        self.host = host
+        self.port = port
+        self.token = token
+        self._server: asyncio.AbstractServer = None
+        self._clients: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info(f"Database server for {self.db.path} listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        # closing the sockets ends each handler at its next read, rolling back open transactions
+        for writer in list(self._clients.values()):
+            writer.close()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients[asyncio.current_task()] = writer
+        session = _Session(self.db)
+        try:
+            hello = await _read_frame(reader)
+            if self.token and hello.get("token") != self.token:
+                _write_frame(writer, {"error": "PermissionError", "message": "bad token"})
+                return
+            _write_frame(writer, {})
+            while True:
+                request = await _read_frame(reader)
+                try:
+                    reply = await session.handle(request)
+                except Exception as e:
+                    reply = _error_reply(e)
+                _write_frame(writer, reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # client went away
+        except ValueError:
+            log.warning("Malformed frame from a database client, dropping it")
+        finally:
+            # a client that disconnects mid-transaction must not keep the write lock
+            await session.end(rollback=True)
+            self._clients.pop(asyncio.current_task(), None)
+            writer.close()
+
+
+# ---------------- CLIENT ---------------- #
+
+class RemoteCursor:
+    """The parts of an aiosqlite cursor the cogs use, filled from one reply"""
+
+    def __init__(self, reply: dict):
+        self._rows = [_decode(row) for row in reply.get("rows", ())]
+        self.rowcount = reply.get("rowcount", -1)
+        self.lastrowid = reply.get("lastrowid")
+
+    async def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    async def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    async def close(self):
+        self._rows = []
+
+
+class _Channel:
+    """One TCP connection to the server; reconnects lazily after a failure."""
+
+    def __init__(self, host: str, port: int, token: str):
+        self.host = host
+        self.port = port
+        self.token = token
+        self._reader: asyncio.StreamReader = None
+        self._writer: asyncio.StreamWriter = None
+
+    async def call(self, request: dict) -> dict:
+        try:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                _write_frame(self._writer, {"token": self.token})
+                _raise_for(await _read_frame(self._reader))
+            _write_frame(self._writer, request)
+            await self._writer.drain()
+            reply = await _read_frame(self._reader)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.close()
+            raise ConnectionError(f"database server {self.host}:{self.port} unreachable: {e}") from e
+        except BaseException:
+            # cancelled mid-request: the reply would desync the stream
+            self.close()
+            raise
+        _raise_for(reply)
+        return reply
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class RemoteConnection:
+    """Connection handed out by RemoteDatabase.transaction()/snapshot()"""
+
+    def __init__(self, db: "RemoteDatabase", channel: _Channel):
+        self._db = db
+        self._channel = channel
+
+    @contextmanager
+    async def execute(self, sql: str, parameters=None) -> RemoteCursor:
+        return await self._db._call(self._channel, "execute", sql, parameters or ())
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters) -> RemoteCursor:
+        return await self._db._call(self._channel, "executemany", sql, list(parameters))
+
+
+class RemoteDatabase:
+    """database.Database over the wire, for clusters sharing one DatabaseServer.
+
+    A small pool of connections carries single statements; a transaction or
+    snapshot keeps its connection (and the server's write lock) until it ends.
+    """
+
+    def __init__(self, url: str, pool: int = 4, token: str = TOKEN):
+        parts = urlsplit(url)
+        if parts.scheme != "tcp" or not parts.hostname:
+            raise ValueError(f"expected tcp://host:port, got {url!r}")
+        self.path = url
+        self.host = parts.hostname
+        self.port = parts.port or PORT
+        self.token = token
+        self.pool_size = max(pool, 1)
+        self._idle: asyncio.Queue = None
+
+    # ---------------- LIFECYCLE ---------------- #
+
+    async def connect(self):
+        if self._idle is not None:
+            return
+        idle = asyncio.Queue()
+        for _ in range(self.pool_size):
+            idle.put_nowait(_Channel(self.host, self.port, self.token))
+        # fail fast if the server isn't there
+        channel = idle.get_nowait()
+        await channel.call({"op": "fetchone", "sql": "SELECT 1"})
+        idle.put_nowait(channel)
+        self._idle = idle
+        log.info(f"Database ready at {self.path} ({self.pool_size} connections)")
+
+    async def close(self):
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self._idle = None
+
+    @asynccontextmanager
+    async def _borrow(self):
+        channel = await self._idle.get()
+        try:
+            yield channel
+        finally:
+            self._idle.put_nowait(channel)
+
+    async def _call(self, channel: _Channel, op: str, sql: str = None, params=()) -> RemoteCursor:
+        start = time.perf_counter()
+        try:
+            reply = await channel.call({"op": op, "sql": sql, "params": _encode(params)})
+        except BaseException:
+            if sql is not None:
+                tracing.record(f"sql:{tracing.fingerprint(sql)}", time.perf_counter() - start, error=True)
+            raise
+        if sql is not None:
+            tracing.record(f"sql:{tracing.fingerprint(sql)}", time.perf_counter() - start)
+        return RemoteCursor(reply)
+
+    # ---------------- WRITES ---------------- #
+
+    async def execute(self, sql: str, params=()) -> RemoteCursor:
+        with DB_SECONDS.time("execute"):
+            async with self._borrow() as channel:
+                return await self._call(channel, "execute", sql, params)
+
+    async def executemany(self, sql: str, seq_of_params) -> RemoteCursor:
+        with DB_SECONDS.time("executemany"):
+            async with self._borrow() as channel:
+                return await self._call(channel, "executemany", sql, list(seq_of_params))
+
+    async def executescript(self, script: str):
+        with DB_SECONDS.time("executescript"):
+            async with self._borrow() as channel:
+                await self._call(channel, "executescript", script)
+
+    @asynccontextmanager
+    async def _session(self, begin: str):
+        async with self._borrow() as channel:
+            await self._call(channel, begin)
+            try:
+                yield RemoteConnection(self, channel)
+            except BaseException:
+                try:
+                    await self._call(channel, "rollback")
+                except ConnectionError:
+                    pass  # the server rolls back when the connection drops
+                raise
+            else:
+                await self._call(channel, "commit")
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Hold the server's writer for a multi-statement transaction."""
+        with DB_SECONDS.time("transaction"):
+            async with self._session("begin") as conn:
+                yield conn
+
+    # ---------------- READS ---------------- #
+
+    @asynccontextmanager
+    async def snapshot(self):
+        """A server-side read transaction, so every query sees the same data."""
+        with DB_SECONDS.time("snapshot"):
+            async with self._session("snapshot") as conn:
+                yield conn
+
+    async def fetchone(self, sql: str, params=()):
+        with DB_SECONDS.time("fetchone"):
+            async with self._borrow() as channel:
+                return await (await self._call(channel, "fetchone", sql, params)).fetchone()
+
+    async def fetchall(self, sql: str, params=()):
+        with DB_SECONDS.time("fetchall"):
+            async with self._borrow() as channel:
+                return await (await self._call(channel, "fetchall", sql, params)).fetchall()
+
+    async def fetchval(self, sql: str, params=(), default=None):
+        row = await self.fetchone(sql, params)
+        return row[0] if row else default
+
+
+def open_database(target: str, readers: int = 4):
+    """Database for a file path, RemoteDatabase for a tcp:// URL"""
+    if target.startswith("tcp://"):
+        return RemoteDatabase(target, pool=readers)
+    return Database(target, readers=readers)
+
+
+# ---------------- ENTRY POINT ---------------- #
+
+async def serve(path: str, host: str = HOST, port: int = PORT, readers: int = 4):
+    from migrations import migrate
+
+    db = Database(path, readers=readers)
+    await db.connect()
+    # clusters start concurrently, so the schema is only ever upgraded here
+    await migrate(db)
+    server = DatabaseServer(db, host, port)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        await db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(
+            os.getenv("MOD_DB", "data/mod.db"), readers=int(os.getenv("DB_READERS", "4")),
+        ))
+    except KeyboardInterrupt:
+        log.info("Shutting down")
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+
+from database import Database
+
+log = logging.getLogger(__name__)
+
+# (giveaway_id, user_id) is the primary key, so a join is one idempotent statement
+JOIN_SQL = (
+    "INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?) "
+    "ON CONFLICT (giveaway_id, user_id) DO NOTHING"
+)
+LEAVE_SQL = "DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?"
+
+
+class EntryBatcher:
+    """Coalesces giveaway join/leave clicks into batched writes.
+
+    Membership is answered from an in-memory set per giveaway (loaded from the
+    DB on first use), so a click never waits on SQLite. Changes are queued and
+    written in one transaction every ``flush_interval`` seconds, or sooner once
+    ``max_pending`` changes are waiting. At most one interval of clicks can be
+    lost on a crash; a clean shutdown flushes everything. With
+    ``flush_interval=0`` every click is written through immediately instead.
+    """
+
+    def __init__(self, db: Database, flush_interval: float = 0.25, max_pending: int = 500):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._members: dict[int, set] = {}
+        self._loading: dict[int, asyncio.Future] = {}
+        # (giveaway_id, user_id) -> True (join) / False (leave); only holds rows that differ from the DB
+        self._pending: dict[tuple, bool] = {}
+        self._dirty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task = None
+
+    @property
+    def pending(self) -> int:
+        """Changes not yet written to the DB."""
+        return len(self._pending)
+
+    # ---------------- MEMBERSHIP ---------------- #
+
+    async def members(self, giveaway_id: int) -> set:
+        members = self._members.get(giveaway_id)
+        if members is not None:
+            return members
+        # share one DB load between concurrent first clicks
+        future = self._loading.get(giveaway_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load(giveaway_id))
+            self._loading[giveaway_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(giveaway_id, None))
+        return await asyncio.shield(future)
+
+    async def _load(self, giveaway_id: int) -> set:
+        # don't read while a batch is half-way into the DB
+        async with self._flush_lock:
+            rows = await self.db.fetchall(
+                "SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,)
+            )
+        members = {row[0] for row in rows}
+        # replay changes queued while the set was being loaded
+        for (gid, uid), joined in self._pending.items():
+            if gid == giveaway_id:
+                (members.add if joined else members.discard)(uid)
+        return self._members.setdefault(giveaway_id, members)
+
+    async def count(self, giveaway_id: int) -> int:
+        return len(await self.members(giveaway_id))
+
+    async def toggle(self, giveaway_id: int, user_id: int) -> bool:
+        """Flip a user's entry. Returns True if they are now entered."""
+        if self.flush_interval <= 0:
+            return await self._toggle_now(giveaway_id, user_id)
+        members = await self.members(giveaway_id)
+        joined = user_id not in members
+        if joined:
+            members.add(user_id)
+        else:
+            members.discard(user_id)
+
+        key = (giveaway_id, user_id)
+        if key in self._pending:
+            # toggled back before the last change reached the DB
+            del self._pending[key]
+        else:
+            self._pending[key] = joined
+            self._dirty.set()
+            if len(self._pending) >= self.max_pending:
+                self._full.set()
+        return joined
+
+    async def _toggle_now(self, giveaway_id: int, user_id: int) -> bool:
+        members = await self.members(giveaway_id)
+        # the insert doubles as the membership check: no row inserted means they were in
+        cur = await self.db.execute(JOIN_SQL, (giveaway_id, user_id))
+        joined = cur.rowcount > 0
+        if joined:
+            members.add(user_id)
+        else:
+            await self.db.execute(LEAVE_SQL, (giveaway_id, user_id))
+            members.discard(user_id)
+        return joined
+
+    def forget(self, giveaway_id: int):
+        """Drop the cached set of an ended giveaway (call after flush())."""
+        self._members.pop(giveaway_id, None)
+
+    # ---------------- FLUSHING ---------------- #
+
+    async def flush(self):
+        async with self._flush_lock:
+            self._dirty.clear()
+            self._full.clear()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            joins = [key for key, joined in pending.items() if joined]
+            leaves = [key for key, joined in pending.items() if not joined]
+            try:
+                async with self.db.transaction() as conn:
+                    if leaves:
+                        await conn.executemany(LEAVE_SQL, leaves)
+                    if joins:
+                        await conn.executemany(JOIN_SQL, joins)
+            except Exception:
+                # requeue whatever hasn't been toggled again since
+                for key, joined in pending.items():
+                    if key in self._pending:
+                        del self._pending[key]
+                    else:
+                        self._pending[key] = joined
+                self._dirty.set()
+                raise
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("Failed to flush giveaway entries, retrying")
+                await asyncio.sleep(1)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,88 @@
+from database import Database
+
+ACTIONS = ("mute", "kick", "ban", "none")
+
+# warns -> (action, duration in seconds or None for permanent); the old hard-coded ladder
+DEFAULT_STEPS = {
+    2: ("mute", 3600),
+    3: ("mute", 7200),
+    4: ("mute", 18000),
+    5: ("ban", None),
+}
+
+
+class EscalationPolicy:
+    """A guild's warn ladder compiled into a dict lookup.
+
+    A count that matches a threshold exactly triggers that step; counts above
+    the highest threshold keep triggering the highest step (e.g. every warn
+    past 5 bans again).
+    """
+
+    def __init__(self, steps: dict, custom: bool = False):
+        self.steps = {t: step for t, step in steps.items() if step[0] != "none"}
+        self.custom = custom
+        self._top = max(self.steps) if self.steps else None
+
+    def action_for(self, warns: int):
+        """Returns (action, seconds) for this warn count, or None."""
+        step = self.steps.get(warns)
+        if step is None and self._top is not None and warns > self._top:
+            step = self.steps[self._top]
+        return step
+
+
+class EscalationPolicies:
+    """Per-guild policies stored in escalation_steps, cached once loaded."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._cache: dict[int, EscalationPolicy] = {}
+
+    async def get(self, guild_id: int) -> EscalationPolicy:
+        policy = self._cache.get(guild_id)
+        if policy is None:
+            rows = await self.db.fetchall(
+                "SELECT threshold, action, duration FROM escalation_steps WHERE guild_id=?", (guild_id,)
+            )
+            if rows:
+                policy = EscalationPolicy({t: (action, duration) for t, action, duration in rows}, custom=True)
+            else:
+                policy = EscalationPolicy(DEFAULT_STEPS)
+            self._cache[guild_id] = policy
+        return policy
+
+    async def set_step(self, guild_id: int, threshold: int, action: str, duration: int = None):
+        async with self.db.transaction() as conn:
+            await self._materialize(conn, guild_id)
+            await conn.execute(
+                "INSERT INTO escalation_steps (guild_id, threshold, action, duration) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, threshold) DO UPDATE SET action=excluded.action, duration=excluded.duration",
+                (guild_id, threshold, action, duration)
+            )
+        self._cache.pop(guild_id, None)
+
+    async def remove_step(self, guild_id: int, threshold: int):
+        async with self.db.transaction() as conn:
+            await self._materialize(conn, guild_id)
+            # keep a "none" row so an emptied ladder doesn't fall back to the defaults
+            await conn.execute(
+                "UPDATE escalation_steps SET action='none', duration=NULL WHERE guild_id=? AND threshold=?",
+                (guild_id, threshold)
+            )
+        self._cache.pop(guild_id, None)
+
+    async def reset(self, guild_id: int):
+        await self.db.execute("DELETE FROM escalation_steps WHERE guild_id=?", (guild_id,))
+        self._cache.pop(guild_id, None)
+
+    @staticmethod
+    async def _materialize(conn, guild_id: int):
+        """Copy the defaults in before the first customisation so edits start from them"""
+        async with conn.execute("SELECT 1 FROM escalation_steps WHERE guild_id=? LIMIT 1", (guild_id,)) as cur:
+            if await cur.fetchone():
+                return
+        await conn.executemany(
+            "INSERT INTO escalation_steps (guild_id, threshold, action, duration) VALUES (?, ?, ?, ?)",
+            [(guild_id, t, action, duration) for t, (action, duration) in DEFAULT_STEPS.items()]
+        )
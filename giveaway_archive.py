@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from database import Database
+
+# Ended giveaways are compacted into one giveaway_archive row: the sorted user
+# ids packed as little-endian uint64 (8 bytes per entrant instead of a b-tree
+# row each). Winners stay in giveaway_winners. Every reader below answers
+# from the archive when there is one and from giveaway_entries otherwise.
+
+# ended giveaways stay row-per-entrant this long (rerolls right after the end touch the hot table)
+ARCHIVE_AFTER = int(os.getenv("GIVEAWAY_ARCHIVE_AFTER", str(24 * 3600)))
+CACHED_ARCHIVES = 8
+CACHED_LIVE = 1024
+_archives: OrderedDict = OrderedDict()   # giveaway id -> unpacked ids, most recently used last
+# giveaway id -> end_time + ARCHIVE_AFTER: no cluster's compaction can archive it before then
+_live_until: OrderedDict = OrderedDict()
+
+
+def pack(user_ids) -> bytes:
+    ids = array("Q", sorted(user_ids))
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def unpack(blob: bytes) -> array:
+    ids = array("Q")
+    ids.frombytes(blob)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids
+
+
+async def archived(db: Database, giveaway_id: int):
+    """Sorted entrant ids of an archived giveaway, or None if its entries are still live"""
+    ids = _archives.get(giveaway_id)
+    if ids is not None:
+        _archives.move_to_end(giveaway_id)
+        return ids
+    if time.time() < _live_until.get(giveaway_id, 0):
+        return None   # too recent to be archived; skip the round trip on every page and click
+    row = await db.fetchone(
+        "SELECT g.end_time, a.user_ids FROM giveaways AS g "
+        "LEFT JOIN giveaway_archive AS a ON a.giveaway_id = g.id WHERE g.id = ?",
+        (giveaway_id,),
+    )
+    if row is None or row[1] is None:
+        if row is not None:
+            _live_until[giveaway_id] = row[0] + ARCHIVE_AFTER
+            _live_until.move_to_end(giveaway_id)
+            while len(_live_until) > CACHED_LIVE:
+                _live_until.popitem(last=False)
+        return None
+    _live_until.pop(giveaway_id, None)
+    ids = _archives[giveaway_id] = unpack(row[1])
+    while len(_archives) > CACHED_ARCHIVES:
+        _archives.popitem(last=False)
+    return ids
+
+
+# ---------------- READS ---------------- #
+
+async def entrant_count(db: Database, giveaway_id: int) -> int:
+    ids = await archived(db, giveaway_id)
+    if ids is not None:
+        return len(ids)
+    return await db.fetchval("SELECT COUNT(*) FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,), default=0)
+
+
+async def is_entrant(db: Database, giveaway_id: int, user_id: int) -> bool:
+    ids = await archived(db, giveaway_id)
+    if ids is not None:
+        i = bisect_left(ids, user_id)
+        return i < len(ids) and ids[i] == user_id
+    row = await db.fetchone(
+        "SELECT 1 FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?", (giveaway_id, user_id)
+    )
+    return row is not None
+
+
+async def entrant_page(db: Database, giveaway_id: int, limit: int, after: int = None, before: int = None) -> list:
+    """Up to ``limit`` entrant ids in ascending order, after or before a keyset cursor"""
+    ids = await archived(db, giveaway_id)
+    if ids is not None:
+        if before is not None:
+            end = bisect_left(ids, before)
+            return ids[max(end - limit, 0):end].tolist()
+        start = 0 if after is None else bisect_right(ids, after)
+        return ids[start:start + limit].tolist()
+    if before is not None:
+        rows = await db.fetchall(
+            "SELECT user_id FROM giveaway_entries WHERE giveaway_id = ? AND user_id < ? ORDER BY user_id DESC LIMIT ?",
+            (giveaway_id, before, limit),
+        )
+        rows.reverse()
+    else:
+        rows = await db.fetchall(
+            "SELECT user_id FROM giveaway_entries WHERE giveaway_id = ? AND user_id > ? ORDER BY user_id LIMIT ?",
+            (giveaway_id, -1 if after is None else after, limit),
+        )
+    return [row[0] for row in rows]
+
+
+# ---------------- WRITES ---------------- #
+
+async def remove_entrants(db: Database, giveaway_id: int, user_ids: list):
+    ids = await archived(db, giveaway_id)
+    if ids is None:
+        await db.executemany(
+            "DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?",
+            [(giveaway_id, user_id) for user_id in user_ids],
+        )
+        return
+    removed = set(user_ids)
+    kept = [user_id for user_id in ids if user_id not in removed]
+    await db.execute(
+        "UPDATE giveaway_archive SET entrants = ?, user_ids = ? WHERE giveaway_id = ?",
+        (len(kept), pack(kept), giveaway_id),
+    )
+    _archives.pop(giveaway_id, None)
+
+
+async def archive_giveaway(conn, giveaway_id: int) -> int:
+    """Fold one ended giveaway's entries into its archive row (inside a transaction); returns the entrant count"""
+    async with conn.execute(
+        "SELECT user_id FROM giveaway_entries WHERE giveaway_id = ? ORDER BY user_id", (giveaway_id,)
+    ) as cur:
+        user_ids = [row[0] for row in await cur.fetchall()]
+    await conn.execute(
+        "INSERT OR REPLACE INTO giveaway_archive (giveaway_id, entrants, user_ids, archived_at) VALUES (?, ?, ?, ?)",
+        (giveaway_id, len(user_ids), pack(user_ids), int(time.time())),
+    )
+    await conn.execute("DELETE FROM giveaway_entries WHERE giveaway_id = ?", (giveaway_id,))
+    await conn.execute("UPDATE giveaways SET archived = 1 WHERE id = ?", (giveaway_id,))
+    _archives.pop(giveaway_id, None)
+    _live_until.pop(giveaway_id, None)
+    return len(user_ids)
@@ -0,0 +1,137 @@
+import json
+import time
+
+import discord
+
+from member_cache import gateway_cached
+from moderation import get_muted_role, format_duration
+
+
+class Requirements:
+    """Structured entry rules of one giveaway, stored as JSON in giveaways.rules."""
+
+    __slots__ = ("role_id", "min_tenure", "min_account_age", "not_muted")
+
+    def __init__(self, role_id: int = None, min_tenure: int = None, min_account_age: int = None, not_muted: bool = False):
+        self.role_id = role_id
+        self.min_tenure = min_tenure              # seconds since joining the server
+        self.min_account_age = min_account_age    # seconds since the account was created
+        self.not_muted = not_muted
+
+    def __bool__(self):
+        return bool(self.role_id or self.min_tenure or self.min_account_age or self.not_muted)
+
+    @classmethod
+    def from_json(cls, text: str):
+        return cls(**json.loads(text)) if text else cls()
+
+    def to_json(self):
+        """None when there is nothing to enforce"""
+        if not self:
+            return None
+        return json.dumps({name: getattr(self, name) for name in self.__slots__ if getattr(self, name)})
+
+    def describe(self) -> list:
+        lines = []
+        if self.role_id:
+            lines.append(f"Role <@&{self.role_id}>")
+        if self.min_tenure:
+            lines.append(f"In the server for {format_duration(self.min_tenure)}")
+        if self.min_account_age:
+            lines.append(f"Account older than {format_duration(self.min_account_age)}")
+        if self.not_muted:
+            lines.append("Not muted")
+        return lines
+
+    def compile(self):
+        """One closure per configured rule; returns check(member, now) -> (reason, recheck_at)
+
+        ``reason`` is None when the member qualifies. A failure that time alone
+        fixes (tenure, account age) carries the moment it will pass; anything
+        else only changes when the member does.
+        """
+        rules = []
+        if self.role_id:
+            role_id = self.role_id
+
+            def has_role(member, now):
+                if member.get_role(role_id) is None:
+                    return f"you need the <@&{role_id}> role", None
+            rules.append(has_role)
+        if self.min_tenure:
+            tenure = self.min_tenure
+
+            def joined_long_enough(member, now):
+                if member.joined_at is None:
+                    return "your server join date is unknown", None
+                ready_at = member.joined_at.timestamp() + tenure
+                if now < ready_at:
+                    return f"you must be in the server for {format_duration(tenure)} (<t:{int(ready_at)}:R>)", ready_at
+            rules.append(joined_long_enough)
+        if self.min_account_age:
+            age = self.min_account_age
+
+            def account_old_enough(member, now):
+                ready_at = member.created_at.timestamp() + age
+                if now < ready_at:
+                    return f"your account must be {format_duration(age)} old (<t:{int(ready_at)}:R>)", ready_at
+            rules.append(account_old_enough)
+        if self.not_muted:
+
+            def not_muted(member, now):
+                role = get_muted_role(member.guild)   # cached id; members hold their role ids sorted
+                if member.is_timed_out() or (role is not None and member.get_role(role.id) is not None):
+                    return "muted members can't enter", None
+            rules.append(not_muted)
+
+        def check(member, now):
+            for rule in rules:
+                failure = rule(member, now)
+                if failure is not None:
+                    return failure
+            return None, None
+        return check
+
+
+class EligibilityCache:
+    """Compiled requirements of running giveaways plus memoised verdicts per member.
+
+    A verdict is reused until the member changes (``invalidate_member``, from
+    on_member_update) or, for time-based failures, until they would pass.
+    Members discord.py doesn't cache get no update events, so they are
+    judged afresh each time.
+    """
+
+    def __init__(self):
+        self._checks: dict[int, object] = {}              # giveaway id -> compiled check
+        self._verdicts: dict[int, dict[int, tuple]] = {}  # giveaway id -> user id -> (reason, recheck_at)
+
+    def register(self, giveaway_id: int, requirements: Requirements):
+        if requirements:
+            self._checks[giveaway_id] = requirements.compile()
+            self._verdicts[giveaway_id] = {}
+
+    def enforced(self, giveaway_id: int) -> bool:
+        return giveaway_id in self._checks
+
+    def check(self, giveaway_id: int, member: discord.Member, now: float = None):
+        """Why the member can't enter (None if they can, or the giveaway has no rules)"""
+        check = self._checks.get(giveaway_id)
+        if check is None:
+            return None
+        now = time.time() if now is None else now
+        verdicts = self._verdicts[giveaway_id]
+        verdict = verdicts.get(member.id)
+        if verdict is None or (verdict[1] is not None and now >= verdict[1]):
+            verdict = check(member, now)
+            if gateway_cached(member):
+                verdicts[member.id] = verdict
+        return verdict[0]
+
+    def invalidate_member(self, user_id: int):
+        for verdicts in self._verdicts.values():
+            verdicts.pop(user_id, None)
+
+    def forget(self, giveaway_id: int):
+        self._checks.pop(giveaway_id, None)
+        self._verdicts.pop(giveaway_id, None)
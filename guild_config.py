@@ -0,0 +1,120 @@
+import os
+import logging
+
+from database import Database
+
+log = logging.getLogger(__name__)
+
+# ---------------- DEFAULTS ---------------- #
+# Used for every guild that hasn't overridden a setting.
+
+DEFAULT_PREFIX = os.getenv("PREFIX", ".")
+DEFAULT_LOG_CHANNEL_ID = 1417097768744517753  # logging channel
+DEFAULT_ALLOWED_ROLES = frozenset({
+    1297233763343794327,
+    1338595907918233600,
+    1338631925698658434,
+    1335300047935377468,
+    1365412907067899976,
+})
+DEFAULT_SERVER_NAME = os.getenv("SERVER_NAME")  # None = the guild's own name
+DEFAULT_AUTOMOD = os.getenv("AUTOMOD", "1") == "1"
+
+
+def _parse_roles(value: str) -> frozenset:
+    return frozenset(int(role_id) for role_id in value.split(",") if role_id)
+
+
+def _format_roles(roles) -> str:
+    return ",".join(str(role_id) for role_id in sorted(roles))
+
+
+def _parse_flag(value: str) -> bool:
+    return value == "1"
+
+
+def _format_flag(value: bool) -> str:
+    return "1" if value else "0"
+
+
+# key -> (stored text -> value, value -> stored text)
+SETTINGS = {
+    "prefix": (str, str),
+    "log_channel_id": (int, str),
+    "allowed_roles": (_parse_roles, _format_roles),
+    "server_name": (str, str),
+    "automod": (_parse_flag, _format_flag),
+}
+
+
+class GuildConfig:
+    """Effective settings for one guild."""
+
+    __slots__ = ("guild_id", *SETTINGS)
+
+    def __init__(self, guild_id: int, **overrides):
+        self.guild_id = guild_id
+        self.prefix = overrides.get("prefix", DEFAULT_PREFIX)
+        self.log_channel_id = overrides.get("log_channel_id", DEFAULT_LOG_CHANNEL_ID)
+        self.allowed_roles = overrides.get("allowed_roles", DEFAULT_ALLOWED_ROLES)
+        self.server_name = overrides.get("server_name", DEFAULT_SERVER_NAME)
+        self.automod = overrides.get("automod", DEFAULT_AUTOMOD)
+
+
+class GuildConfigStore:
+    """guild_settings rows behind a read-through cache.
+
+    ``get()`` loads a guild's overrides once (guilds without any are cached
+    too) and afterwards is a dict lookup. Writes update the cache and call
+    ``notify(guild_id, config)`` so listeners can drop derived state.
+    """
+
+    def __init__(self, db: Database, notify=None):
+        self.db = db
+        self.notify = notify
+        self._cache: dict[int, GuildConfig] = {}
+
+    async def get(self, guild_id: int) -> GuildConfig:
+        config = self._cache.get(guild_id)
+        if config is None:
+            config = await self._load(guild_id)
+            self._cache[guild_id] = config
+        return config
+
+    def cached(self, guild_id: int) -> GuildConfig:
+        """Synchronous lookup for code that runs after ``get()`` (e.g. a command's permission check)"""
+        config = self._cache.get(guild_id)
+        return config if config is not None else GuildConfig(guild_id)
+
+    async def set(self, guild_id: int, key: str, value):
+        """Override a setting; ``None`` restores the default."""
+        if key not in SETTINGS:
+            raise KeyError(key)
+        if value is None:
+            await self.db.execute("DELETE FROM guild_settings WHERE guild_id=? AND key=?", (guild_id, key))
+        else:
+            await self.db.execute(
+                "INSERT INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id, key) DO UPDATE SET value=excluded.value",
+                (guild_id, key, SETTINGS[key][1](value))
+            )
+        config = await self._load(guild_id)
+        self._cache[guild_id] = config
+        if self.notify:
+            self.notify(guild_id, config)
+        return config
+
+    def forget(self, guild_id: int):
+        self._cache.pop(guild_id, None)
+
+    async def _load(self, guild_id: int) -> GuildConfig:
+        rows = await self.db.fetchall("SELECT key, value FROM guild_settings WHERE guild_id=?", (guild_id,))
+        overrides = {}
+        for key, value in rows:
+            if key not in SETTINGS:
+                continue
+            try:
+                overrides[key] = SETTINGS[key][0](value)
+            except ValueError:
+                log.warning(f"Ignoring bad {key} setting for guild {guild_id}: {value!r}")
+        return GuildConfig(guild_id, **overrides)
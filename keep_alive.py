@@ -1,14 +1,104 @@
-from threading import Thread
-from flask import Flask
+import os
+import time
+import logging
 
-app = Flask("keep_alive")
+from aiohttp import web
+from discord.ext import commands
 
-@app.route("/")
-def home():
-    return "OK"
+import metrics
 
-def keep_alive(host="0.0.0.0", port=8080):
-    def run():
-        app.run(host=host, port=port)
-    thread = Thread(target=run, daemon=True)
-    thread.start()
+log = logging.getLogger(__name__)
+
+HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8080"))
+# not ready once the last heartbeat ACK is older than this
+READY_MAX_ACK_AGE = float(os.getenv("READY_MAX_ACK_AGE", "90"))
+
+
+def _gateways(bot: commands.Bot) -> list:
+    if isinstance(bot, commands.AutoShardedBot):
+        # one websocket per shard; ShardInfo doesn't expose it publicly
+        return [getattr(getattr(info, "_parent", None), "ws", None) for info in bot.shards.values()]
+    return [getattr(bot, "ws", None)]
+
+
+def _last_ack_age(bot: commands.Bot):
+    """Seconds since the gateway last ACKed a heartbeat (None before the first one); worst shard when sharded"""
+    # discord.py doesn't expose this publicly; the keep-alive handler records it
+    ages = []
+    for ws in _gateways(bot):
+        last_ack = getattr(getattr(ws, "_keep_alive", None), "_last_ack", None)
+        if last_ack is not None:
+            ages.append(time.perf_counter() - last_ack)
+    return max(ages) if ages else None
+
+
+class KeepAliveServer:
+    """HTTP health and metrics endpoints served from the bot's own event loop.
+
+    ``/`` stays a plain "OK" for uptime pingers. ``/healthz`` is liveness (the
+    loop answers and the client isn't closed), ``/readyz`` adds the gateway
+    state, and ``/metrics`` is the Prometheus registry.
+    """
+
+    def __init__(self, bot: commands.Bot, host: str = HOST, port: int = PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner = None
+        metrics.GATEWAY_LATENCY.track((), self._latency)
+        metrics.GUILDS.track((), lambda: len(bot.guilds))
+
+    def _latency(self) -> float:
+        latency = self.bot.latency
+        return -1 if latency != latency or latency == float("inf") else latency
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self.home)
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/readyz", self.readyz)
+        app.router.add_get("/metrics", self.prometheus)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info(f"Health server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---------------- ENDPOINTS ---------------- #
+
+    async def home(self, request: web.Request):
+        return web.Response(text="OK")
+
+    async def healthz(self, request: web.Request):
+        alive = not self.bot.is_closed()
+        return web.json_response({"alive": alive}, status=200 if alive else 503)
+
+    async def readyz(self, request: web.Request):
+        ack_age = _last_ack_age(self.bot)
+        latency = self._latency()
+        ready = (
+            self.bot.is_ready()
+            and not self.bot.is_closed()
+            and latency >= 0
+            and (ack_age is None or ack_age < READY_MAX_ACK_AGE)
+        )
+        body = {
+            "ready": ready,
+            "latency": round(latency, 4) if latency >= 0 else None,
+            "last_heartbeat_ack_seconds": round(ack_age, 1) if ack_age is not None else None,
+            "guilds": len(self.bot.guilds),
+        }
+        if isinstance(self.bot, commands.AutoShardedBot):
+            body["shards"] = {
+                shard_id: round(latency, 4) if latency == latency and latency != float("inf") else None
+                for shard_id, latency in self.bot.latencies
+            }
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def prometheus(self, request: web.Request):
+        return web.Response(text=metrics.REGISTRY.render(), content_type="text/plain", charset="utf-8")
@@ -0,0 +1,62 @@
+import time
+import asyncio
+import logging
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class LabelRefresher:
+    """Debounces message edits that only refresh a view (e.g. the entry count).
+
+    Bursts of ``request()`` calls for the same message collapse into at most
+    one edit per ``interval`` seconds. The view is rendered right before the
+    edit goes out, so the last edit of a burst always shows the final state.
+    Callers never wait on the REST call.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._pending: dict[int, tuple] = {}       # message id -> (message, render)
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._last_edit: dict[int, float] = {}
+
+    @property
+    def pending(self) -> int:
+        """Messages with an edit still queued."""
+        return len(self._pending)
+
+    def request(self, message: discord.Message, render):
+        """Schedule an edit of ``message`` with the view returned by ``await render()``."""
+        self._pending[message.id] = (message, render)
+        if message.id not in self._tasks:
+            self._tasks[message.id] = asyncio.create_task(self._run(message.id))
+
+    def cancel(self, message_id: int):
+        """Drop any queued edit, e.g. before the view is disabled for good."""
+        self._pending.pop(message_id, None)
+        self._last_edit.pop(message_id, None)
+        task = self._tasks.pop(message_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    def cancel_all(self):
+        for message_id in list(self._tasks):
+            self.cancel(message_id)
+
+    async def _run(self, message_id: int):
+        try:
+            while message_id in self._pending:
+                wait = self._last_edit.get(message_id, 0) + self.interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                message, render = self._pending.pop(message_id)
+                self._last_edit[message_id] = time.monotonic()
+                try:
+                    await message.edit(view=await render())
+                except discord.HTTPException as e:
+                    log.warning(f"Failed to refresh view on message {message_id}: {e}")
+        finally:
+            if self._tasks.get(message_id) is asyncio.current_task():
+                del self._tasks[message_id]
@@ -0,0 +1,146 @@
+"""Runs the bot as several shard clusters, each in its own process.
+
+    python launcher.py --shards 8 --clusters 2
+    python launcher.py --shards auto --clusters 4 --db-url tcp://db.internal:7433
+
+Every cluster is bot.py with SHARD_COUNT/SHARD_IDS/CLUSTER_ID set and its
+own health port (PORT + cluster id). Clusters share one database: either the
+given --db-url or a db_server.py started here on the local MOD_DB file.
+Crashed processes are restarted with backoff; SIGINT/SIGTERM stops them all.
+"""
+import os
+import sys
+import json
+import signal
+import asyncio
+import logging
+import argparse
+import urllib.request
+
+from sharding import split_shards
+
+log = logging.getLogger("launcher")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASE_PORT = int(os.getenv("PORT", "8080"))
+DB_SERVER_HOST = os.getenv("DB_SERVER_HOST", "127.0.0.1")
+DB_SERVER_PORT = int(os.getenv("DB_SERVER_PORT", "7433"))
+MAX_BACKOFF = 60
+STABLE_AFTER = 60   # a process that ran this long resets its backoff
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", default=os.getenv("SHARD_COUNT", "auto"), help="total shard count, or auto")
+    parser.add_argument("--clusters", type=int, default=int(os.getenv("CLUSTERS", "1")), help="bot processes")
+    parser.add_argument("--db-url", default=os.getenv("MOD_DB_URL"), help="shared db_server.py to use instead of starting one")
+    return parser.parse_args(argv)
+
+
+def recommended_shards(token: str) -> int:
+    """Discord's recommended shard count for this bot"""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (launcher, 1.0)"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+
+class Process:
+    """One supervised child; restarted whenever it exits until the launcher stops."""
+
+    def __init__(self, name: str, args: list, env: dict):
+        self.name = name
+        self.args = args
+        self.env = env
+        self.proc: asyncio.subprocess.Process = None
+        self.stopping = False
+
+    async def supervise(self):
+        backoff = 1
+        while not self.stopping:
+            started = asyncio.get_running_loop().time()
+            self.proc = await asyncio.create_subprocess_exec(sys.executable, *self.args, cwd=ROOT, env=self.env)
+            log.info(f"{self.name} started (pid {self.proc.pid})")
+            code = await self.proc.wait()
+            if self.stopping:
+                break
+            if asyncio.get_running_loop().time() - started > STABLE_AFTER:
+                backoff = 1
+            log.warning(f"{self.name} exited with {code}, restarting in {backoff}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def stop(self):
+        self.stopping = True
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.terminate()
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 30):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if asyncio.get_running_loop().time() > deadline:
+                raise RuntimeError(f"database server on {host}:{port} did not come up")
+            await asyncio.sleep(0.2)
+        else:
+            writer.close()
+            return
+
+
+async def launch(args):
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        raise RuntimeError("DISCORD_TOKEN environment variable not set")
+    shard_count = recommended_shards(token) if args.shards == "auto" else int(args.shards)
+    clusters = split_shards(shard_count, args.clusters)
+    log.info(f"Launching {shard_count} shards in {len(clusters)} clusters")
+
+    processes = []
+    db_url = args.db_url
+    if db_url is None and len(clusters) > 1:
+        # clusters must share state: serve the local database file to all of them
+        db_env = {**os.environ, "DB_SERVER_HOST": DB_SERVER_HOST, "DB_SERVER_PORT": str(DB_SERVER_PORT)}
+        processes.append(Process("db-server", ["db_server.py"], db_env))
+        db_url = f"tcp://{DB_SERVER_HOST}:{DB_SERVER_PORT}"
+
+    for cluster_id, shard_ids in enumerate(clusters):
+        env = {
+            **os.environ,
+            "SHARD_COUNT": str(shard_count),
+            "SHARD_IDS": ",".join(map(str, shard_ids)),
+            "CLUSTER_ID": str(cluster_id),
+            "PORT": str(BASE_PORT + cluster_id),
+        }
+        if db_url:
+            env["MOD_DB_URL"] = db_url
+        processes.append(Process(f"cluster {cluster_id} (shards {shard_ids[0]}-{shard_ids[-1]})", ["bot.py"], env))
+
+    loop = asyncio.get_running_loop()
+    done = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, done.set)
+
+    tasks = []
+    for process in processes:
+        tasks.append(asyncio.create_task(process.supervise()))
+        if process.name == "db-server":
+            await wait_for_port(DB_SERVER_HOST, DB_SERVER_PORT)
+
+    await done.wait()
+    log.info("Stopping clusters")
+    # bots first, so they close their database connections before the server goes away
+    for process in reversed(processes):
+        process.stop()
+        if process.proc is not None:
+            await process.proc.wait()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(launch(parse_args()))
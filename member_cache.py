@@ -0,0 +1,157 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+import discord
+from discord.ext import commands
+
+import metrics
+
+# ---------------- PROFILE ---------------- #
+# Default: discord.py chunks every guild at startup and keeps all members.
+# LOW_MEMORY=1: the gateway cache keeps no members and nothing is chunked.
+# Members then arrive with the events that name them (messages, clicks,
+# commands) and the most recent ones live in a bounded MemberLRU; anything
+# else is fetched when a command needs it.
+
+LOW_MEMORY = os.getenv("LOW_MEMORY", "0") == "1"
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", "5000"))
+# uncached members get no update events, so an entry is trusted this long
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", "600"))
+
+LOOKUPS = metrics.REGISTRY.counter("bot_member_lookups_total", "Member lookups by where they were answered", ("source",))
+CACHED = metrics.REGISTRY.gauge("bot_member_lru_size", "Members held by the LRU member cache")
+
+
+def bot_options(low_memory: bool = LOW_MEMORY) -> dict:
+    """Extra commands.Bot kwargs for the member cache profile"""
+    if not low_memory:
+        return {}
+    return {
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": None,   # nothing reads the message cache
+    }
+
+
+def gateway_cached(member: discord.Member) -> bool:
+    """True if member events reach this member, so decisions memoised about it get invalidated"""
+    return member.guild.get_member(member.id) is not None
+
+
+class MemberLRU:
+    """Recently seen members per (guild, user), bounded to ``max_members`` and aged out after ``ttl``.
+
+    ``get`` answers from the gateway cache first (complete in the default
+    profile), then from the LRU. LRU copies can be up to ``ttl`` old and
+    don't see the bot's own role edits (call ``forget`` after one), so
+    anything that decides on roles uses ``fetch``. Messages and interactions
+    carry full members, so they refresh entries for free.
+    """
+
+    def __init__(self, bot: commands.Bot, max_members: int = MEMBER_CACHE_SIZE, ttl: float = MEMBER_CACHE_TTL):
+        self.max_members = max_members
+        self.ttl = ttl
+        self._members: OrderedDict[tuple, tuple] = OrderedDict()   # (guild id, user id) -> (member, stored at)
+        CACHED.track((), lambda: len(self._members))
+        bot.add_listener(self.on_message)
+        bot.add_listener(self.on_interaction)
+        bot.add_listener(self.on_raw_member_remove)
+        bot.add_listener(self.on_guild_remove)
+
+    def __len__(self):
+        return len(self._members)
+
+    def put(self, member: discord.Member):
+        if gateway_cached(member):
+            return  # discord.py already holds (and updates) this one
+        key = (member.guild.id, member.id)
+        self._members[key] = (member, time.monotonic())
+        self._members.move_to_end(key)
+        while len(self._members) > self.max_members:
+            self._members.popitem(last=False)
+
+    def get(self, guild: discord.Guild, user_id: int):
+        """The member if either cache has it, else None; never touches the API"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            LOOKUPS.inc("gateway")
+            return member
+        key = (guild.id, user_id)
+        entry = self._members.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[1] < self.ttl:
+                self._members.move_to_end(key)
+                LOOKUPS.inc("lru")
+                return entry[0]
+            del self._members[key]
+        LOOKUPS.inc("miss")
+        return None
+
+    async def fetch(self, guild: discord.Guild, user_id: int):
+        """An up-to-date member: discord.py's cache (kept current by events), else the API, never the LRU.
+
+        For decisions that read roles; None if they are not in the guild.
+        """
+        member = guild.get_member(user_id)
+        if member is not None:
+            LOOKUPS.inc("gateway")
+            return member
+        LOOKUPS.inc("api")
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            self.forget(guild.id, user_id)
+            return None
+        self.put(member)
+        return member
+
+    def forget(self, guild_id: int, user_id: int = None):
+        if user_id is not None:
+            self._members.pop((guild_id, user_id), None)
+            return
+        for key in [key for key in self._members if key[0] == guild_id]:
+            del self._members[key]
+
+    # ---------------- EVENTS ---------------- #
+
+    async def on_message(self, message: discord.Message):
+        if isinstance(message.author, discord.Member):
+            self.put(message.author)
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        if isinstance(interaction.user, discord.Member):
+            self.put(interaction.user)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.forget(payload.guild_id, payload.user.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.forget(guild.id)
+
+
+# ---------------- CONVERTER ---------------- #
+
+_BARE_ID = re.compile(r"([0-9]{15,20})$")
+
+
+class LRUMemberConverter(commands.MemberConverter):
+    """MemberConverter that answers bare ids from the bot's MemberLRU before asking Discord"""
+
+    async def convert(self, ctx: commands.Context, argument: str) -> discord.Member:
+        cache: MemberLRU = ctx.bot.member_cache
+        match = _BARE_ID.match(argument)
+        if match and ctx.guild is not None:
+            member = cache.get(ctx.guild, int(match.group(1)))
+            if member is not None:
+                return member
+        # mentions resolve from the message's fresh member data; names and unknown ids query the gateway
+        member = await super().convert(ctx, argument)
+        if ctx.guild is not None:
+            cache.put(member)
+        return member
+
+
+CachedMember = Annotated[discord.Member, LRUMemberConverter]
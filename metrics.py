@@ -0,0 +1,202 @@
+import math
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+
+# Minimal Prometheus text-format registry. Everything lives in process memory
+# and is rendered on demand by the /metrics endpoint.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge:
+    """Either set directly, or tracked: a callback is read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._callbacks: dict[tuple, callable] = {}
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def track(self, labels: tuple, read):
+        self._callbacks[labels] = read
+
+    def untrack(self, labels: tuple):
+        self._callbacks.pop(labels, None)
+
+    def samples(self):
+        values = dict(self._values)
+        for labels, read in self._callbacks.items():
+            try:
+                values[labels] = read()
+            except Exception:
+                logging.getLogger(__name__).exception(f"Reading gauge {self.name}{labels} failed")
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series: dict[tuple, list] = {}   # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), series[-2]
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), series[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------------- BOT METRICS ---------------- #
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "bot_command_seconds", "Command handling time", ("kind", "command", "status")
+)
+DB_SECONDS = REGISTRY.histogram(
+    "bot_db_seconds", "Database call time, including waiting for a connection", ("op",)
+)
+QUEUE_DEPTH = REGISTRY.gauge("bot_queue_depth", "Items waiting in background queues", ("queue",))
+SCHEDULED_TIMERS = REGISTRY.gauge("bot_scheduled_timers", "Deadlines held in memory by each scheduler", ("scheduler",))
+RATE_LIMITS = REGISTRY.counter("discord_rate_limits_total", "Discord rate limits hit", ("scope",))
+GATEWAY_LATENCY = REGISTRY.gauge("discord_gateway_latency_seconds", "Heartbeat round-trip time")
+GUILDS = REGISTRY.gauge("bot_guilds", "Guilds the bot is in")
+
+
+class RateLimitCounter(logging.Handler):
+    """Counts each 429 discord.py's HTTP client logs, once.
+
+    Every 429 logs "We are being rate limited"; a global one is followed, in
+    the same event loop step, by "Global rate limit has been hit". The scope
+    is settled on the next loop iteration so a global 429 isn't counted as a
+    route one too.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self._unsettled = 0   # 429s logged this loop step whose scope isn't known yet
+
+    def emit(self, record: logging.LogRecord):
+        if not isinstance(record.msg, str):
+            return
+        if record.msg.startswith("We are being rate limited"):
+            self._unsettled += 1
+            if self._unsettled == 1:
+                try:
+                    asyncio.get_running_loop().call_soon(self._settle)
+                except RuntimeError:
+                    self._settle()   # no loop to wait for
+        elif record.msg.startswith("Global rate limit has been hit"):
+            self._unsettled = max(self._unsettled - 1, 0)
+            RATE_LIMITS.inc("global")
+
+    def _settle(self):
+        if self._unsettled:
+            RATE_LIMITS.inc("route", amount=self._unsettled)
+        self._unsettled = 0
+
+
+def install_rate_limit_counter():
+    logger = logging.getLogger("discord.http")
+    if not any(isinstance(h, RateLimitCounter) for h in logger.handlers):
+        logger.addHandler(RateLimitCounter())
@@ -0,0 +1,161 @@
+import logging
+
+from database import Database
+
+log = logging.getLogger(__name__)
+
+# ---------------- SCHEMA VERSIONS ---------------- #
+# Each entry upgrades the schema from version - 1 to version. The current
+# version lives in PRAGMA user_version. Never edit a migration that has
+# shipped; append a new one instead.
+
+MIGRATIONS = [
+    (1, "base tables", """
+        CREATE TABLE IF NOT EXISTS warns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mod_id INTEGER NOT NULL,
+            reason TEXT,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER,
+            permanent INTEGER DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS punishments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS giveaways (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            host_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            winners INTEGER NOT NULL,
+            end_time INTEGER NOT NULL,
+            requirements TEXT
+        );
+        CREATE TABLE IF NOT EXISTS giveaway_entries (
+            giveaway_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL
+        );
+    """),
+    (2, "keyed giveaway entries, message_id index", """
+        -- entries become a clustered (giveaway_id, user_id) table: membership
+        -- checks and per-giveaway scans are index range reads, duplicates are impossible
+        CREATE TABLE giveaway_entries_new (
+            giveaway_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (giveaway_id, user_id)
+        ) WITHOUT ROWID;
+        INSERT OR IGNORE INTO giveaway_entries_new (giveaway_id, user_id)
+            SELECT giveaway_id, user_id FROM giveaway_entries;
+        DROP TABLE giveaway_entries;
+        ALTER TABLE giveaway_entries_new RENAME TO giveaway_entries;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_giveaways_message ON giveaways (message_id);
+    """),
+    (3, "giveaway end scheduling", """
+        ALTER TABLE giveaways ADD COLUMN ended INTEGER NOT NULL DEFAULT 0;
+        -- giveaways already past their end time were finished by the old in-command timer
+        UPDATE giveaways SET ended = 1 WHERE end_time <= CAST(strftime('%s', 'now') AS INTEGER);
+        CREATE INDEX IF NOT EXISTS idx_giveaways_pending ON giveaways (end_time) WHERE ended = 0;
+    """),
+    (4, "punishment expiry indexes", """
+        ALTER TABLE punishments ADD COLUMN reason TEXT;
+        CREATE INDEX IF NOT EXISTS idx_punishments_expires ON punishments (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_punishments_member ON punishments (guild_id, user_id, type);
+    """),
+    (5, "recorded giveaway draws", """
+        CREATE TABLE IF NOT EXISTS giveaway_winners (
+            giveaway_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            draw_no INTEGER NOT NULL,
+            drawn_at INTEGER NOT NULL,
+            PRIMARY KEY (giveaway_id, user_id)
+        ) WITHOUT ROWID;
+    """),
+    (6, "warn indexes and archive", """
+        CREATE INDEX IF NOT EXISTS idx_warns_member ON warns (guild_id, user_id, expires_at);
+        CREATE INDEX IF NOT EXISTS idx_warns_expiry ON warns (expires_at) WHERE permanent = 0;
+        CREATE TABLE IF NOT EXISTS warns_archive (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mod_id INTEGER NOT NULL,
+            reason TEXT,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER,
+            permanent INTEGER DEFAULT 0,
+            archived_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_warns_archive_member ON warns_archive (guild_id, user_id);
+    """),
+    (7, "escalation policies", """
+        -- per-guild warn ladder; a guild with no rows uses escalation.DEFAULT_STEPS
+        CREATE TABLE IF NOT EXISTS escalation_steps (
+            guild_id INTEGER NOT NULL,
+            threshold INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            duration INTEGER,
+            PRIMARY KEY (guild_id, threshold)
+        ) WITHOUT ROWID;
+    """),
+    (8, "per-guild settings", """
+        -- overrides only; missing keys fall back to guild_config defaults
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (guild_id, key)
+        ) WITHOUT ROWID;
+    """),
+    (9, "bot state", """
+        -- process-wide bookkeeping, e.g. the hash of the last synced command tree
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """),
+    (10, "structured giveaway requirements", """
+        -- JSON rules enforced on entry (giveaway_requirements.Requirements); requirements stays display text
+        ALTER TABLE giveaways ADD COLUMN rules TEXT;
+    """),
+    (11, "giveaway entry archive", """
+        -- ended giveaways' entries packed into one blob (see giveaway_archive); winners stay in giveaway_winners
+        CREATE TABLE IF NOT EXISTS giveaway_archive (
+            giveaway_id INTEGER PRIMARY KEY,
+            entrants INTEGER NOT NULL,
+            user_ids BLOB NOT NULL,
+            archived_at INTEGER NOT NULL
+        );
+        ALTER TABLE giveaways ADD COLUMN archived INTEGER NOT NULL DEFAULT 0;
+        CREATE INDEX IF NOT EXISTS idx_giveaways_unarchived ON giveaways (end_time) WHERE ended = 1 AND archived = 0;
+        CREATE INDEX IF NOT EXISTS idx_warns_archive_age ON warns_archive (archived_at);
+    """),
+    (12, "giveaway end announcements", """
+        -- 0 from claiming an ended giveaway until its results are posted; a failed post is retried
+        ALTER TABLE giveaways ADD COLUMN announced INTEGER NOT NULL DEFAULT 1;
+        CREATE INDEX IF NOT EXISTS idx_giveaways_unannounced ON giveaways (end_time) WHERE announced = 0;
+    """),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+async def migrate(db: Database):
+    """Bring the database up to SCHEMA_VERSION, one transaction per step."""
+    current = await db.fetchval("PRAGMA user_version", default=0)
+    for version, description, script in MIGRATIONS:
+        if version <= current:
+            continue
+        log.info(f"Applying schema migration {version}: {description}")
+        await db.executescript(
+            f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;"
+        )
+    if current > SCHEMA_VERSION:
+        log.warning(f"Database schema v{current} is newer than this build (v{SCHEMA_VERSION})")
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+
+import discord
+
+log = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10   # Discord limit
+MAX_EMBED_CHARS_PER_MESSAGE = 6000   # Discord limit on the summed len(embed) of one message
+
+
+def pack_embeds(embeds: list) -> list:
+    """Split embeds, in order, into messages within both the count and the total character limit"""
+    messages, current, chars = [], [], 0
+    for embed in embeds:
+        size = len(embed)
+        if current and (len(current) == MAX_EMBEDS_PER_MESSAGE or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current, chars = [], 0
+        current.append(embed)
+        chars += size
+    if current:
+        messages.append(current)
+    return messages
+
+
+class ModLogDispatcher:
+    """Background delivery of moderation DMs and log-channel posts.
+
+    Commands enqueue and move on. The worker waits ``batch_window`` seconds
+    after the first item so a burst (e.g. a raid cleanup) accumulates, then
+    packs log entries for the same channel into messages of up to 10 embeds
+    and 6000 characters, and sends DMs with bounded concurrency. Rate limits and 5xx errors are
+    retried with exponential backoff.
+    """
+
+    def __init__(self, batch_window: float = 0.5, dm_concurrency: int = 5, max_retries: int = 5):
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self._dm_semaphore = asyncio.Semaphore(dm_concurrency)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._in_flight = 0
+        self._task: asyncio.Task = None
+
+    @property
+    def depth(self) -> int:
+        """Items queued or currently being delivered."""
+        return self._queue.qsize() + self._in_flight
+
+    def send_dm(self, user: discord.abc.User, embed: discord.Embed):
+        self._queue.put_nowait(("dm", user, embed))
+
+    def send_log(self, channel: discord.abc.Messageable, embed: discord.Embed):
+        self._queue.put_nowait(("log", channel, embed))
+
+    # ---------------- WORKER ---------------- #
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10):
+        """Deliver what's still queued (up to ``timeout`` seconds), then stop."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Dropping {self.depth} undelivered moderation messages")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.batch_window)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._in_flight = len(batch)
+            try:
+                await self._deliver(batch)
+            except Exception:
+                log.exception("Moderation dispatch failed")
+            finally:
+                self._in_flight = 0
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: list):
+        logs: dict[int, tuple] = {}   # channel id -> (channel, [embeds]), in arrival order
+        dms = []
+        for kind, target, embed in batch:
+            if kind == "log":
+                logs.setdefault(target.id, (target, []))[1].append(embed)
+            else:
+                dms.append((target, embed))
+
+        sends = [self._dm(user, embed) for user, embed in dms]
+        for channel, embeds in logs.values():
+            for chunk in pack_embeds(embeds):
+                sends.append(self._with_retry(lambda channel=channel, chunk=chunk: channel.send(embeds=chunk)))
+        for result in await asyncio.gather(*sends, return_exceptions=True):
+            if isinstance(result, Exception):
+                log.warning(f"Failed to post moderation log: {result}")
+
+    async def _dm(self, user, embed: discord.Embed):
+        async with self._dm_semaphore:
+            try:
+                await self._with_retry(lambda: user.send(embed=embed))
+            except discord.HTTPException:
+                pass  # DMs closed or no mutual server
+
+    async def _with_retry(self, send):
+        for attempt in range(self.max_retries):
+            try:
+                return await send()
+            except discord.RateLimited as e:
+                await asyncio.sleep(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+        return await send()
@@ -0,0 +1,25 @@
+import discord
+
+MUTED_ROLE_NAME = "Muted"
+
+# guild id -> Muted role id; cogs.mod keeps it current from role events, giveaway entry rules read it
+muted_role_ids: dict[int, int] = {}
+
+
+def get_muted_role(guild: discord.Guild):
+    """Cached Muted role lookup; only falls back to a name scan on a cache miss"""
+    role_id = muted_role_ids.get(guild.id)
+    role = guild.get_role(role_id) if role_id else None
+    if role is None:
+        role = discord.utils.get(guild.roles, name=MUTED_ROLE_NAME)
+        if role is not None:
+            muted_role_ids[guild.id] = role.id
+    return role
+
+
+def format_duration(seconds: int) -> str:
+    """Largest whole unit: 7200 -> "2h", 90 -> "90s" """
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
@@ -0,0 +1,99 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from guild_config import GuildConfig, GuildConfigStore
+from member_cache import gateway_cached
+
+
+class PermissionCache:
+    """Per-member moderator decisions, shared by every cog.
+
+    A member is a moderator if they hold one of the guild's configured
+    moderator roles or have Manage Server. The decision is computed once and
+    then looked up by (guild, member) until the member's roles, a role's
+    permissions or the guild config change. Members outside discord.py's
+    cache (the low-memory profile) get no update events, so their decision is
+    recomputed from the fresh member each event carries instead.
+    """
+
+    def __init__(self, bot: commands.Bot, config: GuildConfigStore):
+        self.config = config
+        self._decisions: dict[int, dict[int, bool]] = {}   # guild id -> member id -> allowed
+        bot.add_listener(self.on_member_update)
+        bot.add_listener(self.on_raw_member_remove)
+        bot.add_listener(self.on_guild_role_update)
+        bot.add_listener(self.on_guild_role_delete)
+        bot.add_listener(self.on_guild_remove)
+        bot.add_listener(self.on_guild_config_update)
+
+    @staticmethod
+    def decide(member: discord.Member, config: GuildConfig) -> bool:
+        if member.guild_permissions.manage_guild:
+            return True
+        return any(r.id in config.allowed_roles for r in member.roles)
+
+    async def allows(self, member: discord.Member) -> bool:
+        guild_decisions = self._decisions.setdefault(member.guild.id, {})
+        decision = guild_decisions.get(member.id)
+        if decision is None:
+            decision = self.decide(member, await self.config.get(member.guild.id))
+            if gateway_cached(member):
+                guild_decisions[member.id] = decision
+        return decision
+
+    def peek(self, member: discord.Member) -> bool:
+        """Synchronous variant for code that already loaded the guild config"""
+        decision = self._decisions.get(member.guild.id, {}).get(member.id)
+        if decision is None:
+            decision = self.decide(member, self.config.cached(member.guild.id))
+        return decision
+
+    def invalidate(self, guild_id: int, member_id: int = None):
+        if member_id is None:
+            self._decisions.pop(guild_id, None)
+        else:
+            self._decisions.get(guild_id, {}).pop(member_id, None)
+
+    # ---------------- INVALIDATION ---------------- #
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.invalidate(after.guild.id, after.id)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.invalidate(payload.guild_id, payload.user.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.permissions != after.permissions:
+            self.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.invalidate(role.guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invalidate(guild.id)
+        self.config.forget(guild.id)
+
+    async def on_guild_config_update(self, guild_id: int, config: GuildConfig):
+        self.invalidate(guild_id)
+
+
+# ---------------- CHECKS ---------------- #
+
+def is_moderator():
+    """Prefix-command check backed by ``bot.perms``"""
+    async def predicate(ctx: commands.Context):
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        return await ctx.bot.perms.allows(ctx.author)
+    return commands.check(predicate)
+
+
+def app_is_moderator():
+    """Slash-command check backed by ``client.perms``"""
+    async def predicate(interaction: discord.Interaction):
+        if interaction.guild is None:
+            raise app_commands.NoPrivateMessage()
+        return await interaction.client.perms.allows(interaction.user)
+    return app_commands.check(predicate)
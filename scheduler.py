@@ -0,0 +1,120 @@
+import time
+import heapq
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """One background loop that fires a handler for due deadlines.
+
+    Deadlines live in the database. Only the ones inside the next ``horizon``
+    seconds are held in a min-heap, and ``loader(until)`` is called to pull in
+    the next window once the current one runs out. The loop sleeps until the
+    earliest deadline (or until an earlier one is scheduled), then hands every
+    due key, up to ``batch_size`` at a time, to ``handler(keys)``.
+
+    The handler must record completion itself (so the loader stops returning
+    those keys) and should tolerate keys that were already handled.
+    """
+
+    def __init__(self, name: str, handler, loader, horizon: int = 3600, batch_size: int = 50, retry_delay: int = 30):
+        self.name = name
+        self.handler = handler
+        self.loader = loader
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self._heap = []                 # (when, key), may contain stale entries
+        self._deadlines = {}            # key -> when, the live entries
+        self._horizon_end = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task = None
+
+    @property
+    def pending(self) -> int:
+        """Deadlines currently held in memory (the DB may hold more)."""
+        return len(self._deadlines)
+
+    def schedule(self, key, when: int):
+        self._deadlines.pop(key, None)
+        if when > self._horizon_end:
+            # the loader will bring it in when its window comes up
+            return
+        self._deadlines[key] = when
+        heapq.heappush(self._heap, (when, key))
+        if self._heap[0] == (when, key):
+            self._wakeup.set()
+
+    def cancel(self, key):
+        # the heap entry goes stale and is skipped when popped
+        self._deadlines.pop(key, None)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _reload(self):
+        self._horizon_end = int(time.time()) + self.horizon
+        try:
+            rows = await self.loader(self._horizon_end)
+        except Exception:
+            self._horizon_end = 0   # reload again on the next pass
+            raise
+        for key, when in rows:
+            if self._deadlines.get(key) != when:
+                self.schedule(key, when)
+        # compact stale heap entries left behind by cancel()/reschedule
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(w, k) for w, k in self._heap if self._deadlines.get(k) == w]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            when, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == when:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.time()
+                if now >= self._horizon_end:
+                    await self._reload()
+                    continue
+
+                due = self._pop_due(now)
+                if due:
+                    try:
+                        await self.handler(due)
+                    except Exception:
+                        log.exception(f"[{self.name}] handler failed, retrying {len(due)} item(s) later")
+                        for key in due:
+                            self.schedule(key, int(now) + self.retry_delay)
+                    continue
+
+                # sleep until the next deadline, the end of the window, or an earlier schedule()
+                next_at = min(self._heap[0][0], self._horizon_end) if self._heap else self._horizon_end
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(next_at - now, 0))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception(f"[{self.name}] scheduler loop error")
+                await asyncio.sleep(self.retry_delay)
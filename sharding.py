@@ -0,0 +1,61 @@
+import os
+
+# ---------------- SHARD LAYOUT ---------------- #
+# Unset: one process, one plain commands.Bot (or AutoShardedBot with SHARDED=1,
+# letting Discord pick the shard count). The launcher sets all three per cluster.
+
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = tuple(int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()) or None
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+SHARDED = SHARD_COUNT is not None or os.getenv("SHARDED", "0") == "1"
+
+if SHARD_IDS is not None and SHARD_COUNT is None:
+    raise RuntimeError("SHARD_IDS needs SHARD_COUNT")
+
+
+def shard_for(guild_id: int, shard_count: int = None) -> int:
+    """The shard Discord routes a guild's events to"""
+    return (guild_id >> 22) % (shard_count or SHARD_COUNT or 1)
+
+
+def owns(guild_id: int) -> bool:
+    """True if this process runs the shard that owns the guild"""
+    return SHARD_IDS is None or shard_for(guild_id) in SHARD_IDS
+
+
+def is_primary() -> bool:
+    """One process per deployment runs the global jobs: the one holding shard 0"""
+    return SHARD_IDS is None or 0 in SHARD_IDS
+
+
+def owned_filter(column: str = "guild_id") -> tuple[str, tuple]:
+    """SQL condition + params limiting rows to guilds this process owns ("1" when it owns all)"""
+    if SHARD_IDS is None:
+        return "1", ()
+    return f"({column} >> 22) % ? IN ({', '.join('?' * len(SHARD_IDS))})", (SHARD_COUNT, *SHARD_IDS)
+
+
+def bot_options() -> dict:
+    """Extra AutoShardedBot kwargs for this process"""
+    if not SHARDED:
+        return {}
+    return {"shard_count": SHARD_COUNT, "shard_ids": list(SHARD_IDS) if SHARD_IDS else None}
+
+
+def describe() -> str:
+    if not SHARDED:
+        return "unsharded"
+    shards = ",".join(map(str, SHARD_IDS)) if SHARD_IDS else "all"
+    return f"cluster {CLUSTER_ID}, shards {shards} of {SHARD_COUNT or 'auto'}"
+
+
+def split_shards(shard_count: int, clusters: int) -> list[list[int]]:
+    """Contiguous, near-equal shard ranges, one per cluster"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for cluster in range(clusters):
+        end = start + size + (1 if cluster < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
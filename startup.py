@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+from discord import app_commands
+
+import metrics
+from database import Database
+
+log = logging.getLogger(__name__)
+
+FORCE_SYNC = os.getenv("FORCE_COMMAND_SYNC", "0") == "1"
+
+STARTUP_SECONDS = metrics.REGISTRY.gauge("bot_startup_phase_seconds", "Time spent in each startup phase", ("phase",))
+
+
+class StartupTimer:
+    """Checkpoints through startup; each mark records the time since the previous one."""
+
+    def __init__(self, started: float = None):
+        self.started = started or time.perf_counter()
+        self._last = self.started
+        self.phases: list[tuple[str, float]] = []
+        self.ready = False
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        STARTUP_SECONDS.set(now - self._last, phase)
+        self._last = now
+
+    def report(self):
+        self.ready = True
+        total = self._last - self.started
+        STARTUP_SECONDS.set(total, "total")
+        log.info("Startup " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases) + f" (total {total:.2f}s)")
+
+
+# ---------------- COMMAND SYNC ---------------- #
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Digest of the global command payload that tree.sync() would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda data: (data.get("type", 1), data["name"]),
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def sync_commands(tree: app_commands.CommandTree, db: Database) -> bool:
+    """Sync global slash commands only if they changed since the last sync."""
+    key = f"command_tree:{tree.client.application_id}"
+    digest = command_tree_hash(tree)
+    if not FORCE_SYNC and await db.fetchval("SELECT value FROM bot_state WHERE key = ?", (key,)) == digest:
+        log.info("Slash commands unchanged, skipping sync")
+        return False
+
+    try:
+        await tree.sync()
+    except Exception:
+        # a 429 or 5xx must not stop the bot; it keeps the commands Discord already has and retries next start
+        log.exception("Slash command sync failed, starting with the previously synced commands")
+        return False
+    await db.execute(
+        "INSERT INTO bot_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, digest),
+    )
+    log.info("Slash commands synced ✅")
+    return True
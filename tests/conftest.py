@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from migrations import migrate
+from benchmarks.fake_discord import BenchBot, FakeHTTP, FakeGuild
+import giveaway_archive
+import moderation
+
+
+@pytest.fixture(autouse=True)
+def fresh_module_caches():
+    # module-level caches keyed by giveaway or guild id; every test gets a new database and guild
+    giveaway_archive._archives.clear()
+    giveaway_archive._live_until.clear()
+    moderation.muted_role_ids.clear()
+
+
+@pytest.fixture
+def run():
+    """Drive a coroutine to completion on one loop per test (no pytest-asyncio needed)"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def db(tmp_path, run):
+    database = Database(str(tmp_path / "test.db"), readers=1)
+    run(database.connect())
+    run(migrate(database))
+    yield database
+    run(database.close())
+
+
+@pytest.fixture
+def http():
+    return FakeHTTP(latency_ms=0, jitter_ms=0)
+
+
+@pytest.fixture
+def bot(db, http):
+    return BenchBot(db, http)
+
+
+@pytest.fixture
+def guild(bot, http):
+    guild = FakeGuild(http, member_count=5)
+    bot.add_guild(guild)
+    return guild
+
+
+@pytest.fixture
+def new_giveaway(db, run):
+    """Insert a giveaway row (plus entries) directly; returns its id"""
+    def create(end_time: int = None, entrants=(), winners: int = 1):
+        cur = run(db.execute(
+            "INSERT INTO giveaways (channel_id, message_id, guild_id, host_id, title, winners, end_time) "
+            "VALUES (1, (SELECT COALESCE(MAX(message_id), 0) + 1 FROM giveaways), 1, 1, 'Test', ?, ?)",
+            (winners, int(time.time()) + 3600 if end_time is None else end_time),
+        ))
+        giveaway_id = cur.lastrowid
+        run(db.executemany(
+            "INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)", [(giveaway_id, u) for u in entrants]
+        ))
+        return giveaway_id
+    return create
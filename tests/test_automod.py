@@ -0,0 +1,63 @@
+import automod
+from automod import MemberWindow, SpamTracker, FLOOD, DUPLICATE, MENTIONS
+
+
+def test_flood_needs_every_message_inside_the_window():
+    window = MemberWindow()
+    for i in range(automod.FLOOD_MESSAGES - 1):
+        assert window.add(i * 0.1, None, 0) is None
+    assert window.add(1.0, None, 0) == FLOOD
+
+    slow = MemberWindow()
+    step = automod.FLOOD_SECONDS / (automod.FLOOD_MESSAGES - 1) + 0.5
+    assert all(slow.add(i * step, None, 0) is None for i in range(automod.FLOOD_MESSAGES * 2))
+
+
+def test_duplicates_ignore_case_and_whitespace_and_expire():
+    window = MemberWindow()
+    texts = ["Buy now", "buy   NOW", " buy now "]
+    now = 0.0
+    for text in texts[:-1]:
+        assert window.add(now, automod.content_key(text), 0) is None
+        now += automod.FLOOD_SECONDS   # slow enough not to count as a flood
+    assert window.add(now, automod.content_key(texts[-1]), 0) == DUPLICATE
+
+    stale = MemberWindow()
+    for i in range(automod.DUPLICATE_MESSAGES):
+        assert stale.add(i * (automod.DUPLICATE_SECONDS + 1), automod.content_key("same"), 0) is None
+    assert stale.hash_counts == {automod.content_key("same"): 1}
+
+
+def test_history_is_bounded():
+    window = MemberWindow()
+    for i in range(automod.HISTORY * 3):
+        window.add(i * automod.FLOOD_SECONDS, automod.content_key(f"message {i}"), 1 if i % 2 else 0)
+    assert len(window.hashes) <= automod.HISTORY and len(window.hash_counts) <= automod.HISTORY
+    assert len(window.mentions) <= automod.HISTORY
+    assert window.mention_total == sum(count for _, count in window.mentions)
+
+
+def test_mentions_add_up_across_messages():
+    window = MemberWindow()
+    half = automod.MENTION_LIMIT // 2
+    assert window.add(0.0, None, half) is None
+    assert window.add(automod.MENTION_SECONDS + 1, None, half) is None   # the first one aged out
+    assert window.add(automod.MENTION_SECONDS + 2, None, automod.MENTION_LIMIT - half) == MENTIONS
+
+
+def test_empty_messages_have_no_content_key():
+    assert automod.content_key("   ") is None
+
+
+def test_tracker_acts_once_per_burst_and_is_bounded():
+    tracker = SpamTracker(max_members=2)
+    assert tracker.check(1, 10, "", mentions=automod.MENTION_LIMIT, now=0.0) == MENTIONS
+    assert tracker.check(1, 10, "", mentions=1, now=0.1) is None   # the detection cleared the window
+
+    for user_id in (11, 12, 13):
+        tracker.check(1, user_id, "hi", now=0.0)
+    assert len(tracker) == 2 and (1, 11) not in tracker._windows
+
+    tracker.check(2, 10, "hi", now=0.0)
+    tracker.forget(1)
+    assert list(tracker._windows) == [(2, 10)]
@@ -0,0 +1,43 @@
+import compaction
+from compaction import Compactor, compact_offline
+from database import Database
+from migrations import migrate
+
+
+def test_live_bot_never_runs_the_full_vacuum(db, run, monkeypatch):
+    monkeypatch.setattr(compaction, "CONVERT_VACUUM", False)
+    statements = []
+    executescript = db.executescript
+
+    async def record(sql):
+        statements.append(sql)
+        return await executescript(sql)
+    monkeypatch.setattr(db, "executescript", record)
+
+    compactor = Compactor(db)
+    assert run(compactor.vacuum()) == 0
+    assert run(compactor.vacuum()) == 0
+    assert not any("VACUUM;" in sql for sql in statements)
+    assert run(db.fetchval("PRAGMA auto_vacuum")) != 2
+
+
+def test_offline_compaction_converts_to_incremental(tmp_path, run):
+    path = str(tmp_path / "offline.db")
+
+    async def create():
+        db = Database(path, readers=0)
+        await db.connect()
+        await migrate(db)
+        await db.close()
+    run(create())
+
+    run(compact_offline(path))
+
+    async def mode():
+        db = Database(path, readers=0)
+        await db.connect()
+        try:
+            return await db.fetchval("PRAGMA auto_vacuum")
+        finally:
+            await db.close()
+    assert run(mode()) == 2
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import sqlite3
+import contextlib
+
+import pytest
+
+import tracing
+from database import Database
+
+
+def test_slow_query_plans_are_tracked_until_done(db, run, monkeypatch, caplog):
+    monkeypatch.setattr(tracing, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(tracing, "should_explain", lambda fp: True)
+
+    async def query():
+        await db.fetchall("SELECT id FROM giveaways WHERE guild_id=?", (1,))
+        tasks = set(db._plan_tasks)
+        assert tasks   # held, so the plan can't be collected mid-run
+        for task in tasks:
+            await task
+        return tasks
+
+    with caplog.at_level(logging.WARNING, logger="database"):
+        tasks = run(query())
+    assert not db._plan_tasks
+    assert all(task.exception() is None for task in tasks)
+    assert "Slow query" in caplog.text and "giveaways" in caplog.text
+
+
+def test_close_cancels_pending_plans(db, run, monkeypatch):
+    monkeypatch.setattr(tracing, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(tracing, "should_explain", lambda fp: True)
+
+    async def query_then_close():
+        await db.fetchall("SELECT id FROM giveaways WHERE guild_id=?", (1,))
+        tasks = set(db._plan_tasks)
+        await db.close()
+        return tasks
+
+    tasks = run(query_then_close())
+    assert tasks and all(task.done() for task in tasks)
+    assert not db._plan_tasks
+
+
+def test_reads_without_a_pool_never_see_an_open_transaction(tmp_path, run):
+    db = Database(str(tmp_path / "no-readers.db"), readers=0)
+
+    async def main():
+        await db.connect()
+        await db.execute("CREATE TABLE t (x INTEGER)")
+        in_transaction = asyncio.Event()
+        seen = []
+
+        async def rolled_back():
+            with contextlib.suppress(RuntimeError):
+                async with db.transaction() as conn:
+                    await conn.execute("INSERT INTO t VALUES (1)")
+                    in_transaction.set()
+                    await asyncio.sleep(0.01)
+                    raise RuntimeError("abort")
+
+        async def read():
+            await in_transaction.wait()
+            seen.append(await db.fetchall("SELECT x FROM t"))
+
+        await asyncio.gather(rolled_back(), read())
+        await db.close()
+        return seen
+
+    assert run(main()) == [[]]
+
+
+def test_readers_are_pooled_and_read_only(db, run):
+    async def main():
+        async with db.reader() as first:
+            assert db._readers.empty()   # readers=1: the only one is lent out
+            with pytest.raises(sqlite3.OperationalError):
+                await first.execute("INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (1, 1)")
+        assert db._readers.qsize() == 1
+
+    run(main())
+
+
+def test_snapshot_sees_one_version_of_the_data(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=[10])
+
+    async def main():
+        async with db.snapshot() as conn:
+            async with conn.execute("SELECT COUNT(*) FROM giveaway_entries") as cur:
+                before = (await cur.fetchone())[0]
+            await db.execute("INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, 11)", (giveaway_id,))
+            async with conn.execute("SELECT COUNT(*) FROM giveaway_entries") as cur:
+                during = (await cur.fetchone())[0]
+        return before, during, await db.fetchval("SELECT COUNT(*) FROM giveaway_entries")
+
+    assert run(main()) == (1, 1, 2)
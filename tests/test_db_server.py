@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import db_server
+from db_server import DatabaseServer, RemoteDatabase, RemoteDatabaseError
+
+
+def test_blobs_travel_as_base64_and_rows_come_back_as_tuples():
+    row = (1, "text", None, 2.5, b"\x00\xffblob")
+    wire = db_server._encode([row])
+    assert wire[0][4] == {"$b": "AP9ibG9i"}
+    assert db_server._decode(wire) == (row,)
+
+
+def test_frames_are_length_prefixed_and_bounded(run, monkeypatch):
+    class Sink:
+        data = b""
+
+        def write(self, data):
+            self.data += data
+
+    sink = Sink()
+    db_server._write_frame(sink, {"op": "fetchone", "sql": "SELECT 1"})
+
+    async def read(data):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        return await db_server._read_frame(reader)
+
+    assert run(read(sink.data)) == {"op": "fetchone", "sql": "SELECT 1"}
+    monkeypatch.setattr(db_server, "MAX_FRAME", 8)
+    with pytest.raises(ConnectionError):
+        run(read(sink.data))
+
+
+def test_errors_map_back_to_sqlite_exceptions():
+    with pytest.raises(sqlite3.IntegrityError, match="UNIQUE"):
+        db_server._raise_for({"error": "IntegrityError", "message": "UNIQUE constraint failed"})
+    with pytest.raises(RemoteDatabaseError):
+        db_server._raise_for({"error": "os", "message": "not an exception type"})
+
+
+@pytest.fixture
+def remote(db, run):
+    server = DatabaseServer(db, port=0, token="secret")
+    run(server.start())
+    client = RemoteDatabase(f"tcp://127.0.0.1:{server.port}", pool=2, token="secret")
+    run(client.connect())
+    run(client.executescript("CREATE TABLE blobs (k INTEGER PRIMARY KEY, v BLOB)"))
+    yield client
+    run(client.close())
+    run(server.stop())
+
+
+def test_remote_round_trip(remote, run):
+    cur = run(remote.execute("INSERT INTO blobs (v) VALUES (?)", (b"\x01\x02",)))
+    assert cur.lastrowid == 1 and cur.rowcount == 1
+    run(remote.executemany("INSERT INTO blobs (v) VALUES (?)", [(b"\x03",), (None,)]))
+    assert run(remote.fetchall("SELECT k, v FROM blobs ORDER BY k")) == [(1, b"\x01\x02"), (2, b"\x03"), (3, None)]
+    assert run(remote.fetchone("SELECT v FROM blobs WHERE k = 99")) is None
+
+
+def test_remote_transaction_returns_rows_and_rolls_back(remote, run):
+    async def returning():
+        async with remote.transaction() as conn:
+            async with conn.execute("INSERT INTO blobs (v) VALUES (?) RETURNING k", (b"x",)) as cur:
+                return await cur.fetchone()
+
+    async def failing():
+        async with remote.transaction() as conn:
+            await conn.execute("INSERT INTO blobs (v) VALUES (?)", (b"y",))
+            raise RuntimeError("boom")
+
+    assert run(returning()) == (1,)
+    with pytest.raises(RuntimeError):
+        run(failing())
+    assert run(remote.fetchall("SELECT v FROM blobs")) == [(b"x",)]
+    with pytest.raises(sqlite3.IntegrityError):
+        run(remote.execute("INSERT INTO blobs (k, v) VALUES (1, NULL)"))
+
+
+def test_bad_token_is_refused(remote, run):
+    client = RemoteDatabase(f"tcp://127.0.0.1:{remote.port}", token="wrong")
+    with pytest.raises(RemoteDatabaseError, match="bad token"):
+        run(client.connect())
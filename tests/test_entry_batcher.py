@@ -0,0 +1,46 @@
+import pytest
+
+from entry_batcher import EntryBatcher
+
+
+def entrants(db, run, giveaway_id):
+    return {row[0] for row in run(db.fetchall("SELECT user_id FROM giveaway_entries WHERE giveaway_id=?", (giveaway_id,)))}
+
+
+def test_clicks_coalesce_into_one_flush(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=[10])
+    batcher = EntryBatcher(db)
+    assert run(batcher.toggle(giveaway_id, 11)) is True
+    assert run(batcher.toggle(giveaway_id, 10)) is False
+    assert run(batcher.toggle(giveaway_id, 12)) is True
+    assert run(batcher.toggle(giveaway_id, 12)) is False   # back to what the DB has
+    assert batcher.pending == 2 and entrants(db, run, giveaway_id) == {10}
+
+    run(batcher.flush())
+    assert batcher.pending == 0
+    assert entrants(db, run, giveaway_id) == {11} == run(batcher.members(giveaway_id))
+
+
+def test_write_through_mode(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=[10])
+    batcher = EntryBatcher(db, flush_interval=0)
+    assert run(batcher.toggle(giveaway_id, 10)) is False
+    assert run(batcher.toggle(giveaway_id, 11)) is True
+    assert batcher.pending == 0 and entrants(db, run, giveaway_id) == {11}
+
+
+def test_failed_flush_requeues_untouched_changes(db, run, new_giveaway, monkeypatch):
+    giveaway_id = new_giveaway()
+    batcher = EntryBatcher(db)
+    run(batcher.toggle(giveaway_id, 10))
+
+    def broken():
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db, "transaction", broken)
+    with pytest.raises(RuntimeError):
+        run(batcher.flush())
+    monkeypatch.undo()
+
+    assert batcher.pending == 1
+    run(batcher.flush())
+    assert entrants(db, run, giveaway_id) == {10}
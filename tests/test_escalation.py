@@ -0,0 +1,36 @@
+from escalation import EscalationPolicy, EscalationPolicies, DEFAULT_STEPS
+
+
+def test_exact_thresholds_and_the_top_step_repeating():
+    policy = EscalationPolicy(DEFAULT_STEPS)
+    assert policy.action_for(1) is None
+    assert policy.action_for(3) == ("mute", 7200)
+    assert policy.action_for(5) == policy.action_for(9) == ("ban", None)
+
+
+def test_none_steps_are_dropped():
+    policy = EscalationPolicy({2: ("mute", 60), 4: ("none", None)})
+    assert policy.steps == {2: ("mute", 60)}
+    assert policy.action_for(4) == ("mute", 60)   # past the highest real step
+    assert EscalationPolicy({}).action_for(10) is None
+
+
+def test_first_edit_starts_from_the_defaults(db, run):
+    policies = EscalationPolicies(db)
+    assert not run(policies.get(1)).custom
+
+    run(policies.set_step(1, 3, "kick"))
+    policy = run(policies.get(1))
+    assert policy.custom
+    assert policy.steps == {**DEFAULT_STEPS, 3: ("kick", None)}
+    assert not run(policies.get(2)).custom   # other guilds keep the defaults
+
+
+def test_removing_every_step_leaves_an_empty_ladder(db, run):
+    policies = EscalationPolicies(db)
+    for threshold in DEFAULT_STEPS:
+        run(policies.remove_step(1, threshold))
+    assert run(policies.get(1)).steps == {}
+
+    run(policies.reset(1))
+    assert run(policies.get(1)).steps == DEFAULT_STEPS
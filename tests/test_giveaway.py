@@ -0,0 +1,109 @@
+import time
+
+import discord
+import pytest
+
+import cogs.giveaway_cog as giveaway_cog
+from benchmarks.fake_discord import FakeInteraction, _FakeResponse
+
+
+@pytest.fixture
+def cog(bot, db):
+    return giveaway_cog.GiveawayCog(bot, db)
+
+
+@pytest.fixture
+def giveaway(cog, db, guild, run):
+    """An ended-but-unprocessed giveaway with every guild member entered"""
+    channel = guild.channels[-1]
+    run(cog.giveaway_start.callback(cog, FakeInteraction(cog.bot, guild, channel, guild.moderator), "Test", 2, "1h"))
+    giveaway_id = run(db.fetchval("SELECT MAX(id) FROM giveaways"))
+    run(db.executemany(
+        "INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)", [(giveaway_id, m.id) for m in guild.members]
+    ))
+    run(db.execute("UPDATE giveaways SET end_time = ? WHERE id = ?", (int(time.time()) - 1, giveaway_id)))
+    return giveaway_id
+
+
+def winners(db, run, giveaway_id):
+    return sorted(row[0] for row in run(db.fetchall("SELECT user_id FROM giveaway_winners WHERE giveaway_id = ?", (giveaway_id,))))
+
+
+def test_failed_announcement_is_retried_with_the_same_winners(cog, db, guild, giveaway, run, monkeypatch):
+    channel = guild.channels[-1]
+    posted = []
+    send = type(channel).send
+
+    async def flaky_send(self, *args, **kwargs):
+        if not posted:
+            posted.append(None)
+            raise discord.HTTPException(_FakeResponse(503), "Service Unavailable")
+        posted.append(kwargs.get("embed"))
+        return await send(self, *args, **kwargs)
+    monkeypatch.setattr(type(channel), "send", flaky_send)
+
+    run(cog._end_due_giveaways([giveaway]))
+    drawn = winners(db, run, giveaway)
+    assert len(drawn) == 2
+    assert run(db.fetchval("SELECT announced FROM giveaways WHERE id = ?", (giveaway,))) == 0
+    assert [row[0] for row in run(cog._load_due_giveaways(int(time.time())))] == [giveaway]
+
+    run(cog._end_due_giveaways([giveaway]))
+    assert winners(db, run, giveaway) == drawn
+    assert run(db.fetchval("SELECT announced FROM giveaways WHERE id = ?", (giveaway,))) == 1
+    assert posted[-1].fields[-1].value == ", ".join(f"<@{uid}>" for uid in drawn)
+    assert run(cog._load_due_giveaways(int(time.time()))) == []
+
+
+def test_deleted_giveaway_message_still_announces(cog, db, guild, giveaway, run, monkeypatch):
+    channel = guild.channels[-1]
+    message = channel.get_partial_message(1)
+
+    async def deleted(**kwargs):
+        raise discord.NotFound(_FakeResponse(404), "Unknown Message")
+    monkeypatch.setattr(message, "edit", deleted)
+    monkeypatch.setattr(channel, "get_partial_message", lambda message_id: message)
+    sent = []
+    send = channel.send
+
+    async def record(*args, **kwargs):
+        sent.append(kwargs.get("embed"))
+        return await send(*args, **kwargs)
+    monkeypatch.setattr(channel, "send", record)
+
+    run(cog._end_due_giveaways([giveaway]))
+    assert sent and sent[-1].title == "🏁 Giveaway Ended: Test"
+    assert run(db.fetchval("SELECT announced FROM giveaways WHERE id = ?", (giveaway,))) == 1
+
+
+def test_reroll_is_refused_until_the_giveaway_ends(cog, db, guild, giveaway, run):
+    channel = guild.channels[-1]
+    message_id = run(db.fetchval("SELECT message_id FROM giveaways WHERE id = ?", (giveaway,)))
+    for _ in range(len(guild.members)):
+        interaction = FakeInteraction(cog.bot, guild, channel, guild.moderator)
+        run(cog.giveaway_reroll.callback(cog, interaction, str(message_id)))
+        assert interaction.response.sent == ["❌ This giveaway hasn't ended yet."]
+    assert winners(db, run, giveaway) == []
+
+    run(cog._end_due_giveaways([giveaway]))
+    assert len(winners(db, run, giveaway)) == 2
+
+    interaction = FakeInteraction(cog.bot, guild, channel, guild.moderator)
+    run(cog.giveaway_reroll.callback(cog, interaction, str(message_id)))
+    assert interaction.response.sent[0].startswith("🔁 Rerolled!")
+    assert len(winners(db, run, giveaway)) == 4
+
+
+def test_failed_announcement_doesnt_unschedule_the_end(cog, db, guild, run, monkeypatch):
+    run(cog.endings._reload())
+    channel = guild.channels[-1]
+
+    async def too_long(self, *args, **kwargs):
+        raise discord.HTTPException(_FakeResponse(400), "Must be 2000 or fewer in length.")
+    monkeypatch.setattr(type(channel), "send", too_long)
+
+    interaction = FakeInteraction(cog.bot, guild, channel, guild.moderator)
+    with pytest.raises(discord.HTTPException):
+        run(cog.giveaway_start.callback(cog, interaction, "Test", 1, "10m", announcement="x" * 2001))
+    giveaway_id = run(db.fetchval("SELECT MAX(id) FROM giveaways"))
+    assert giveaway_id in cog.endings._deadlines
@@ -0,0 +1,58 @@
+import time
+
+import giveaway_archive
+from giveaway_archive import archive_giveaway, archived, entrant_count, entrant_page, is_entrant, pack, unpack
+
+
+def archive(db, run, giveaway_id: int):
+    async def fold():
+        async with db.transaction() as conn:
+            await archive_giveaway(conn, giveaway_id)
+    run(fold())
+
+
+def count_queries(db, monkeypatch) -> list:
+    queries = []
+    fetchone = db.fetchone
+
+    async def counted(sql, params=()):
+        queries.append(sql)
+        return await fetchone(sql, params)
+    monkeypatch.setattr(db, "fetchone", counted)
+    return queries
+
+
+def test_pack_round_trips_sorted():
+    assert unpack(pack([30, 10, 2**63, 20])).tolist() == [10, 20, 30, 2**63]
+
+
+def test_live_giveaway_is_looked_up_once(db, run, new_giveaway, monkeypatch):
+    giveaway_id = new_giveaway(entrants=[1, 2, 3])
+    queries = count_queries(db, monkeypatch)
+    for _ in range(5):
+        assert run(archived(db, giveaway_id)) is None
+    assert len(queries) == 1
+
+
+def test_readers_answer_the_same_before_and_after_archiving(db, run, new_giveaway):
+    giveaway_id = new_giveaway(int(time.time()) - 2 * giveaway_archive.ARCHIVE_AFTER, entrants=range(1, 8))
+
+    def snapshot():
+        return (
+            run(entrant_count(db, giveaway_id)),
+            run(is_entrant(db, giveaway_id, 4)),
+            run(is_entrant(db, giveaway_id, 99)),
+            run(entrant_page(db, giveaway_id, 3, after=2)),
+            run(entrant_page(db, giveaway_id, 3, before=6)),
+        )
+    live = snapshot()
+    archive(db, run, giveaway_id)
+    assert snapshot() == live == (7, True, False, [3, 4, 5], [3, 4, 5])
+
+
+def test_archived_giveaway_found_once_archivable(db, run, new_giveaway):
+    giveaway_id = new_giveaway(int(time.time()) - 2 * giveaway_archive.ARCHIVE_AFTER, entrants=[5, 6])
+    assert run(archived(db, giveaway_id)) is None
+    archive(db, run, giveaway_id)
+    # past end_time + ARCHIVE_AFTER the negative answer isn't trusted, so the new archive is seen
+    assert run(archived(db, giveaway_id)).tolist() == [5, 6]
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+import pytest
+
+import moderation
+from giveaway_requirements import Requirements, EligibilityCache
+
+DAY = 86400
+
+
+def muted(guild):
+    return discord.utils.get(guild.roles, name="Muted")
+
+
+def test_json_round_trip_drops_unset_rules():
+    rules = Requirements(role_id=42, min_tenure=7 * DAY)
+    restored = Requirements.from_json(rules.to_json())
+    assert (restored.role_id, restored.min_tenure, restored.min_account_age, restored.not_muted) == (42, 7 * DAY, None, False)
+    assert Requirements().to_json() is None
+    assert not Requirements.from_json(None)
+
+
+def test_describe_uses_the_shared_formatter():
+    rules = Requirements(role_id=42, min_tenure=2 * DAY, min_account_age=90, not_muted=True)
+    assert rules.describe() == ["Role <@&42>", "In the server for 2d", "Account older than 90s", "Not muted"]
+
+
+def test_role_rule(guild):
+    member = guild.members[0]
+    check = Requirements(role_id=guild.mod_role.id).compile()
+    assert check(member, time.time())[0] == f"you need the <@&{guild.mod_role.id}> role"
+    assert check(guild.moderator, time.time()) == (None, None)
+
+
+def test_time_rules_report_when_they_pass(guild):
+    member = guild.members[0]
+    now = time.time()
+    member.joined_at = datetime.fromtimestamp(now - DAY, timezone.utc)
+    member.created_at = datetime.fromtimestamp(now - 30 * DAY, timezone.utc)
+
+    reason, recheck_at = Requirements(min_tenure=3 * DAY).compile()(member, now)
+    assert "3d" in reason and recheck_at == pytest.approx(now + 2 * DAY)
+    assert Requirements(min_account_age=7 * DAY).compile()(member, now) == (None, None)
+
+    member.joined_at = None
+    assert Requirements(min_tenure=DAY).compile()(member, now) == ("your server join date is unknown", None)
+
+
+def test_not_muted_checks_role_and_timeout(guild):
+    member = guild.members[0]
+    check = Requirements(not_muted=True).compile()
+    assert check(member, time.time()) == (None, None)
+
+    member.roles.append(muted(guild))
+    assert check(member, time.time())[0] == "muted members can't enter"
+
+    member.roles.clear()
+    member.timed_out_until = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert check(member, time.time())[0] == "muted members can't enter"
+
+
+def test_not_muted_goes_by_the_cached_role_id(guild):
+    role = muted(guild)
+    check = Requirements(not_muted=True).compile()
+    member = guild.members[0]
+    member.roles.append(role)
+    check(member, time.time())
+    assert moderation.muted_role_ids[guild.id] == role.id
+
+    role.name = "Silenced"   # renamed Muted role (ModCog's role events keep the id when the name still matches)
+    assert check(member, time.time())[0] == "muted members can't enter"
+
+
+def test_cache_memoises_gateway_members_only(guild):
+    cache = EligibilityCache()
+    cache.register(1, Requirements(role_id=guild.mod_role.id))
+    member = guild.members[0]
+    assert cache.check(1, member) is not None
+
+    member.roles.append(guild.mod_role)
+    assert cache.check(1, member) is not None   # memoised until on_member_update invalidates it
+    cache.invalidate_member(member.id)
+    assert cache.check(1, member) is None
+    assert cache.check(2, member) is None       # no rules registered
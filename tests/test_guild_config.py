@@ -0,0 +1,28 @@
+import pytest
+
+from guild_config import GuildConfigStore, DEFAULT_PREFIX, DEFAULT_ALLOWED_ROLES
+
+
+def test_overrides_round_trip_and_notify(db, run):
+    seen = []
+    store = GuildConfigStore(db, notify=lambda guild_id, config: seen.append((guild_id, config.prefix)))
+    assert run(store.get(1)).prefix == DEFAULT_PREFIX
+
+    run(store.set(1, "prefix", "!"))
+    run(store.set(1, "allowed_roles", {30, 20}))
+    run(store.set(1, "automod", False))
+    assert seen == [(1, "!"), (1, "!"), (1, "!")]
+
+    fresh = run(GuildConfigStore(db).get(1))
+    assert (fresh.prefix, fresh.allowed_roles, fresh.automod) == ("!", frozenset({20, 30}), False)
+    assert run(store.set(1, "prefix", None)).prefix == DEFAULT_PREFIX
+    assert run(store.get(2)).allowed_roles == DEFAULT_ALLOWED_ROLES
+
+
+def test_unknown_and_bad_settings(db, run):
+    store = GuildConfigStore(db)
+    with pytest.raises(KeyError):
+        run(store.set(1, "colour", "red"))
+    run(db.execute("INSERT INTO guild_settings (guild_id, key, value) VALUES (1, 'log_channel_id', 'nope')"))
+    run(db.execute("INSERT INTO guild_settings (guild_id, key, value) VALUES (1, 'retired', 'x')"))
+    assert run(store.get(1)).log_channel_id == GuildConfigStore(db).cached(1).log_channel_id
@@ -0,0 +1,42 @@
+import asyncio
+
+import discord
+
+from benchmarks.fake_discord import FakeInteraction, FakeMessage
+from cogs.giveaway_cog import GiveawayCog, JoinGiveawayButton
+
+
+def sent_message(channel, giveaway_id: int):
+    """The giveaway message as a gateway event delivers it: components, no View object behind them"""
+    message = FakeMessage(channel.http, channel)
+    message.flags = discord.MessageFlags()
+    message.components = [discord.ActionRow(row) for row in JoinGiveawayButton.view(giveaway_id, count=3).to_components()]
+    return message
+
+
+def test_join_button_routes_after_a_restart(bot, db, guild, run, new_giveaway):
+    giveaway_id = new_giveaway()
+    channel = guild.channels[-1]
+    member = guild.members[0]
+    interaction = FakeInteraction(bot, guild, channel, member, message=sent_message(channel, giveaway_id))
+    interaction.data = {"component_type": discord.ComponentType.button.value, "custom_id": f"join_{giveaway_id}"}
+
+    async def click_on_a_fresh_process():
+        await bot.add_cog(GiveawayCog(bot, db))   # registers the dynamic item; nothing else knows the message
+        try:
+            bot._connection._view_store.dispatch_view(discord.ComponentType.button.value, f"join_{giveaway_id}", interaction)
+            while not interaction.response.sent:
+                await asyncio.sleep(0.01)
+            return await bot.get_cog("GiveawayCog").entries.members(giveaway_id)
+        finally:
+            await bot.remove_cog("GiveawayCog")
+
+    members = run(asyncio.wait_for(click_on_a_fresh_process(), timeout=5))
+    assert interaction.response.sent == ["🎉 You have successfully entered the **Test** giveaway!"]
+    assert member.id in members
+
+
+def test_button_carries_the_giveaway_id_and_count():
+    (button,) = JoinGiveawayButton.view(42, count=7, disabled=True).children
+    assert button.custom_id == "join_42"
+    assert button.item.label == "🎉 Join Giveaway (7)" and button.item.disabled
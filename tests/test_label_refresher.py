@@ -0,0 +1,56 @@
+import asyncio
+
+from label_refresher import LabelRefresher
+
+
+class Message:
+    def __init__(self, message_id: int = 1):
+        self.id = message_id
+        self.edits = []
+
+    async def edit(self, view=None):
+        self.edits.append(view)
+
+
+def test_bursts_collapse_and_the_last_edit_shows_the_final_state(run):
+    refresher = LabelRefresher(interval=0.05)
+    message = Message()
+    count = 0
+
+    async def render():
+        return count
+
+    async def clicks():
+        nonlocal count
+        for _ in range(5):
+            count += 1
+            refresher.request(message, render)
+        await asyncio.sleep(0.01)   # first edit goes out right away
+        for _ in range(5):
+            count += 1
+            refresher.request(message, render)
+            await asyncio.sleep(0.001)
+        while refresher._tasks:
+            await asyncio.sleep(0.01)
+
+    run(clicks())
+    assert message.edits == [5, 10]
+
+
+def test_cancel_drops_the_queued_edit(run):
+    refresher = LabelRefresher(interval=0.05)
+    message = Message()
+
+    async def render():
+        return "view"
+
+    async def end_during_a_burst():
+        refresher.request(message, render)
+        await asyncio.sleep(0.01)
+        refresher.request(message, render)   # waits out the interval
+        refresher.cancel(message.id)         # the giveaway ended: its final view goes out elsewhere
+        await asyncio.sleep(0.1)
+
+    run(end_during_a_burst())
+    assert message.edits == ["view"]
+    assert refresher.pending == 0 and not refresher._tasks
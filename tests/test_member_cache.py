@@ -0,0 +1,98 @@
+import discord
+from discord.ext import commands
+
+import member_cache
+from benchmarks.fake_discord import FakeContext, FakeGuild, FakeMember
+from cogs.mod import ModCog
+
+
+class UncachedGuild(FakeGuild):
+    """A guild in the low-memory profile: discord.py caches nobody but the bot"""
+
+    def get_member(self, member_id: int):
+        return self.me if member_id == self.me.id else None
+
+
+def stale_copy(member):
+    """What the LRU holds after an event: a snapshot the bot's own role edits never touch"""
+    return FakeMember(member.http, member.guild, member_id=member.id, roles=[])
+
+
+def muted(guild):
+    return discord.utils.get(guild.roles, name="Muted")
+
+
+def test_lru_is_bounded_and_ages_out(bot, http, monkeypatch):
+    guild = UncachedGuild(http, member_count=3)
+    lru = member_cache.MemberLRU(bot, max_members=2, ttl=60)
+    for member in guild.members:
+        lru.put(member)
+    assert len(lru) == 2
+    assert lru.get(guild, guild.members[0].id) is None   # least recently used went first
+    assert lru.get(guild, guild.members[2].id) is guild.members[2]
+
+    now = member_cache.time.monotonic()
+    monkeypatch.setattr(member_cache.time, "monotonic", lambda: now + 61)
+    assert lru.get(guild, guild.members[2].id) is None
+
+
+def test_put_skips_members_discord_py_caches(bot, guild):
+    bot.member_cache.put(guild.members[0])
+    assert len(bot.member_cache) == 0
+
+
+def test_fetch_never_answers_from_the_lru(bot, http, run):
+    guild = UncachedGuild(http, member_count=1)
+    current = guild.members[0]
+    bot.member_cache.put(stale_copy(current))
+    assert run(bot.member_cache.fetch(guild, current.id)) is current
+    assert http.calls["GET /members"] == 1
+
+
+def test_lift_mute_removes_role_despite_stale_copy(bot, db, http, run):
+    guild = UncachedGuild(http, member_count=1)
+    bot.add_guild(guild)
+    cog = ModCog(bot, db)
+    current = guild.members[0]
+    current.roles.append(muted(guild))
+    bot.member_cache.put(stale_copy(current))
+
+    run(cog._lift_punishment(guild.id, current.id, "mute", None))
+    assert muted(guild) not in current.roles
+
+
+def test_unmute_reads_current_roles(bot, db, http, run):
+    guild = UncachedGuild(http, member_count=1)
+    bot.add_guild(guild)
+    cog = ModCog(bot, db)
+    current = guild.members[0]
+    current.roles.append(muted(guild))
+
+    run(cog.unmute.callback(cog, FakeContext(bot, guild, guild.moderator), stale_copy(current)))
+    assert muted(guild) not in current.roles
+
+
+def test_role_edits_drop_the_lru_copy(bot, db, http, run):
+    guild = UncachedGuild(http, member_count=1)
+    cog = ModCog(bot, db)
+    copy = stale_copy(guild.members[0])
+    bot.member_cache.put(copy)
+
+    run(cog._add_role(copy, muted(guild), "test"))
+    assert bot.member_cache.get(guild, copy.id) is None
+
+
+def test_converter_uses_lru_for_bare_ids_only(bot, http, run, monkeypatch):
+    guild = UncachedGuild(http, member_count=1)
+    cached = stale_copy(guild.members[0])
+    fresh = guild.members[0]
+    bot.member_cache.put(cached)
+
+    async def from_message(self, ctx, argument):
+        return fresh
+    monkeypatch.setattr(commands.MemberConverter, "convert", from_message)
+
+    ctx = FakeContext(bot, guild, guild.moderator)
+    converter = member_cache.LRUMemberConverter()
+    assert run(converter.convert(ctx, str(fresh.id))) is cached
+    assert run(converter.convert(ctx, f"<@{fresh.id}>")) is fresh
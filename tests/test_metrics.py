@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import metrics
+from metrics import Registry
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.counter("test_total", "Things", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('q"uote')
+    gauge = registry.gauge("test_depth", "Depth")
+    gauge.track((), lambda: 7)
+    histogram = registry.histogram("test_seconds", "Time", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_total counter" in lines
+    assert 'test_total{kind="a"} 3' in lines
+    assert 'test_total{kind="q\\"uote"} 1' in lines
+    assert "test_depth 7" in lines
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 2' in lines
+    assert "test_seconds_count 2" in lines
+
+
+def test_failing_gauge_callback_is_skipped():
+    registry = Registry()
+    gauge = registry.gauge("test_broken", "Broken")
+    gauge.track(("x",), lambda: 1 / 0)
+    assert registry.render().splitlines()[-1] == "# TYPE test_broken gauge"
+
+
+def test_each_429_is_counted_once(run):
+    counter = metrics.RateLimitCounter()
+    log = logging.getLogger("test.discord.http")
+    log.addHandler(counter)
+    route, global_ = metrics.RATE_LIMITS.value("route"), metrics.RATE_LIMITS.value("global")
+
+    async def rate_limited():
+        # what discord.py's HTTPClient.request logs for a route 429, then a global one
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "GET", "/x", 1.0)
+        await asyncio.sleep(0)
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "GET", "/y", 1.0)
+        log.warning("Global rate limit has been hit. Retrying in %.2f seconds.", 1.0)
+        await asyncio.sleep(0)
+
+    try:
+        run(rate_limited())
+    finally:
+        log.removeHandler(counter)
+    assert metrics.RATE_LIMITS.value("route") - route == 1
+    assert metrics.RATE_LIMITS.value("global") - global_ == 1
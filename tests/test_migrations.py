@@ -0,0 +1,29 @@
+from database import Database
+from migrations import MIGRATIONS, SCHEMA_VERSION, migrate
+
+
+def test_versions_are_contiguous():
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, SCHEMA_VERSION + 1))
+
+
+def test_migrated_database_is_current_and_migrate_is_idempotent(db, run):
+    assert run(db.fetchval("PRAGMA user_version")) == SCHEMA_VERSION
+    run(migrate(db))
+    assert run(db.fetchval("PRAGMA user_version")) == SCHEMA_VERSION
+
+
+def test_v1_database_upgrades_with_its_data(tmp_path, run):
+    database = Database(str(tmp_path / "old.db"), readers=1)
+    run(database.connect())
+    run(database.executescript(f"BEGIN IMMEDIATE;\n{MIGRATIONS[0][2]}\nPRAGMA user_version = 1;\nCOMMIT;"))
+    run(database.execute(
+        "INSERT INTO giveaways (channel_id, message_id, guild_id, host_id, title, winners, end_time) "
+        "VALUES (1, 1, 1, 1, 'Old', 1, 0)"
+    ))
+    run(database.executemany("INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)", [(1, 10), (1, 10), (1, 11)]))
+
+    run(migrate(database))
+    assert run(database.fetchval("PRAGMA user_version")) == SCHEMA_VERSION
+    assert run(database.fetchall("SELECT user_id FROM giveaway_entries ORDER BY user_id")) == [(10,), (11,)]
+    assert run(database.fetchone("SELECT title, announced FROM giveaways")) == ("Old", 1)
+    run(database.close())
@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fake_discord import FakeContext, _FakeResponse
+from cogs.mod import ModCog
+from moderation import MUTED_ROLE_NAME
+
+
+def without_muted_role(guild):
+    guild.roles = [role for role in guild.roles if role.name != MUTED_ROLE_NAME]
+    return guild
+
+
+def muted_roles(guild):
+    return [role for role in guild.roles if role.name == MUTED_ROLE_NAME]
+
+
+def test_concurrent_automod_mutes_create_one_role(bot, db, guild, http, run):
+    without_muted_role(guild)
+    http.latency = 0.001   # every create_role round trip yields to the other mutes
+    cog = ModCog(bot, db)
+
+    async def wave():
+        await asyncio.gather(*(cog.automod_punish(m, "mute", "Automod: mass mentions", 600) for m in guild.members))
+    run(wave())
+
+    assert len(muted_roles(guild)) == 1
+    assert http.calls["POST /roles"] == 1
+    assert all(muted_roles(guild)[0] in m.roles for m in guild.members)
+
+
+def bulk_flags(**values):
+    return SimpleNamespace(**{"reason": "spam", "joined": None, "age": None, "duration": None, **values})
+
+
+def test_masswarn_escalations_share_one_muted_role(bot, db, guild, http, run):
+    without_muted_role(guild)
+    http.latency = 0.001
+    cog = ModCog(bot, db)
+    ctx = FakeContext(bot, guild, guild.moderator)
+    run(bot.config.get(guild.id))
+    run(cog.policies.set_step(guild.id, 1, "mute", 600))
+
+    run(cog.masswarn.callback(cog, ctx, guild.members, flags=bulk_flags()))
+    assert len(muted_roles(guild)) == 1
+    assert all(muted_roles(guild)[0] in m.roles for m in guild.members)
+
+
+def test_massban_counts_a_rejected_chunk_as_failed(bot, db, guild, run, monkeypatch):
+    cog = ModCog(bot, db)
+    ctx = FakeContext(bot, guild, guild.moderator)
+    sent = []
+
+    async def send(content, **kwargs):
+        sent.append(content)
+    ctx.send = send
+
+    async def nobody_banned(users, **kwargs):
+        raise discord.HTTPException(_FakeResponse(400), "Failed to ban users")
+    monkeypatch.setattr(guild, "bulk_ban", nobody_banned)
+    run(bot.config.get(guild.id))
+
+    run(cog.massban.callback(cog, ctx, guild.members, flags=bulk_flags()))
+    assert sent == [f"Banned 0 members ({len(guild.members)} failed) for the reason: spam"]
+    assert [item for item in cog.modlog._queue._queue if item[0] == "dm"] == []   # only banned members get one
+
+
+def test_masswarn_writes_escalations_together_and_reports_failures(bot, db, guild, run, monkeypatch):
+    cog = ModCog(bot, db)
+    ctx = FakeContext(bot, guild, guild.moderator)
+    sent = []
+
+    async def send(content, **kwargs):
+        sent.append(content)
+    ctx.send = send
+    run(bot.config.get(guild.id))
+    run(cog.policies.set_step(guild.id, 1, "mute", 600))
+
+    async def forbidden(*roles, reason=None):
+        raise discord.Forbidden(_FakeResponse(403), "Missing Permissions")
+    monkeypatch.setattr(guild.members[0], "add_roles", forbidden)
+    transactions = []
+    transaction = db.transaction
+
+    def counted():
+        transactions.append(None)
+        return transaction()
+    monkeypatch.setattr(db, "transaction", counted)
+
+    run(cog.masswarn.callback(cog, ctx, guild.members, flags=bulk_flags()))
+    escalated = len(guild.members) - 1
+    assert sent == [f"Warned {len(guild.members)} members for the reason: spam\nEscalated {escalated} (1 failed)"]
+    assert len(transactions) == 2   # the warns, then every escalation's punishment
+    assert run(db.fetchval("SELECT COUNT(*) FROM punishments WHERE type = 'mute'")) == escalated
@@ -0,0 +1,38 @@
+import discord
+
+from mod_dispatch import ModLogDispatcher, pack_embeds, MAX_EMBED_CHARS_PER_MESSAGE, MAX_EMBEDS_PER_MESSAGE
+
+
+def log_embed(reason_chars: int) -> discord.Embed:
+    embed = discord.Embed(title="Moderation Action: Warned")
+    embed.add_field(name="Reason", value="x" * reason_chars)
+    return embed
+
+
+def test_pack_embeds_respects_the_count_limit():
+    messages = pack_embeds([log_embed(10) for _ in range(25)])
+    assert [len(m) for m in messages] == [10, 10, 5]
+
+
+def test_pack_embeds_respects_the_character_limit():
+    embeds = [log_embed(1000) for _ in range(10)]
+    messages = pack_embeds(embeds)
+    assert all(sum(len(e) for e in m) <= MAX_EMBED_CHARS_PER_MESSAGE for m in messages)
+    assert all(len(m) <= MAX_EMBEDS_PER_MESSAGE for m in messages)
+    assert [e for m in messages for e in m] == embeds   # order kept, nothing dropped
+
+
+def test_long_log_batch_is_split_into_valid_messages(run):
+    class Channel:
+        id = 1
+        sent = []
+
+        async def send(self, embeds):
+            if sum(len(e) for e in embeds) > MAX_EMBED_CHARS_PER_MESSAGE:
+                raise AssertionError("Discord would reject this message")
+            self.sent.append(embeds)
+
+    channel = Channel()
+    dispatcher = ModLogDispatcher()
+    run(dispatcher._deliver([("log", channel, log_embed(900)) for _ in range(10)]))
+    assert sum(len(m) for m in channel.sent) == 10
@@ -0,0 +1,63 @@
+import asyncio
+
+import discord
+
+from benchmarks.fake_discord import FakeGuild, _FakeResponse
+from cogs import mod
+from cogs.mod import ModCog
+from moderation import MUTED_ROLE_NAME
+
+
+class Progress:
+    """A report channel that keeps every version of the progress message"""
+
+    def __init__(self):
+        self.versions = []
+
+    async def send(self, content):
+        self.versions.append(content)
+        return self
+
+    async def edit(self, content):
+        self.versions.append(content)
+
+
+def test_overwrites_report_progress_and_failures(bot, db, http, run, monkeypatch):
+    monkeypatch.setattr(mod, "PROGRESS_EVERY", 10)
+    guild = FakeGuild(http, member_count=1, channel_count=26)
+    role = discord.utils.get(guild.roles, name=MUTED_ROLE_NAME)
+    already, locked = guild.channels[1], guild.channels[2]
+    monkeypatch.setattr(already, "overwrites_for", lambda target: discord.PermissionOverwrite(send_messages=False))
+
+    async def forbidden(target, **kwargs):
+        raise discord.Forbidden(_FakeResponse(403), "Missing Access")
+    monkeypatch.setattr(locked, "set_permissions", forbidden)
+
+    progress = Progress()
+    run(ModCog(bot, db)._provision_overwrites(guild, role, progress))
+    assert progress.versions == [
+        f"🔧 Setting up the {MUTED_ROLE_NAME} role: 0/25 channels",
+        f"🔧 Setting up the {MUTED_ROLE_NAME} role: 10/25 channels",
+        f"🔧 Setting up the {MUTED_ROLE_NAME} role: 20/25 channels",
+        f"✅ {MUTED_ROLE_NAME} role set up in 24/25 channels (1 failed, check my permissions)",
+    ]
+    assert http.calls["PUT /permissions"] == 24
+
+
+def test_new_role_works_before_its_overwrites_are_done(bot, db, http, run):
+    guild = FakeGuild(http, member_count=1, channel_count=5)
+    guild.roles = [role for role in guild.roles if role.name != MUTED_ROLE_NAME]
+    http.latency = 0.001
+    cog = ModCog(bot, db)
+
+    async def mute_right_away():
+        role = await cog._ensure_muted_role(guild)
+        assert guild.id in cog._provisioning and http.calls["PUT /permissions"] == 0
+        await cog._add_role(guild.members[0], role, "test")
+        await cog._provisioning[guild.id]
+        await asyncio.sleep(0)   # the done callback runs on the next iteration
+        return role
+
+    role = run(mute_right_away())
+    assert role in guild.members[0].roles
+    assert http.calls["PUT /permissions"] == 5 and not cog._provisioning
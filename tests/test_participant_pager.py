@@ -0,0 +1,46 @@
+import pytest
+
+from benchmarks.fake_discord import FakeInteraction
+from cogs.giveaway_cog import ParticipantPager, PARTICIPANTS_PAGE_SIZE
+from giveaway_archive import archive_giveaway
+
+ENTRANTS = 2 * PARTICIPANTS_PAGE_SIZE + PARTICIPANTS_PAGE_SIZE // 2
+
+
+def mentioned(embed) -> list:
+    return [int(mention[2:-1]) for mention in embed.description.split(", ")]
+
+
+@pytest.mark.parametrize("archived", [False, True], ids=["live", "archived"])
+def test_pages_forward_and_back(bot, db, guild, run, new_giveaway, archived):
+    user_ids = list(range(1000, 1000 + ENTRANTS))
+    giveaway_id = new_giveaway(entrants=user_ids)
+    if archived:
+        async def fold():
+            async with db.transaction() as conn:
+                await archive_giveaway(conn, giveaway_id)
+        run(fold())
+
+    pager = ParticipantPager(db, giveaway_id, "Test", ENTRANTS, guild.moderator.id)
+    first = run(pager.load())
+    assert mentioned(first) == user_ids[:PARTICIPANTS_PAGE_SIZE]
+    assert pager.previous_page.disabled and not pager.next_page.disabled
+
+    interaction = FakeInteraction(bot, guild, guild.channels[0], guild.moderator)
+    run(pager.next_page.callback(interaction))
+    run(pager.next_page.callback(interaction))
+    assert mentioned(interaction.response.edits[-1]) == user_ids[2 * PARTICIPANTS_PAGE_SIZE:]
+    assert interaction.response.edits[-1].footer.text == f"Page 3/3 • {ENTRANTS} participants"
+    assert pager.next_page.disabled
+
+    run(pager.previous_page.callback(interaction))
+    assert mentioned(interaction.response.edits[-1]) == user_ids[PARTICIPANTS_PAGE_SIZE:2 * PARTICIPANTS_PAGE_SIZE]
+    run(pager.previous_page.callback(interaction))
+    assert mentioned(interaction.response.edits[-1]) == user_ids[:PARTICIPANTS_PAGE_SIZE]
+    assert pager.previous_page.disabled
+
+
+def test_only_the_invoker_can_turn_pages(bot, db, guild, run):
+    pager = ParticipantPager(db, 1, "Test", 0, guild.moderator.id)
+    assert run(pager.interaction_check(FakeInteraction(bot, guild, guild.channels[0], guild.moderator)))
+    assert not run(pager.interaction_check(FakeInteraction(bot, guild, guild.channels[0], guild.members[0])))
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from benchmarks.fake_discord import FakeInteraction, FakeMember
+from cogs.giveaway_cog import GiveawayCog
+
+
+def test_decisions_are_cached_until_roles_or_config_change(bot, guild, run):
+    run(bot.config.set(guild.id, "allowed_roles", {guild.mod_role.id}))
+    member = guild.members[0]
+    assert run(bot.perms.allows(guild.moderator)) is True
+    assert run(bot.perms.allows(member)) is False
+
+    member.roles.append(guild.mod_role)
+    assert run(bot.perms.allows(member)) is False   # memoised
+    before = SimpleNamespace(roles=[])
+    run(bot.perms.on_member_update(before, member))
+    assert run(bot.perms.allows(member)) is True
+
+    config = run(bot.config.set(guild.id, "allowed_roles", set()))
+    run(bot.perms.on_guild_config_update(guild.id, config))   # dispatched by the store's notify hook
+    assert run(bot.perms.allows(member)) is False
+    assert run(bot.perms.allows(guild.me)) is True   # Manage Server always counts
+
+
+def test_uncached_members_are_judged_afresh(bot, guild, http, run):
+    run(bot.config.set(guild.id, "allowed_roles", {guild.mod_role.id}))
+    stranger = FakeMember(http, guild)   # not in guild.get_member
+    assert run(bot.perms.allows(stranger)) is False
+    stranger.roles.append(guild.mod_role)
+    assert run(bot.perms.allows(stranger)) is True
+
+
+def test_every_giveaway_command_that_changes_state_is_for_moderators(bot, db, guild, run):
+    run(bot.config.set(guild.id, "allowed_roles", {guild.mod_role.id}))
+    cog = GiveawayCog(bot, db)
+    for command in (cog.giveaway_start, cog.giveaway_reroll, cog.giveaway_participants):
+        as_member = FakeInteraction(bot, guild, guild.channels[0], guild.members[0])
+        as_moderator = FakeInteraction(bot, guild, guild.channels[0], guild.moderator)
+        assert [run(check(as_member)) for check in command.checks] == [False], command.name
+        assert [run(check(as_moderator)) for check in command.checks] == [True], command.name
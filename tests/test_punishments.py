@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+import discord
+import pytest
+
+from benchmarks.fake_discord import FakeContext, _FakeResponse
+from cogs.mod import ModCog
+
+
+@pytest.fixture
+def cog(bot, db, guild):
+    return ModCog(bot, db)
+
+
+def muted(guild):
+    return discord.utils.get(guild.roles, name="Muted")
+
+
+def add_punishment(db, run, guild, user_id, kind, expires_at):
+    cur = run(db.execute(
+        "INSERT INTO punishments (guild_id, user_id, type, expires_at, reason) VALUES (?, ?, ?, ?, 'test')",
+        (guild.id, user_id, kind, expires_at)
+    ))
+    return cur.lastrowid
+
+
+def pending(db, run):
+    return [row[0] for row in run(db.fetchall("SELECT id FROM punishments ORDER BY id"))]
+
+
+def test_restart_lifts_what_expired_while_offline(cog, db, guild, http, run):
+    member = guild.members[0]
+    member.roles.append(muted(guild))
+    past = int(time.time()) - 60
+    add_punishment(db, run, guild, member.id, "mute", past)
+    add_punishment(db, run, guild, guild.members[1].id, "ban", past)
+    later = add_punishment(db, run, guild, guild.members[2].id, "ban", int(time.time()) + 3600)
+
+    async def restart():
+        cog.expiries.start()
+        while len(await db.fetchall("SELECT id FROM punishments")) > 1:
+            await asyncio.sleep(0.01)
+        await cog.expiries.stop()
+
+    run(asyncio.wait_for(restart(), timeout=5))
+    assert muted(guild) not in member.roles
+    assert http.calls["DELETE /bans"] == 1
+    assert pending(db, run) == [later]
+
+
+def test_tempmute_is_scheduled_and_replaced(cog, db, guild, run):
+    run(cog.expiries._reload())
+    member = guild.members[0]
+    ctx = FakeContext(cog.bot, guild, guild.moderator)
+    run(cog.mute.callback(cog, ctx, member, "10m"))
+    first = pending(db, run)
+    run(cog.mute.callback(cog, ctx, member, "20m"))
+    second = pending(db, run)
+    assert len(first) == len(second) == 1 and first != second
+    assert list(cog.expiries._deadlines) == second
+
+    run(cog.mute.callback(cog, ctx, member))   # permanent: nothing left to lift
+    assert pending(db, run) == [] and cog.expiries.pending == 0
+
+
+def test_transient_failures_are_retried(cog, db, guild, run, monkeypatch):
+    run(cog.expiries._reload())
+    punishment_id = add_punishment(db, run, guild, guild.members[0].id, "ban", int(time.time()) - 1)
+
+    async def unavailable(user, reason=None):
+        raise discord.HTTPException(_FakeResponse(503), "Service Unavailable")
+    monkeypatch.setattr(guild, "unban", unavailable)
+
+    run(cog._lift_due_punishments([punishment_id]))
+    assert pending(db, run) == [punishment_id]
+    assert cog.expiries._deadlines[punishment_id] > time.time()
+
+
+def test_permission_errors_are_final(cog, db, guild, run, monkeypatch):
+    run(cog.expiries._reload())
+    punishment_id = add_punishment(db, run, guild, guild.members[0].id, "ban", int(time.time()) - 1)
+
+    async def forbidden(user, reason=None):
+        raise discord.Forbidden(_FakeResponse(403), "Missing Permissions")
+    monkeypatch.setattr(guild, "unban", forbidden)
+
+    run(cog._lift_due_punishments([punishment_id]))
+    assert pending(db, run) == []
+    assert punishment_id not in cog.expiries._deadlines
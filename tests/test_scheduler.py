@@ -0,0 +1,52 @@
+import time
+import asyncio
+
+from scheduler import DeadlineScheduler
+
+
+async def nothing(until):
+    return []
+
+
+def test_only_the_current_window_is_held(run):
+    scheduler = DeadlineScheduler("test", None, nothing, horizon=100)
+    run(scheduler._reload())
+    now = int(time.time())
+    scheduler.schedule("soon", now + 10)
+    scheduler.schedule("later", now + 1000)   # the loader brings it in with its window
+    assert scheduler.pending == 1
+
+
+def test_cancelled_and_rescheduled_keys_fire_once(run):
+    scheduler = DeadlineScheduler("test", None, nothing, batch_size=2)
+    run(scheduler._reload())
+    now = int(time.time())
+    for key in "abcd":
+        scheduler.schedule(key, now - 10)
+    scheduler.cancel("b")
+    scheduler.schedule("c", now - 5)
+    assert scheduler._pop_due(now) == ["a", "d"]   # due order, stale entries skipped
+    assert scheduler._pop_due(now) == ["c"]
+    assert scheduler._pop_due(now) == [] and scheduler.pending == 0
+
+
+def test_failed_batches_are_retried(run):
+    calls = []
+
+    async def loader(until):
+        return [("key", int(time.time()) - 1)]
+
+    async def handler(keys):
+        calls.append(list(keys))
+        if len(calls) == 1:
+            raise RuntimeError("discord is down")
+
+    async def main():
+        scheduler = DeadlineScheduler("test", handler, loader, retry_delay=0)
+        scheduler.start()
+        while len(calls) < 2:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    run(asyncio.wait_for(main(), timeout=5))
+    assert calls[:2] == [["key"], ["key"]]
@@ -0,0 +1,29 @@
+import random
+import sqlite3
+
+import sharding
+
+
+def test_split_shards_covers_every_shard_once():
+    assert sharding.split_shards(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert sharding.split_shards(2, 5) == [[0], [1]]
+
+
+def test_owned_filter_matches_shard_for(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARD_COUNT", 4)
+    monkeypatch.setattr(sharding, "SHARD_IDS", (1, 3))
+    guild_ids = [random.getrandbits(63) for _ in range(200)]
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE guilds (guild_id INTEGER)")
+    conn.executemany("INSERT INTO guilds VALUES (?)", [(g,) for g in guild_ids])
+    condition, params = sharding.owned_filter()
+    owned = {row[0] for row in conn.execute(f"SELECT guild_id FROM guilds WHERE {condition}", params)}
+    assert owned == {g for g in guild_ids if sharding.owns(g)}
+    assert not sharding.is_primary()
+
+
+def test_unsharded_owns_everything():
+    assert sharding.SHARD_IDS is None
+    assert sharding.owned_filter() == ("1", ())
+    assert sharding.owns(12345) and sharding.is_primary()
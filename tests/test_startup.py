@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fake_discord import _FakeResponse
+from startup import sync_commands
+
+
+class Tree:
+    def __init__(self, error: Exception = None):
+        self.client = SimpleNamespace(application_id=1)
+        self.error = error
+        self.syncs = 0
+
+    def get_commands(self):
+        return []
+
+    async def sync(self):
+        self.syncs += 1
+        if self.error is not None:
+            raise self.error
+
+
+def test_sync_skipped_when_unchanged(db, run):
+    tree = Tree()
+    assert run(sync_commands(tree, db)) is True
+    assert run(sync_commands(tree, db)) is False
+    assert tree.syncs == 1
+
+
+def test_failed_sync_lets_startup_continue_and_retries_next_time(db, run):
+    failing = Tree(discord.HTTPException(_FakeResponse(503), "Service Unavailable"))
+    assert run(sync_commands(failing, db)) is False
+
+    tree = Tree()
+    assert run(sync_commands(tree, db)) is True   # the failed digest wasn't recorded
+    assert tree.syncs == 1
@@ -0,0 +1,38 @@
+import pytest
+
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+def test_fingerprint_folds_in_lists_and_whitespace():
+    assert tracing.fingerprint("SELECT *\n  FROM t WHERE id IN (?, ?,?)") == "SELECT * FROM t WHERE id IN (?...)"
+    assert tracing.fingerprint("SELECT " + "x" * 200).endswith("...")
+    assert len(tracing.fingerprint("SELECT " + "x" * 200)) == 120
+
+
+def test_traced_records_time_and_errors(run):
+    @tracing.traced("test:op")
+    async def op(fail):
+        if fail:
+            raise ValueError
+
+    run(op(False))
+    with pytest.raises(ValueError):
+        run(op(True))
+    (name, stats), = tracing.top()
+    assert name == "test:op" and stats.count == 2 and stats.errors == 1
+
+
+def test_plans_are_explained_once_per_interval(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(tracing.time, "monotonic", lambda: now)
+    assert tracing.should_explain("test fp") is True
+    assert tracing.should_explain("test fp") is False
+    now += tracing.SLOW_PLAN_INTERVAL
+    assert tracing.should_explain("test fp") is True
@@ -0,0 +1,52 @@
+import time
+
+from warn_cache import WarnCounter
+
+
+def add_warn(db, run, user_id, expires_at=None, permanent=0):
+    run(db.execute(
+        "INSERT INTO warns (guild_id, user_id, mod_id, reason, created_at, expires_at, permanent) VALUES (1, ?, 1, 'x', ?, ?, ?)",
+        (user_id, int(time.time()), expires_at, permanent)
+    ))
+
+
+def test_counts_are_seeded_then_kept_by_record(db, run):
+    counter = WarnCounter(db)
+    add_warn(db, run, 10, expires_at=int(time.time()) + 3600)
+    assert run(counter.get(1, 10)) == 1
+
+    add_warn(db, run, 10, permanent=1)
+    counter.record(1, 10)
+    assert run(counter.get(1, 10)) == 2
+    assert counter._entries[(1, 10)][0] == 2
+
+
+def test_expiry_reseeds_the_count(db, run, monkeypatch):
+    counter = WarnCounter(db)
+    now = int(time.time())
+    add_warn(db, run, 10, expires_at=now + 60)
+    add_warn(db, run, 10, permanent=1)
+    assert run(counter.get(1, 10)) == 2
+
+    monkeypatch.setattr("warn_cache.time.time", lambda: now + 61)
+    assert run(counter.get(1, 10)) == 1
+
+
+def test_cache_is_bounded(db, run):
+    counter = WarnCounter(db, max_entries=2)
+    for user_id in (10, 11, 12):
+        counter.prime(1, user_id, 0)
+    assert list(counter._entries) == [(1, 11), (1, 12)]
+
+
+def test_sweep_archives_expired_warns_and_drops_their_counts(db, run):
+    counter = WarnCounter(db)
+    now = int(time.time())
+    add_warn(db, run, 10, expires_at=now - 1)
+    add_warn(db, run, 10, expires_at=now + 3600)
+    counter.prime(1, 10, 2)
+
+    assert run(counter.sweep(batch_size=1)) == 1
+    assert (1, 10) not in counter._entries
+    assert run(db.fetchone("SELECT COUNT(*) FROM warns_archive")) == (1,)
+    assert run(counter.get(1, 10)) == 1
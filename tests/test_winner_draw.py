@@ -0,0 +1,35 @@
+import asyncio
+
+from giveaway_archive import archive_giveaway
+from winner_draw import draw_winners
+
+
+def test_concurrent_draws_never_pick_the_same_user(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=range(1, 7))
+
+    async def rerolls():
+        return await asyncio.gather(*(draw_winners(db, giveaway_id, 2) for _ in range(3)))
+    picked = [user for draw in run(rerolls()) for user in draw]
+
+    assert sorted(picked) == list(range(1, 7))
+    assert run(db.fetchval("SELECT COUNT(*) FROM giveaway_winners WHERE giveaway_id = ?", (giveaway_id,))) == 6
+
+
+def test_draws_run_out_of_eligible_entrants(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=range(1, 4))
+    assert len(run(draw_winners(db, giveaway_id, 2))) == 2
+    assert len(run(draw_winners(db, giveaway_id, 2))) == 1
+    assert run(draw_winners(db, giveaway_id, 2)) == []
+
+
+def test_archived_draw_excludes_previous_winners(db, run, new_giveaway):
+    giveaway_id = new_giveaway(entrants=range(1, 5))
+    first = run(draw_winners(db, giveaway_id, 2))
+
+    async def archive():
+        async with db.transaction() as conn:
+            await archive_giveaway(conn, giveaway_id)
+    run(archive())
+
+    second = run(draw_winners(db, giveaway_id, 5))
+    assert sorted(first + second) == [1, 2, 3, 4]
@@ -0,0 +1,239 @@
+import io
+import os
+import re
+import time
+import pstats
+import asyncio
+import logging
+import cProfile
+import functools
+from contextlib import contextmanager
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_PLAN_INTERVAL = 60          # log a given slow statement's plan at most once a minute
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+
+OP_SECONDS = metrics.REGISTRY.histogram("bot_op_seconds", "Traced operation time", ("op",))
+OP_ERRORS = metrics.REGISTRY.counter("bot_op_errors_total", "Traced operations that raised", ("op",))
+
+
+class OpStats:
+    __slots__ = ("count", "total", "max", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+
+_stats: dict[str, OpStats] = {}
+
+
+def record(op: str, elapsed: float, error: bool = False):
+    stats = _stats.get(op)
+    if stats is None:
+        stats = _stats[op] = OpStats()
+    stats.count += 1
+    stats.total += elapsed
+    if elapsed > stats.max:
+        stats.max = elapsed
+    OP_SECONDS.observe(elapsed, op)
+    if error:
+        stats.errors += 1
+        OP_ERRORS.inc(op)
+
+
+def top(limit: int = 15, by: str = "total") -> list:
+    """[(op, OpStats)] sorted by total/max/count, highest first"""
+    return sorted(_stats.items(), key=lambda item: getattr(item[1], by), reverse=True)[:limit]
+
+
+def reset():
+    _stats.clear()
+
+
+@contextmanager
+def span(op: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record(op, time.perf_counter() - start, error=True)
+        raise
+    record(op, time.perf_counter() - start)
+
+
+def traced(op: str):
+    """Decorator for coroutine functions/methods"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(op):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------- SQL ---------------- #
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_fingerprints: dict[str, str] = {}
+_plan_logged: dict[str, float] = {}
+
+
+def fingerprint(sql: str) -> str:
+    """One op name per statement shape: whitespace collapsed, IN (?, ?, ...) folded"""
+    fp = _fingerprints.get(sql)
+    if fp is None:
+        fp = _IN_LIST.sub("(?...)", _SPACE.sub(" ", sql).strip())
+        if len(fp) > 120:
+            fp = fp[:117] + "..."
+        if len(_fingerprints) < 10_000:
+            _fingerprints[sql] = fp
+    return fp
+
+
+def should_explain(fp: str) -> bool:
+    now = time.monotonic()
+    if now - _plan_logged.get(fp, 0) < SLOW_PLAN_INTERVAL:
+        return False
+    _plan_logged[fp] = now
+    return True
+
+
+# ---------------- COMMANDS ---------------- #
+
+class TracedCommandTree(app_commands.CommandTree):
+    """Times every app command from the tree's check to completion or error."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["trace_start"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        _finish_app_command(interaction, interaction.command, "error")
+        await super().on_error(interaction, error)
+
+
+def _finish_app_command(interaction: discord.Interaction, command, status: str):
+    start = interaction.extras.pop("trace_start", None)
+    if start is None or command is None:
+        return
+    elapsed = time.perf_counter() - start
+    record(f"slash:{command.qualified_name}", elapsed, error=status == "error")
+    metrics.COMMAND_SECONDS.observe(elapsed, "slash", command.qualified_name, status)
+
+
+def install(bot: commands.Bot):
+    """Time every prefix command (invoke hooks) and app command (TracedCommandTree)"""
+
+    @bot.before_invoke
+    async def start_command_timer(ctx: commands.Context):
+        ctx.trace_start = time.perf_counter()
+
+    @bot.after_invoke
+    async def finish_command_timer(ctx: commands.Context):
+        elapsed = time.perf_counter() - ctx.trace_start
+        status = "error" if ctx.command_failed else "ok"
+        record(f"cmd:{ctx.command.qualified_name}", elapsed, error=ctx.command_failed)
+        metrics.COMMAND_SECONDS.observe(elapsed, "prefix", ctx.command.qualified_name, status)
+
+    async def on_app_command_completion(interaction: discord.Interaction, command):
+        _finish_app_command(interaction, command, "ok")
+
+    bot.add_listener(on_app_command_completion)
+
+
+# ---------------- PROFILING ---------------- #
+
+def _load_yappi():
+    """Optional, coroutine-aware wall-clock profiles; imported on first use only"""
+    try:
+        import yappi
+    except ImportError:
+        return None
+    return yappi
+
+
+class Profiler:
+    """Runtime-toggled profile capture of the event loop thread.
+
+    Uses yappi (wall clock, coroutine aware) when installed, else cProfile.
+    ``start(seconds)`` stops itself after the window; each capture is dumped
+    to PROFILE_DIR and summarised as text.
+    """
+
+    def __init__(self):
+        self._profile = None
+        self._timer: asyncio.TimerHandle = None
+        self.last_report: str = None
+        self.last_path: str = None
+        self._yappi = False   # not looked up yet
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    @property
+    def yappi(self):
+        if self._yappi is False:
+            self._yappi = _load_yappi()
+        return self._yappi
+
+    @property
+    def backend(self) -> str:
+        return "yappi" if self.yappi is not None else "cProfile"
+
+    def start(self, seconds: float = None):
+        if self.running:
+            return
+        yappi = self.yappi
+        if yappi is not None:
+            yappi.clear_stats()
+            yappi.set_clock_type("wall")
+            yappi.start()
+            self._profile = yappi
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if seconds:
+            self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        log.info(f"Profiling started ({self.backend})")
+
+    def stop(self, limit: int = 30) -> str:
+        if not self.running:
+            return self.last_report
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.pstats"))
+        out = io.StringIO()
+        yappi = self.yappi
+        if yappi is not None and self._profile is yappi:
+            yappi.stop()
+            stats = yappi.get_func_stats()
+            stats.save(path, type="pstat")
+            stats.sort("ttot").print_all(out=out)
+        else:
+            self._profile.disable()
+            self._profile.dump_stats(path)
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        self._profile = None
+        self.last_report = out.getvalue()
+        self.last_path = path
+        log.info(f"Profile saved to {path}")
+        return self.last_report
+
+
+profiler = Profiler()
@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+
+from database import Database
+
+# active = permanent, or not yet past expires_at; MIN() gives the next time the count drops
+ACTIVE_SQL = (
+    "SELECT COUNT(*), MIN(CASE WHEN permanent=0 THEN expires_at END) FROM warns "
+    "WHERE guild_id=? AND user_id=? AND (permanent=1 OR expires_at IS NULL OR expires_at>?)"
+)
+
+
+class WarnCounter:
+    """In-memory active-warn counts per (guild, user).
+
+    Counts are seeded lazily from an indexed query and then kept current by
+    ``record()`` on every new warn. Each entry remembers when its earliest
+    warn expires; a lookup past that point reseeds it, so expiry is applied
+    incrementally without scanning. The cache is LRU-bounded.
+    """
+
+    def __init__(self, db: Database, max_entries: int = 50_000):
+        self.db = db
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()   # (guild_id, user_id) -> [count, next_expiry]
+
+    async def get(self, guild_id: int, user_id: int) -> int:
+        key = (guild_id, user_id)
+        now = int(time.time())
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > now):
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        count, next_expiry = await self.db.fetchone(ACTIVE_SQL, (guild_id, user_id, now))
+        self._store(key, count, next_expiry)
+        return count
+
+    def record(self, guild_id: int, user_id: int, expires_at: int = None):
+        """Account for a warn that was just written."""
+        entry = self._entries.get((guild_id, user_id))
+        if entry is None:
+            return  # the next get() seeds it from the DB
+        entry[0] += 1
+        if expires_at is not None and (entry[1] is None or expires_at < entry[1]):
+            entry[1] = expires_at
+
+    def prime(self, guild_id: int, user_id: int, count: int, next_expiry: int = None):
+        self._store((guild_id, user_id), count, next_expiry)
+
+    def invalidate(self, guild_id: int, user_id: int):
+        self._entries.pop((guild_id, user_id), None)
+
+    def _store(self, key, count: int, next_expiry: int):
+        self._entries[key] = [count, next_expiry]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def sweep(self, batch_size: int = 500) -> int:
+        """Move expired warns to warns_archive and drop their cached counts."""
+        now = int(time.time())
+        archived = 0
+        while True:
+            async with self.db.transaction() as conn:
+                async with conn.execute(
+                    "SELECT id FROM warns WHERE permanent=0 AND expires_at<=? LIMIT ?", (now, batch_size)
+                ) as cur:
+                    ids = [row[0] for row in await cur.fetchall()]
+                if not ids:
+                    return archived
+                placeholders = ", ".join("?" * len(ids))
+                await conn.execute(
+                    "INSERT OR IGNORE INTO warns_archive (id, guild_id, user_id, mod_id, reason, created_at, expires_at, permanent, archived_at) "
+                    f"SELECT id, guild_id, user_id, mod_id, reason, created_at, expires_at, permanent, ? FROM warns WHERE id IN ({placeholders})",
+                    (now, *ids)
+                )
+                async with conn.execute(
+                    f"DELETE FROM warns WHERE id IN ({placeholders}) RETURNING guild_id, user_id", ids
+                ) as cur:
+                    rows = await cur.fetchall()
+            for guild_id, user_id in rows:
+                self.invalidate(guild_id, user_id)
+            archived += len(rows)
@@ -0,0 +1,90 @@
+import time
+import secrets
+
+from database import Database
+from giveaway_archive import archived
+
+# CSPRNG: winners must not be predictable from earlier draws
+_rng = secrets.SystemRandom()
+
+# entrants of a giveaway that haven't already won it, in primary-key order
+ELIGIBLE_SQL = """
+    FROM giveaway_entries AS e
+    WHERE e.giveaway_id = ?
+      AND NOT EXISTS (
+          SELECT 1 FROM giveaway_winners AS w
+          WHERE w.giveaway_id = e.giveaway_id AND w.user_id = e.user_id
+      )
+"""
+
+
+async def draw_winners(db: Database, giveaway_id: int, count: int) -> list:
+    """Pick up to ``count`` winners uniformly at random, excluding previous winners.
+
+    Counting, picking and recording happen in one write transaction, so
+    concurrent draws (two rerolls, a reroll during the end) run one after
+    the other and never pick the same user. Each winner is read with
+    ``LIMIT 1 OFFSET n`` over the entries primary key. SQLite still steps
+    over the n rows before it, checking NOT EXISTS on each, so a draw costs
+    O(entrants) row visits, but the entrant list is never loaded into
+    Python. Archived giveaways are drawn from their packed id array.
+    """
+    entrants = await archived(db, giveaway_id)
+    async with db.transaction() as conn:
+        if entrants is not None:
+            winners = await _pick_archived(conn, giveaway_id, entrants, count)
+        else:
+            winners = await _pick_entries(conn, giveaway_id, count)
+        # keep the draw order random rather than sorted by user id
+        _rng.shuffle(winners)
+        await _record(conn, giveaway_id, winners)
+    return winners
+
+
+async def _pick_entries(conn, giveaway_id: int, count: int) -> list:
+    async with conn.execute(f"SELECT COUNT(*) {ELIGIBLE_SQL}", (giveaway_id,)) as cur:
+        eligible = (await cur.fetchone())[0]
+    winners = []
+    for offset in sorted(_rng.sample(range(eligible), min(count, eligible))):
+        async with conn.execute(
+            f"SELECT e.user_id {ELIGIBLE_SQL} ORDER BY e.user_id LIMIT 1 OFFSET ?",
+            (giveaway_id, offset),
+        ) as cur:
+            winners.append((await cur.fetchone())[0])
+    return winners
+
+
+async def _pick_archived(conn, giveaway_id: int, entrants, count: int) -> list:
+    async with conn.execute("SELECT user_id FROM giveaway_winners WHERE giveaway_id = ?", (giveaway_id,)) as cur:
+        won = {row[0] for row in await cur.fetchall()}
+    eligible = [user_id for user_id in entrants if user_id not in won] if won else entrants
+    return _rng.sample(eligible, min(count, len(eligible)))
+
+
+async def _record(conn, giveaway_id: int, user_ids: list, skip_previous: bool = False):
+    """Store a draw under the giveaway's next draw number (inside a transaction)"""
+    if not user_ids:
+        return
+    async with conn.execute(
+        "SELECT COALESCE(MAX(draw_no), 0) + 1 FROM giveaway_winners WHERE giveaway_id = ?", (giveaway_id,)
+    ) as cur:
+        draw_no = (await cur.fetchone())[0]
+    # picks made in the same transaction are never previous winners, so a conflict there is a bug, not a skip
+    verb = "INSERT OR IGNORE" if skip_previous else "INSERT"
+    await conn.executemany(
+        f"{verb} INTO giveaway_winners (giveaway_id, user_id, draw_no, drawn_at) VALUES (?, ?, ?, ?)",
+        [(giveaway_id, user_id, draw_no, int(time.time())) for user_id in user_ids],
+    )
+
+
+async def record_draw(db: Database, giveaway_id: int, user_ids: list):
+    """Store a draw made outside draw_winners; users who already won are skipped."""
+    async with db.transaction() as conn:
+        await _record(conn, giveaway_id, user_ids, skip_previous=True)
+
+
+async def has_won(db: Database, giveaway_id: int, user_id: int) -> bool:
+    row = await db.fetchone(
+        "SELECT 1 FROM giveaway_winners WHERE giveaway_id = ? AND user_id = ?", (giveaway_id, user_id)
+    )
+    return row is not None